@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.warmup import readiness
+
+router = APIRouter()
+
+@router.get("/health")
+@router.get("/health/live")
+async def live():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def ready():
+    """Readiness: startup warm-up has finished and every step succeeded"""
+    return JSONResponse(readiness.report(), status_code=200 if readiness.ready else 503)
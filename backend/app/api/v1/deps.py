@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -6,6 +7,7 @@ from app.models.user import User
 from app.db.mongodb import db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token", auto_error=False)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     credentials_exception = HTTPException(
@@ -31,4 +33,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         raise credentials_exception
         
     user["id"] = str(user.pop("_id"))
-    return User(**user) 
\ No newline at end of file
+    return User(**user) 
+
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[User]:
+    """The signed-in user, or None for anonymous requests"""
+    if not token:
+        return None
+    return await get_current_user(token)
+
+def get_rag_service():
+    """
+    The RAG service, built on first use. Imported here rather than at module
+    level so loading the API does not pull in LangChain and the provider SDKs.
+    """
+    from app.services.rag_service import get_rag_service
+    return get_rag_service()
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from ....services.rag_service import rag_service
-from ....models.chat import ChatMessage, ChatResponse
+from ....core.streaming import SSE_HEADERS, sse_event, stream_answer, stream_metrics
+from ....services.chat import chat_service
+from ....services.embedding_cache import embedding_cache, query_embedding_cache
+from ....services.session_cache import session_cache
+from ....models.chat import ChatMessage, ChatResponse, MessagePage
+from ....models.user import User
+from ..deps import get_current_user, get_optional_user, get_rag_service
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(message: ChatMessage):
+async def chat_message(
+    message: ChatMessage,
+    current_user: Optional[User] = Depends(get_optional_user),
+    rag_service=Depends(get_rag_service)
+):
     """
-    Process a chat message using RAG
+    Process a chat message using RAG, searching the signed-in user's
+    documents (or only ``document_ids`` when given)
     """
     try:
         logger.info(f"Received message: {message.content}")
@@ -18,7 +30,9 @@ async def chat_message(message: ChatMessage):
         # Get response from RAG
         result = await rag_service.get_response(
             query=message.content,
-            chat_history=[]  # For now, we're not using chat history
+            chat_history=[],  # For now, we're not using chat history
+            user_id=current_user.id if current_user else None,
+            document_ids=message.document_ids
         )
         
         if not result or "answer" not in result:
@@ -41,4 +55,86 @@ async def chat_message(message: ChatMessage):
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while processing your message: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/stream")
+async def chat_stream(
+    message: ChatMessage,
+    current_user: Optional[User] = Depends(get_optional_user),
+    rag_service=Depends(get_rag_service)
+):
+    """
+    Stream a RAG answer as Server-Sent Events: a ``sources`` event with the
+    retrieved chunks, ``token`` events as the model produces them, then
+    ``done`` with the time to first token. For signed-in users the exchange
+    is saved to their chat session (``session_id``, or a new one) once the
+    answer is complete.
+    """
+    started = time.perf_counter()
+    session = None
+    if current_user:
+        try:
+            session = await chat_service.get_or_create_session(current_user.id, message.session_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+    async def events():
+        try:
+            sources, tokens = await rag_service.stream_response(
+                query=message.content,
+                chat_history=[],  # For now, we're not using chat history
+                user_id=current_user.id if current_user else None,
+                document_ids=message.document_ids
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving sources for stream: {str(e)}")
+            stream_metrics.record_error()
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        async def save(answer: str):
+            if session is None:
+                return None
+            await chat_service.append_exchange(session, message.content, answer, sources)
+            return {"session_id": session.id}
+
+        first = {"sources": sources, "session_id": session.id if session else None}
+        async for event in stream_answer(first, tokens, on_complete=save, started=started):
+            yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/sessions/{session_id}/messages", response_model=MessagePage)
+async def session_messages(
+    session_id: str,
+    before: Optional[int] = Query(None, ge=0, description="Return messages before this sequence number"),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    A page of a chat session's messages, oldest first. Pass ``next_before``
+    from the response as ``before`` to page back through older messages.
+    """
+    page = await chat_service.get_messages(session_id, current_user.id, before=before, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return page
+
+@router.get("/stream/stats")
+async def stream_stats():
+    """
+    Time to first token and duration percentiles of recent streamed answers
+    """
+    return stream_metrics.stats()
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss statistics for the query and chunk embedding caches and the
+    chat session cache
+    """
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "chunk_embeddings": embedding_cache.stats(),
+        "chat_sessions": session_cache.stats()
+    }
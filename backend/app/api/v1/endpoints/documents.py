@@ -1,59 +1,45 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse, StreamingResponse, Response
-from typing import List
-from ....services.rag_service import rag_service
+from typing import List, Optional
 from ....services.document_service import document_service
-from ....models.document import DocumentResponse
-import io
+from ....services.ingestion import ingestion_service
+from ....core.background import background_task_manager
+from ....models.document import DocumentResponse, IngestionJob
+from ....models.user import User
+from ..deps import get_optional_user, get_rag_service
+import logging
 import mimetypes
 import os
-import PyPDF2
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
+@router.post("/upload", status_code=202)
+async def upload_document(file: UploadFile = File(...), current_user: Optional[User] = Depends(get_optional_user)):
     """
-    Upload and process a document for RAG
+    Upload a document and queue it for RAG processing, in the signed-in
+    user's namespace
     """
     try:
         # Store document
-        document = await document_service.store_document(file)
+        document = await document_service.store_document(file, user_id=current_user.id if current_user else None)
         
         # Convert ObjectId to string for JSON serialization
         if "_id" in document:
             document["id"] = str(document["_id"])
             del document["_id"]
         
-        # Extract text from PDF
-        if file.filename.endswith('.pdf'):
-            # Reset file pointer
-            await file.seek(0)
-            content = await file.read()
-            
-            # Use PyPDF2 to extract text
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text_content = "\n".join(
-                page.extract_text() for page in pdf_reader.pages
-            )
-        else:
-            # For non-PDF files, try basic text extraction
-            await file.seek(0)
-            content = await file.read()
-            text_content = content.decode('utf-8', errors='ignore')
-        
-        # Process document with RAG
-        await rag_service.process_document(
-            content=text_content,
-            metadata={
-                "id": document["id"],
-                "title": document["title"],
-                "file_path": document["file_path"],
-                "file_type": document.get("file_type", "application/octet-stream")
-            }
-        )
+        # Hand extraction, splitting and embedding to the background worker
+        job = await ingestion_service.create_job(document)
+        await background_task_manager.add_task(job.id)
         
-        return {"message": "Document processed successfully", "document": document}
+        return {
+            "message": "Document queued for processing",
+            "document": document,
+            "job_id": job.id
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Upload error: {str(e)}")  # Add logging
         raise HTTPException(
@@ -61,6 +47,16 @@ async def upload_document(file: UploadFile = File(...)):
             detail=f"Error processing document: {str(e)}"
         )
 
+@router.get("/jobs/{job_id}", response_model=IngestionJob)
+async def get_ingestion_job(job_id: str):
+    """
+    Get the stage, chunk counts and timings of an ingestion job
+    """
+    job = await ingestion_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/", response_model=List[DocumentResponse])
 async def get_documents():
     """
@@ -161,11 +157,16 @@ async def debug_connection():
         }
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, rag_service=Depends(get_rag_service)):
     """Delete a document and its vectors from both MongoDB and Pinecone"""
     try:
         await document_service.initialize()  # Make sure service is initialized
         
+        # Read the vector manifest before the record goes away
+        document = await document_service.get_document(document_id)
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
         # First, delete from MongoDB
         result = await document_service.delete_document(document_id)
         if not result:
@@ -173,8 +174,12 @@ async def delete_document(document_id: str):
             
         # Then, delete from Pinecone
         try:
-            # Delete vectors with matching document_id from Pinecone
-            await rag_service.delete_document_vectors(document_id)
+            # Delete the document's vectors by ID
+            await rag_service.delete_document_vectors(
+                document_id,
+                vector_ids=document.get("vector_ids"),
+                user_id=document.get("user_id")
+            )
         except Exception as e:
             logger.error(f"Error deleting vectors for document {document_id}: {str(e)}")
             # Even if Pinecone deletion fails, we've already deleted from MongoDB
@@ -1,47 +1,190 @@
-from typing import List
+from typing import List, Optional
 import asyncio
 from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import settings
 from app.db.mongodb import db
 from app.models.document import DocumentStatus
-from app.services.document_processor import document_processor
+from app.services.ingestion import ingestion_service
 from bson import ObjectId
+import logging
 import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
 
 class BackgroundTaskManager:
-    def __init__(self):
-        self._processing_queue = asyncio.Queue()
+    """
+    Runs ingestion jobs from the durable ``ingestion_jobs`` collection.
+
+    Jobs are claimed with an atomic ``find_one_and_update`` that takes a lease.
+    The lease is extended by a heartbeat while the job runs. A job whose lease
+    expires, because its worker died, becomes claimable again. Any number of
+    API processes or ``python -m app.worker`` processes can share the queue.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self._is_running = False
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
 
-    async def start(self):
+    @property
+    def jobs(self):
+        return db.db.ingestion_jobs
+
+    async def start(self, concurrency: Optional[int] = None, cleanup: bool = True):
         """Start the background task processor"""
         if self._is_running:
             return
-            
+
         self._is_running = True
-        asyncio.create_task(self._process_queue())
-        asyncio.create_task(self._cleanup_old_documents())
+        self._wakeup = asyncio.Event()
+
+        concurrency = concurrency or settings.INGESTION_CONCURRENCY
+        self._tasks = [
+            asyncio.create_task(self._process_queue())
+            for _ in range(concurrency)
+        ]
+        if cleanup:
+            self._tasks.append(asyncio.create_task(self._cleanup_old_documents()))
+        logger.info(f"Ingestion worker {self.worker_id} started with {concurrency} slots")
 
     async def stop(self):
         """Stop the background task processor"""
         self._is_running = False
+        for task in self._tasks:
+            task.cancel()
+        # Running jobs hand themselves back to the queue as they are cancelled
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def add_task(self, job_id: str):
+        """Make a persisted ingestion job available to workers"""
+        await self.jobs.update_one(
+            {"_id": ObjectId(job_id), "status": DocumentStatus.PENDING},
+            {"$set": {"available_at": datetime.utcnow()}}
+        )
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def ensure_indexes(self):
+        """Create the indexes the claim queries use (run by warm-up, not ``start``)"""
+        await self.jobs.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+        await self.jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
 
-    async def add_task(self, document_id: str):
-        """Add a document to the processing queue"""
-        await self._processing_queue.put(document_id)
+    async def claim_job(self) -> Optional[dict]:
+        """Atomically lease the next runnable job, if any"""
+        now = datetime.utcnow()
+        return await self.jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": DocumentStatus.PENDING, "available_at": {"$lte": now}},
+                    # Jobs whose worker stopped heartbeating
+                    {"status": DocumentStatus.PROCESSING, "lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": DocumentStatus.PROCESSING,
+                    "lease_owner": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=settings.INGESTION_LEASE_SECONDS),
+                    "heartbeat_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
 
     async def _process_queue(self):
-        """Process documents in the queue"""
-        semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent tasks
-        
+        """Claim and run jobs until stopped; one loop per concurrency slot"""
         while self._is_running:
             try:
-                async with semaphore:
-                    document_id = await self._processing_queue.get()
-                    await document_processor.process_document(document_id)
+                job = await self.claim_job()
+                if job is None:
+                    await self._wait_for_work()
+                    continue
+                await self._run_claimed_job(job)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Background task error: {e}")
-            finally:
-                self._processing_queue.task_done()
+                await asyncio.sleep(settings.INGESTION_POLL_INTERVAL)
+
+    async def _wait_for_work(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.INGESTION_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run_claimed_job(self, job: dict):
+        job_id = str(job["_id"])
+        attempts = job.get("attempts", 1)
+
+        if attempts > settings.INGESTION_MAX_ATTEMPTS:
+            await ingestion_service.mark_failed(job_id, job.get("error") or "Lease expired too many times")
+            await self._release(job_id)
+            return
+
+        run = asyncio.create_task(ingestion_service.run_job(job_id))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, run))
+        try:
+            await run
+            await self._release(job_id)
+        except asyncio.CancelledError:
+            if self._is_running:
+                logger.warning(f"Ingestion job {job_id} lost its lease and was abandoned")
+                return
+            # Shutting down: hand the job straight back without using up an attempt
+            await self._release(job_id, {
+                "status": DocumentStatus.PENDING,
+                "available_at": datetime.utcnow()
+            }, attempts=-1)
+            raise
+        except Exception as e:
+            if attempts >= settings.INGESTION_MAX_ATTEMPTS:
+                await ingestion_service.mark_failed(job_id, str(e))
+                await self._release(job_id)
+            else:
+                delay = settings.INGESTION_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+                logger.warning(f"Ingestion job {job_id} failed (attempt {attempts}), retrying in {delay}s")
+                await self._release(job_id, {
+                    "status": DocumentStatus.PENDING,
+                    "available_at": datetime.utcnow() + timedelta(seconds=delay)
+                })
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, run: asyncio.Task):
+        """Extend the lease while the job runs; abandon the job if the lease is lost"""
+        while not run.done():
+            await asyncio.sleep(settings.INGESTION_HEARTBEAT_SECONDS)
+            now = datetime.utcnow()
+            result = await self.jobs.update_one(
+                {"_id": ObjectId(job_id), "lease_owner": self.worker_id},
+                {"$set": {
+                    "lease_expires_at": now + timedelta(seconds=settings.INGESTION_LEASE_SECONDS),
+                    "heartbeat_at": now
+                }}
+            )
+            if result.matched_count == 0:
+                run.cancel()
+                return
+
+    async def _release(self, job_id: str, fields: Optional[dict] = None, attempts: int = 0):
+        """Drop this worker's lease on a job, optionally updating it"""
+        update = {"$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        if fields:
+            update["$set"] = fields
+        if attempts:
+            update["$inc"] = {"attempts": attempts}
+        await self.jobs.update_one(
+            {"_id": ObjectId(job_id), "lease_owner": self.worker_id},
+            update
+        )
 
     async def _cleanup_old_documents(self):
         """Cleanup old failed documents and temporary files"""
@@ -57,7 +200,10 @@ class BackgroundTaskManager:
                 async for doc in cursor:
                     # Delete associated files and records
                     document_id = str(doc["_id"])
-                    await self._cleanup_document(document_id)
+                    try:
+                        await self._cleanup_document(document_id)
+                    except Exception as e:
+                        logger.error(f"Error cleaning up document {document_id}: {str(e)}")
                 
             except Exception as e:
                 print(f"Error in cleanup task: {str(e)}")
@@ -70,11 +216,13 @@ class BackgroundTaskManager:
         # Delete chunks
         await db.db.document_chunks.delete_many({"document_id": document_id})
         
-        # Delete vectors
-        from app.services.vector_store import vector_store_service
+        # Delete vectors from the owner's namespace, document vector included;
+        # if this fails the record is kept and retried on the next run
+        from app.services.rag_service import get_rag_service
         doc = await db.db.documents.find_one({"_id": ObjectId(document_id)})
-        if doc and "vector_ids" in doc:
-            await vector_store_service.delete_vectors(doc["vector_ids"])
+        if doc:
+            rag_service = await asyncio.to_thread(get_rag_service)
+            await rag_service.delete_document_vectors(document_id, doc.get("vector_ids"), doc.get("user_id"))
         
         # Delete document record
         await db.db.documents.delete_one({"_id": ObjectId(document_id)})
@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     # Server settings
     PORT: int = 8000
     ENVIRONMENT: str = "development"
+    WARMUP_RETRY_DELAY_SECONDS: float = 1.0  # First retry of a failed warm-up step; doubles after each failure
+    WARMUP_RETRY_MAX_DELAY_SECONDS: float = 60.0
     
     # MongoDB settings
     MONGODB_URL: str = "mongodb://localhost:27017"
@@ -24,15 +26,102 @@ class Settings(BaseSettings):
     
     # API Keys and Environment
     OPENAI_API_KEY: str
-    PINECONE_API_KEY: str
-    PINECONE_ENV: str
+    PINECONE_API_KEY: str = ""  # Required when VECTOR_STORE_BACKEND is "pinecone"
+    PINECONE_ENV: str = ""
     PINECONE_INDEX_NAME: str = "DocChat"
     ANTHROPIC_API_KEY: str | None = None
     COHERE_API_KEY: str | None = None
     
+    # OpenAI HTTP client, shared by every service in the process
+    OPENAI_BASE_URL: str | None = None  # e.g. a proxy or a local stand-in
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    OPENAI_TIMEOUT_SECONDS: float = 60.0  # Per request
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_MAX_RETRIES: int = 2
+    
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB in bytes
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Read uploads in 1MB blocks
+    
+    # Document processing
+    PDF_EXTRACTION_WORKERS: int | None = None  # Defaults to os.cpu_count()
+    
+    # Ingestion queue
+    RUN_INGESTION_WORKER: bool = True  # Process jobs inside the API process too
+    INGESTION_CONCURRENCY: int = 4  # Jobs run at once per worker process
+    INGESTION_LEASE_SECONDS: int = 120
+    INGESTION_HEARTBEAT_SECONDS: int = 30
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BACKOFF_SECONDS: int = 30
+    INGESTION_POLL_INTERVAL: float = 2.0
+    
+    # Embeddings
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_DIMENSIONS: int | None = None  # text-embedding-3-* only; changing it needs a new index
+    EMBEDDING_BATCH_MAX_TOKENS: int = 50000  # Token budget per embed_documents request
+    EMBEDDING_BATCH_MAX_SIZE: int = 256  # Chunks per request
+    EMBEDDING_MAX_CONCURRENT_BATCHES: int = 4
+    EMBEDDING_MAX_RETRIES: int = 3
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000  # ~1.2GB of 1536-d float32 vectors
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = 3600
+    
+    # Vector store
+    VECTOR_STORE_BACKEND: str = "pinecone"  # "pinecone", "numpy" (exact) or "ivf" (approximate)
+    LOCAL_VECTOR_INDEX_PATH: str = "cache/vector_index"
+    IVF_NLIST: int | None = None  # Defaults to 4 * sqrt(vectors) at training time
+    IVF_NPROBE: int = 16
+    IVF_TRAIN_MIN_VECTORS: int = 20000  # Smaller namespaces are searched exactly
+    IVF_COMPACTION_THRESHOLD: float = 0.2  # Tombstone fraction that triggers compaction
+    VECTOR_LOG_COMPACTION_THRESHOLD: float = 0.5  # Superseded log records, relative to live vectors, that trigger a rewrite
+    VECTOR_QUANTIZATION: str | None = None  # "int8" or "float16" first pass for local indexes
+    VECTOR_RESCORE_FACTOR: int = 4  # Candidates rescored at full precision per result
+    VECTOR_NAMESPACE_MODE: str = "user"  # "user" (a namespace per user) or "shared"
+    VECTOR_IO_MAX_CONCURRENCY: int = 16  # Threads (and Pinecone connections) for blocking vector calls
+    VECTOR_IO_TIMEOUT_SECONDS: float = 10.0  # Per Pinecone call, including time queued for a thread
+    VECTOR_DELETE_BATCH_SIZE: int = 1000  # Pinecone's limit of IDs per delete
+    VECTOR_DELETE_CONCURRENCY: int = 4
+    
+    # Chunk store
+    CHUNK_STORE_ENABLED: bool = True  # Keep chunk text in MongoDB instead of vector metadata
+    CHUNK_STORE_COMPRESSION: str | None = None  # "zstd" compresses stored text
+    CHUNK_STORE_COMPRESSION_LEVEL: int = 3
+    
+    # Hybrid retrieval
+    HYBRID_SEARCH_ENABLED: bool = False  # Fuse BM25 keyword results with vector results; single process only
+    LEXICAL_INDEX_PATH: str = "cache/lexical_index"
+    LEXICAL_COMPACTION_THRESHOLD: float = 0.5  # Dead log records, relative to live chunks, that trigger a rewrite
+    HYBRID_FETCH_K: int = 20  # Candidates taken from each retriever before fusion
+    RRF_K: int = 60  # Reciprocal rank fusion constant
+    
+    # Two-stage retrieval
+    RETRIEVAL_MODE: str = "single"  # "single" or "two_stage" (documents first, then their chunks)
+    TWO_STAGE_TOP_DOCUMENTS: int = 10  # Documents whose chunks are searched
+    DOCUMENT_INDEX_NAMESPACE: str = "__documents__"  # Holds one mean vector per document
+    
+    # Chat history
+    CHAT_HISTORY_MAX_TOKENS: int = 3000  # Prompt budget for system prompt, summary, history and message
+    CHAT_HISTORY_KEEP_TURNS: int = 6  # Recent user/assistant turns always sent verbatim
+    CHAT_HISTORY_SUMMARY_BATCH_TURNS: int = 4  # Older turns folded into the summary at once
+    CHAT_SUMMARY_MAX_TOKENS: int = 300
+    CHAT_SUMMARY_MODEL: str = "gpt-3.5-turbo"
+    CHAT_SESSION_LOAD_MAX_MESSAGES: int = 100  # Unsummarized messages loaded with a session
+    CHAT_MESSAGES_PAGE_SIZE: int = 50
+
+    # Chat session cache
+    CHAT_SESSION_CACHE_ENABLED: bool = True
+    CHAT_SESSION_CACHE_MAX_SESSIONS: int = 1000
+    CHAT_SESSION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Estimated size of cached sessions
+    CHAT_SESSION_DURABILITY: str = "write_through"  # Or "write_behind": batched writes, a crash loses the last flush interval
+    CHAT_SESSION_FLUSH_INTERVAL_SECONDS: float = 1.0  # Longest a write-behind turn stays unsaved
+    CHAT_SESSION_FLUSH_BATCH_SIZE: int = 200  # Pending messages that trigger an early flush
+    CHAT_SESSION_MAX_PENDING_MESSAGES: int = 5000  # Appends wait for a flush beyond this
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000"]
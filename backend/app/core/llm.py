@@ -3,9 +3,6 @@ from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
 from langchain_core.language_models.base import BaseLanguageModel
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_cohere import ChatCohere
 from app.core.config import settings
 
 class ModelProvider(str, Enum):
@@ -80,15 +77,18 @@ class ModelManager:
         return self.models[model_name]
 
     def _initialize_model(self, model_name: str):
-        """Initialize a new model instance"""
+        """Initialize a new model instance, importing its provider's SDK on first use"""
         if model_name not in self.configs:
             raise ValueError(f"Model {model_name} not configured")
 
         config = self.configs[model_name]
         
         if config.provider == ModelProvider.OPENAI:
-            self.models[model_name] = ChatOpenAI(
-                model_name=config.model_name,
+            from app.services.openai_client import get_chat_model
+
+            # Shares the process-wide OpenAI connection pool
+            self.models[model_name] = get_chat_model(
+                config.model_name,
                 temperature=config.temperature,
                 max_tokens=config.max_tokens,
                 model_kwargs={
@@ -101,6 +101,8 @@ class ModelManager:
                 max_retries=config.retry_attempts
             )
         elif config.provider == ModelProvider.ANTHROPIC:
+            from langchain_anthropic import ChatAnthropic
+
             self.models[model_name] = ChatAnthropic(
                 model_name=config.model_name,
                 temperature=config.temperature,
@@ -108,6 +110,8 @@ class ModelManager:
                 anthropic_api_key=settings.ANTHROPIC_API_KEY
             )
         elif config.provider == ModelProvider.COHERE:
+            from langchain_cohere import ChatCohere
+
             self.models[model_name] = ChatCohere(
                 model_name=config.model_name,
                 temperature=config.temperature,
@@ -0,0 +1,110 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+from collections import deque
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def sse_event(event: str, data: Any) -> str:
+    """One Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Headers that keep proxies from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+class StreamMetrics:
+    """
+    Time to first token and total duration of recent streamed answers,
+    kept as a sliding window of samples for percentile reporting.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.ttft: Deque[float] = deque(maxlen=window)
+        self.duration: Deque[float] = deque(maxlen=window)
+        self.streams = 0
+        self.errors = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, ttft: Optional[float], duration: float, tokens: int):
+        with self._lock:
+            self.streams += 1
+            self.tokens += tokens
+            if ttft is not None:
+                self.ttft.append(ttft)
+            self.duration.append(duration)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, Optional[float]]:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {
+            "p50_ms": round(pick(0.5) * 1000, 1),
+            "p95_ms": round(pick(0.95) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1)
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "errors": self.errors,
+                "tokens": self.tokens,
+                "time_to_first_token": self._percentiles(self.ttft),
+                "duration": self._percentiles(self.duration)
+            }
+
+async def stream_answer(
+    first: Dict,
+    tokens: AsyncIterator[str],
+    on_complete: Optional[Callable[[str], Awaitable[Optional[Dict]]]] = None,
+    started: Optional[float] = None,
+    metrics: Optional[StreamMetrics] = None
+) -> AsyncIterator[str]:
+    """
+    SSE events for a streamed answer: ``first`` as the ``sources`` event, a
+    ``token`` event per chunk, then ``done`` with the timings. ``on_complete``
+    gets the full answer once the model finishes (to persist the session);
+    its result is merged into ``done``. Failures end the stream with an
+    ``error`` event. Time to first token is measured from ``started``,
+    normally the start of the request, so it includes retrieval.
+    """
+    metrics = metrics or stream_metrics
+    started = started or time.perf_counter()
+    ttft = None
+    parts = []
+    yield sse_event("sources", first)
+    try:
+        async for token in tokens:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(token)
+            yield sse_event("token", {"content": token})
+        extra = (await on_complete("".join(parts)) if on_complete else None) or {}
+    except Exception as e:
+        logger.error(f"Error streaming answer: {str(e)}")
+        metrics.record_error()
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    duration = time.perf_counter() - started
+    metrics.record(ttft, duration, len(parts))
+    logger.info(f"Streamed {len(parts)} tokens, first after "
+                f"{ttft * 1000 if ttft is not None else float('nan'):.0f} ms, done after {duration * 1000:.0f} ms")
+    yield sse_event("done", {
+        "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+        "total_ms": round(duration * 1000, 1),
+        "tokens": len(parts),
+        **extra
+    })
+
+# Global instance
+stream_metrics = StreamMetrics()
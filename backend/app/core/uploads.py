@@ -0,0 +1,71 @@
+from typing import BinaryIO, Optional, Union
+from pydantic import BaseModel
+from fastapi import UploadFile
+from app.core.config import settings
+from app.core.exceptions import FileSizeTooLargeError
+import aiofiles
+import aiofiles.os
+import hashlib
+import inspect
+import uuid
+
+class StoredUpload(BaseModel):
+    file_path: str
+    file_size: int
+    content_hash: str
+
+async def _read_block(file: Union[UploadFile, BinaryIO], size: int) -> bytes:
+    """Read one block from an UploadFile or a plain file-like object"""
+    block = file.read(size)
+    if inspect.isawaitable(block):
+        block = await block
+    return block
+
+async def save_upload_stream(
+    file: Union[UploadFile, BinaryIO],
+    destination: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """
+    Stream an upload to disk in fixed-size blocks.
+
+    The content is written to a temporary file next to ``destination`` while the
+    SHA-256 hash and size are computed, then moved into place with an atomic
+    rename. The size limit is enforced as soon as it is crossed, so at most one
+    block of the upload is held in memory at any time.
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    tmp_path = f"{destination}.{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    file_size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out_file:
+            while True:
+                block = await _read_block(file, chunk_size)
+                if not block:
+                    break
+
+                file_size += len(block)
+                if file_size > max_size:
+                    raise FileSizeTooLargeError(max_size)
+
+                digest.update(block)
+                await out_file.write(block)
+
+        await aiofiles.os.replace(tmp_path, destination)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return StoredUpload(
+        file_path=destination,
+        file_size=file_size,
+        content_hash=digest.hexdigest()
+    )
@@ -1,15 +1,15 @@
 from typing import Optional
-from pinecone import Pinecone, ServerlessSpec
-from langchain_openai import OpenAIEmbeddings
 from app.core.config import settings
+from app.services.embeddings import create_embeddings, embedding_dimension
+from app.services.vector_index import VectorIndex, get_vector_index
 
 class VectorStoreManager:
     _instance: Optional['VectorStoreManager'] = None
     
     def __init__(self):
-        self.index = None
+        self.index: Optional[VectorIndex] = None
         self.embeddings = None
-        self.dimension = 1536  # OpenAI embedding dimension
+        self.dimension = embedding_dimension()
         self.metric = "cosine"
         self.pods = 1
         self.replicas = 1
@@ -23,29 +23,13 @@ class VectorStoreManager:
         return cls._instance
 
     async def _setup(self):
-        """Setup Pinecone and embeddings"""
+        """Setup the vector index and embeddings"""
         try:
-            # Initialize Pinecone
-            pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-            
-            # Create index if it doesn't exist
-            if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():
-                pc.create_index(
-                    name=settings.PINECONE_INDEX_NAME,
-                    dimension=self.dimension,
-                    metric=self.metric,
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region='us-west-1'
-                    )
-                )
-            
-            self.index = pc.Index(settings.PINECONE_INDEX_NAME)
+            # Pinecone or the local index, per VECTOR_STORE_BACKEND
+            self.index = get_vector_index()
             
             # Initialize embeddings
-            self.embeddings = OpenAIEmbeddings(
-                openai_api_key=settings.OPENAI_API_KEY
-            )
+            self.embeddings = create_embeddings()
             
         except Exception as e:
             print(f"Error initializing vector store: {str(e)}")
@@ -57,8 +41,9 @@ class VectorStoreManager:
             raise ValueError("Vector store not initialized")
         
         return {
+            "backend": settings.VECTOR_STORE_BACKEND,
             "index_name": settings.PINECONE_INDEX_NAME,
-            "index_stats": self.index.describe_index_stats(),
+            "index_stats": await self.index.describe_index_stats(),
             "dimension": self.dimension,
             "metric": self.metric
         }
@@ -0,0 +1,111 @@
+from typing import Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class Readiness:
+    """
+    Tracks the startup warm-up steps. The process is live as soon as it serves
+    requests; it is ready once every step has completed. A failed step, for
+    example while MongoDB is still starting, is retried with exponential
+    backoff until it succeeds.
+    """
+
+    def __init__(self, retry_delay: Optional[float] = None, max_retry_delay: Optional[float] = None):
+        self.retry_delay = retry_delay or settings.WARMUP_RETRY_DELAY_SECONDS
+        self.max_retry_delay = max_retry_delay or settings.WARMUP_RETRY_MAX_DELAY_SECONDS
+        self.steps: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None and all(step["status"] == "ready" for step in self.steps.values())
+
+    def report(self) -> Dict:
+        finished = self.finished_at or time.perf_counter()
+        failing = any(step["status"] == "failed" for step in self.steps.values())
+        return {
+            "status": "ready" if self.ready else "failed" if failing else "starting",
+            "warmup_seconds": round(finished - self.started_at, 3) if self.started_at else None,
+            "steps": self.steps
+        }
+
+    async def run(self, steps: Dict[str, Callable[[], Awaitable]]):
+        """
+        Run the warm-up steps concurrently, recording each one's outcome and
+        duration. Returns once every step has succeeded.
+        """
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.steps = {name: {"status": "pending"} for name in steps}
+
+        async def run_step(name: str, step: Callable[[], Awaitable]):
+            started = time.perf_counter()
+            delay = self.retry_delay
+            attempts = 0
+            while True:
+                attempts += 1
+                try:
+                    await step()
+                    break
+                except Exception as e:
+                    logger.error(f"Warm-up step {name} failed (attempt {attempts}), retrying in {delay:g}s: {str(e)}")
+                    self.steps[name] = {"status": "failed", "error": str(e), "attempts": attempts}
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+            self.steps[name] = {
+                "status": "ready",
+                "attempts": attempts,
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+
+        await asyncio.gather(*(run_step(name, step) for name, step in steps.items()))
+        self.finished_at = time.perf_counter()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s: "
+                    f"{ {name: step['status'] for name, step in self.steps.items()} }")
+
+async def _warm_mongodb():
+    from app.core.background import background_task_manager
+    from app.db.mongodb import db
+    from app.services.chat import chat_service
+    from app.services.chunk_store import chunk_store
+
+    if db.db is None:
+        await db.connect_to_database()
+    await db.client.admin.command("ping")
+    await chunk_store.ensure_indexes()
+    await chat_service.ensure_indexes()
+    await background_task_manager.ensure_indexes()
+
+async def _warm_rag_service():
+    # Connects to the vector index, loads the lexical index and builds the chain
+    from app.services.rag_service import get_rag_service
+
+    await asyncio.to_thread(get_rag_service)
+
+async def _warm_tokenizers():
+    # One cl100k_base encoding serves the chat model, history budgets and embedding batches
+    from app.services.embedding_batcher import get_tokenizer
+
+    await asyncio.to_thread(get_tokenizer)
+
+async def _warm_embedding_cache():
+    from app.services.embedding_cache import embedding_cache
+
+    await asyncio.to_thread(embedding_cache.open)
+
+def warmup_steps() -> Dict[str, Callable[[], Awaitable]]:
+    """The application's warm-up steps; they are independent and run in parallel"""
+    return {
+        "mongodb": _warm_mongodb,
+        "rag_service": _warm_rag_service,
+        "tokenizers": _warm_tokenizers,
+        "embedding_cache": _warm_embedding_cache
+    }
+
+# Global instance
+readiness = Readiness()
@@ -1,8 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.health import router as health_router
 from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.background import background_task_manager
+from app.core.warmup import readiness, warmup_steps
+from app.db.mongodb import db
+from app.services.pdf_extractor import pdf_extractor
+from app.services.embedding_cache import embedding_cache
+from app.services.openai_client import close_openai_clients
+from app.services.session_cache import session_cache
+from app.services.vector_io import shutdown_vector_io
+import asyncio
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connections, tokenizers and caches warm up in parallel while the app
+    # already serves requests; /health/ready reports when they are done
+    await db.connect_to_database()
+    warmup = asyncio.create_task(readiness.run(warmup_steps()))
+    await session_cache.start()
+    if settings.RUN_INGESTION_WORKER:
+        await background_task_manager.start()
+    yield
+    warmup.cancel()
+    await background_task_manager.stop()
+    # Write-behind chat messages are saved before the connection closes
+    await session_cache.stop()
+    pdf_extractor.shutdown()
+    embedding_cache.close()
+    shutdown_vector_io()
+    await close_openai_clients()
+    await db.close_database_connection()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -14,4 +46,5 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
+app.include_router(health_router)
+app.include_router(api_router, prefix="/api/v1")
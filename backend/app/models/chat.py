@@ -1,10 +1,57 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class MessageRole(str, Enum):
+    SYSTEM = "system"
+    USER = "user"
+    ASSISTANT = "assistant"
+
+class Message(BaseModel):
+    role: MessageRole
+    content: str
+    sources: Optional[List[Dict[str, Any]]] = None
+    seq: Optional[int] = None  # Position in the session, assigned when stored
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ChatSession(BaseModel):
+    id: str
+    user_id: str
+    title: str = "New Chat"
+    messages: List[Message] = Field(default_factory=list)  # Loaded messages: the unsummarized tail
+    message_count: int = 0  # Messages stored in the chat_messages collection
+    summary: Optional[str] = None  # Running summary of the oldest messages
+    summarized_count: int = 0  # Messages folded into the summary, from the start
+    created_at: datetime
+    updated_at: datetime
+
+    def unsummarized(self) -> List[Message]:
+        """Loaded messages not yet folded into the summary"""
+        if self.messages and self.messages[0].seq is not None:
+            return [message for message in self.messages if message.seq >= self.summarized_count]
+        return self.messages[self.summarized_count:]
+
+    def mark_summarized(self, messages: List[Message]):
+        """Record that ``messages``, the oldest unsummarized ones, are now in the summary"""
+        if messages and messages[-1].seq is not None:
+            self.summarized_count = messages[-1].seq + 1
+        else:
+            self.summarized_count += len(messages)
+
+class MessagePage(BaseModel):
+    messages: List[Message]
+    next_before: Optional[int] = None  # Pass as ``before`` for the previous page; None at the start
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
 
 class ChatMessage(BaseModel):
     content: str
     session_id: Optional[str] = None
+    document_ids: Optional[List[str]] = None  # Only search these documents
 
 class ChatResponse(BaseModel):
     content: str
-    sources: Optional[List[Dict[str, Any]]] = []
\ No newline at end of file
+    sources: Optional[List[Dict[str, Any]]] = []
@@ -1,6 +1,29 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 from datetime import datetime
+from enum import Enum
+
+class DocumentStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class DocumentCreate(BaseModel):
+    title: str
+    file_type: str
+    user_id: Optional[str] = None
+    file_path: str
+
+class Document(DocumentCreate):
+    id: str
+    status: DocumentStatus = DocumentStatus.PENDING
+    file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    vector_ids: Optional[List[str]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
 
 class DocumentResponse(BaseModel):
     id: str
@@ -13,4 +36,27 @@ class DocumentResponse(BaseModel):
     vector_ids: Optional[List[str]] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class IngestionStage(str, Enum):
+    QUEUED = "queued"
+    EXTRACTING = "extracting"
+    SPLITTING = "splitting"
+    EMBEDDING = "embedding"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class IngestionJob(BaseModel):
+    id: str
+    document_id: str
+    status: DocumentStatus = DocumentStatus.PENDING
+    stage: IngestionStage = IngestionStage.QUEUED
+    chunks_total: int = 0
+    chunks_indexed: int = 0
+    chunks_per_sec: Optional[float] = None  # Embedding and upsert throughput
+    timings: Dict[str, float] = Field(default_factory=dict)  # Seconds spent per stage
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,19 +1,146 @@
-from typing import Optional, List
-from app.models.chat import ChatSession, Message, MessageRole, ChatRequest
-from app.db.mongodb import db
+from typing import AsyncIterator, Dict, Optional, List
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.models.chat import ChatSession, Message, MessagePage, MessageRole, ChatRequest
 from app.core.config import settings
+from app.db.mongodb import db
+from app.services.chat_history import history_manager
+from app.services.openai_client import get_async_openai
+from app.services.session_cache import SessionCache, session_cache
 import logging
 from datetime import datetime
 import uuid
-from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are a helpful AI assistant. You must maintain context of the conversation 
+                        and remember details that users share with you. When users share personal information like 
+                        their name, you should remember and use it in future responses. Be conversational and friendly 
+                        while maintaining professionalism."""
+
+def stored_time(value: datetime) -> datetime:
+    """``value`` at MongoDB's millisecond precision, as it reads back"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
 class ChatService:
-    def __init__(self):
+    def __init__(self, cache: Optional[SessionCache] = None):
         self.db = None
         self.vector_store = None
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.cache = cache if cache is not None else (session_cache if settings.CHAT_SESSION_CACHE_ENABLED else None)
+
+    @property
+    def client(self):
+        """The shared AsyncOpenAI client; its connections are reused across requests"""
+        return get_async_openai()
+
+    async def build_messages(self, session: ChatSession, message: str) -> List[Dict]:
+        """
+        OpenAI messages for a reply: system prompt, the session's running
+        summary and recent turns within the token budget, and the new message
+        """
+        return await history_manager.prepare(session, message, SYSTEM_PROMPT)
+
+    async def get_or_create_session(self, user_id: str, session_id: Optional[str] = None) -> ChatSession:
+        if session_id:
+            session = await self.get_session(session_id, user_id)
+            if not session:
+                raise ValueError("Session not found")
+            return session
+        return await self.create_session(user_id)
+
+    async def stream_reply(self, session: ChatSession, message: str) -> AsyncIterator[str]:
+        """Stream the assistant's reply token by token"""
+        stream = await self.client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=await self.build_messages(session, message),
+            temperature=0.7,
+            max_tokens=500,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def append_exchange(
+        self,
+        session: ChatSession,
+        message: str,
+        answer: str,
+        sources: Optional[List[Dict]] = None
+    ) -> ChatSession:
+        """Add a user message and the assistant's answer to the session"""
+        return await self.append_messages(session, [
+            Message(role=MessageRole.USER, content=message, created_at=datetime.utcnow()),
+            Message(role=MessageRole.ASSISTANT, content=answer, sources=sources or None, created_at=datetime.utcnow())
+        ])
+
+    async def append_messages(self, session: ChatSession, messages: List[Message]) -> ChatSession:
+        """
+        Store new messages without rewriting the session's history.
+
+        One ``find_one_and_update`` reserves their sequence numbers (``$inc`` of
+        ``message_count``) and saves the session's small fields (summary,
+        title, timestamps); one ``insert_many`` adds the messages to the
+        ``chat_messages`` collection. Bytes written per turn no longer grow
+        with the length of the conversation.
+
+        The summary and title are only saved over the version this copy was
+        loaded from: if another process added messages meanwhile, its summary
+        is kept and only the messages are stored.
+
+        With write-behind caching the messages are numbered locally and
+        buffered instead; the session cache writes them in batches.
+        """
+        now = stored_time(datetime.utcnow())
+        if self.cache is not None and self.cache.write_behind:
+            for i, message in enumerate(messages):
+                message.seq = session.message_count + i
+            session.messages.extend(messages)
+            session.message_count += len(messages)
+            session.updated_at = now
+            await self.cache.record(session, messages)
+            return session
+
+        updated = await db.db.sessions.find_one_and_update(
+            {"id": session.id, "message_count": session.message_count},
+            {
+                "$inc": {"message_count": len(messages)},
+                "$set": {
+                    "title": session.title,
+                    "summary": session.summary,
+                    "summarized_count": session.summarized_count,
+                    "updated_at": now
+                }
+            },
+            projection={"message_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        stale = updated is None
+        if stale:
+            updated = await db.db.sessions.find_one_and_update(
+                {"id": session.id},
+                {"$inc": {"message_count": len(messages)}, "$set": {"updated_at": now}},
+                projection={"message_count": 1},
+                return_document=ReturnDocument.AFTER
+            )
+        if updated is None:
+            raise ValueError("Session not found")
+
+        first = updated["message_count"] - len(messages)
+        for i, message in enumerate(messages):
+            message.seq = first + i
+        await db.db.chat_messages.insert_many([{**message.dict(), "session_id": session.id} for message in messages])
+
+        session.messages.extend(messages)
+        session.message_count = updated["message_count"]
+        session.updated_at = now
+        if self.cache is not None:
+            if stale:
+                # Another process added messages; reload the session next time
+                self.cache.invalidate(session.id)
+            else:
+                self.cache.put(session)
+        return session
 
     async def process_message(
         self,
@@ -25,12 +152,7 @@ class ChatService:
         """Process a chat message and return the updated session"""
         try:
             # Create or get session
-            if session_id:
-                session = await self.get_session(session_id, user_id)
-                if not session:
-                    raise ValueError("Session not found")
-            else:
-                session = await self.create_session(user_id)
+            session = await self.get_or_create_session(user_id, session_id)
 
             # Create user message
             user_message = Message(
@@ -41,31 +163,10 @@ class ChatService:
 
             try:
                 # Convert session messages to OpenAI format
-                messages = [
-                    {
-                        "role": "system", 
-                        "content": """You are a helpful AI assistant. You must maintain context of the conversation 
-                        and remember details that users share with you. When users share personal information like 
-                        their name, you should remember and use it in future responses. Be conversational and friendly 
-                        while maintaining professionalism."""
-                    }
-                ]
-                
-                # Add conversation history
-                for msg in session.messages:
-                    messages.append({
-                        "role": msg.role.value,
-                        "content": msg.content
-                    })
-                
-                # Add the new user message
-                messages.append({
-                    "role": "user",
-                    "content": message
-                })
-
-                # Get response from OpenAI with full conversation history
-                response = self.client.chat.completions.create(
+                messages = await self.build_messages(session, message)
+
+                # Get response from OpenAI with the summarized conversation history
+                response = await self.client.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=messages,
                     temperature=0.7,
@@ -89,19 +190,23 @@ class ChatService:
                     created_at=datetime.utcnow()
                 )
 
-            # Update session with new messages
-            session.messages.extend([user_message, ai_message])
-            session.updated_at = datetime.utcnow()
-
-            # Save to database
-            await self.save_session(session)
-
-            return session
+            # Append the new messages; the rest of the history is left untouched
+            return await self.append_messages(session, [user_message, ai_message])
 
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             raise
 
+    async def ensure_indexes(self):
+        await db.db.chat_messages.create_index([("session_id", ASCENDING), ("seq", ASCENDING)], unique=True)
+        await db.db.sessions.create_index("id")
+        await db.db.sessions.create_index([("user_id", ASCENDING), ("updated_at", DESCENDING)])
+
+    @staticmethod
+    def session_document(session: ChatSession) -> Dict:
+        """Fields kept in the ``sessions`` collection; messages live in ``chat_messages``"""
+        return session.dict(exclude={"messages", "message_count"})
+
     async def create_session(self, user_id: str, title: Optional[str] = None) -> ChatSession:
         """Create a new chat session"""
         session = ChatSession(
@@ -114,24 +219,140 @@ class ChatService:
         )
         
         # Save to database
-        await db.db.sessions.insert_one(session.dict())
+        await db.db.sessions.insert_one({**self.session_document(session), "message_count": 0})
         return session
 
+    async def migrate_session(self, document: Dict) -> Dict:
+        """
+        Move a session's embedded ``messages`` array into ``chat_messages``.
+
+        Safe to repeat or run concurrently: messages are upserted by
+        ``(session_id, seq)`` and the array is removed only after they are
+        stored. Returns the session document without the array.
+        """
+        messages = document.get("messages") or []
+        if messages:
+            operations = [
+                UpdateOne(
+                    {"session_id": document["id"], "seq": seq},
+                    {"$setOnInsert": {**Message(**message).dict(), "session_id": document["id"], "seq": seq}},
+                    upsert=True
+                )
+                for seq, message in enumerate(messages)
+            ]
+            try:
+                await db.db.chat_messages.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Another migration of the same session inserted them first
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+        await db.db.sessions.update_one(
+            {"_id": document["_id"], "messages": {"$exists": True}},
+            {"$set": {"message_count": len(messages)}, "$unset": {"messages": ""}}
+        )
+        document = {key: value for key, value in document.items() if key != "messages"}
+        document["message_count"] = len(messages)
+        return document
+
+    async def _find_session(self, session_id: str, user_id: str) -> Optional[Dict]:
+        """A session's document without messages, migrating an embedded-messages session first"""
+        document = await db.db.sessions.find_one(
+            {"id": session_id, "user_id": user_id},
+            {"messages": {"$slice": 1}}
+        )
+        if document and document.get("messages"):
+            document = await self.migrate_session(await db.db.sessions.find_one({"_id": document["_id"]}))
+        if document:
+            document.pop("messages", None)
+        return document
+
+    async def load_messages(self, session_id: str, since: int = 0, limit: Optional[int] = None) -> List[Message]:
+        """The latest messages from sequence number ``since`` on, oldest first"""
+        cursor = db.db.chat_messages.find(
+            {"session_id": session_id, "seq": {"$gte": since}},
+            {"_id": 0, "session_id": 0}
+        ).sort("seq", DESCENDING).limit(limit or settings.CHAT_SESSION_LOAD_MAX_MESSAGES)
+        return [Message(**message) async for message in cursor][::-1]
+
     async def get_session(self, session_id: str, user_id: str) -> Optional[ChatSession]:
-        """Get a chat session by ID"""
-        session_data = await db.db.sessions.find_one({
-            "id": session_id,
-            "user_id": user_id
-        })
-        return ChatSession(**session_data) if session_data else None
+        """
+        Get a chat session by ID, with only the messages not yet folded into
+        its summary (see ``get_messages`` for the full history). Active
+        sessions are served from the session cache. With write-through, a
+        cached session is first checked against MongoDB's ``message_count``
+        and ``updated_at``, so a turn another process stored is not missed.
+        """
+        if self.cache is not None:
+            session = self.cache.get(session_id, user_id)
+            if session is not None:
+                if self.cache.write_behind or await self._is_current(session):
+                    return session
+                self.cache.reject(session_id)
+            if self.cache.has_pending(session_id):
+                await self.cache.flush()
+
+        document = await self._find_session(session_id, user_id)
+        if not document:
+            return None
+        session = ChatSession(**document)
+        session.messages = await self.load_messages(session.id, since=session.summarized_count)
+        if self.cache is not None:
+            self.cache.put(session)
+        return session
+
+    async def _is_current(self, session: ChatSession) -> bool:
+        """Whether a cached session still matches MongoDB; reads two fields"""
+        stored = await db.db.sessions.find_one(
+            {"id": session.id},
+            {"_id": 0, "message_count": 1, "updated_at": 1}
+        )
+        return (
+            stored is not None
+            and stored.get("message_count") == session.message_count
+            and stored.get("updated_at") == session.updated_at
+        )
+
+    async def flush_pending(self, session_id: Optional[str] = None):
+        """Write buffered messages before reading them back from MongoDB"""
+        if self.cache is not None and self.cache.has_pending(session_id):
+            await self.cache.flush()
+
+    async def get_messages(
+        self,
+        session_id: str,
+        user_id: str,
+        before: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Optional[MessagePage]:
+        """
+        A page of a session's messages, oldest first, ending just before
+        sequence number ``before`` (or at the latest message)
+        """
+        if not await self._find_session(session_id, user_id):
+            return None
+        await self.flush_pending(session_id)
+        query = {"session_id": session_id}
+        if before is not None:
+            query["seq"] = {"$lt": before}
+        cursor = db.db.chat_messages.find(query, {"_id": 0, "session_id": 0}).sort("seq", DESCENDING).limit(
+            limit or settings.CHAT_MESSAGES_PAGE_SIZE
+        )
+        messages = [Message(**message) async for message in cursor][::-1]
+        return MessagePage(
+            messages=messages,
+            next_before=messages[0].seq if messages and messages[0].seq > 0 else None
+        )
 
     async def save_session(self, session: ChatSession):
-        """Save or update a chat session"""
+        """Save or update a chat session's fields (messages are stored by ``append_messages``)"""
+        await self.flush_pending(session.id)
         await db.db.sessions.update_one(
             {"id": session.id},
-            {"$set": session.dict()},
+            {"$set": self.session_document(session)},
             upsert=True
         )
+        if self.cache is not None:
+            self.cache.invalidate(session.id)
 
     async def list_sessions(
         self,
@@ -139,9 +360,11 @@ class ChatService:
         skip: int = 0,
         limit: int = 20
     ) -> List[ChatSession]:
-        """List chat sessions for a user"""
+        """List chat sessions for a user, without their messages"""
+        await self.flush_pending()
         cursor = db.db.sessions.find(
-            {"user_id": user_id}
+            {"user_id": user_id},
+            {"messages": 0}
         ).sort("updated_at", -1).skip(skip).limit(limit)
         
         sessions = []
@@ -150,12 +373,16 @@ class ChatService:
         return sessions
 
     async def delete_session(self, session_id: str, user_id: str) -> bool:
-        """Delete a chat session"""
+        """Delete a chat session and its messages"""
         result = await db.db.sessions.delete_one({
             "id": session_id,
             "user_id": user_id
         })
+        if result.deleted_count:
+            if self.cache is not None:
+                await self.cache.discard(session_id)
+            await db.db.chat_messages.delete_many({"session_id": session_id})
         return result.deleted_count > 0
 
 # Create a global instance
-chat_service = ChatService()
\ No newline at end of file
+chat_service = ChatService()
@@ -0,0 +1,114 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.models.chat import ChatSession, Message
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tokens OpenAI adds around every chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Update the current summary with the new messages. Keep facts the user shared about themselves,
+decisions, open questions and anything the assistant promised. Be concise; reply with the summary only."""
+
+class HistoryManager:
+    """
+    Builds the messages for a chat turn within a token budget.
+
+    The last ``keep_turns`` turns are always sent verbatim. Older messages
+    are folded, a batch at a time, into a running summary stored on the
+    session (``summary`` and ``summarized_count``). Each refresh only sends
+    the previous summary and the newly folded messages to the model, so the
+    summary is never rebuilt from the whole conversation.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        batch_turns: Optional[int] = None,
+        summary_max_tokens: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        summarize: Optional[Callable[[Optional[str], List[Message]], Awaitable[str]]] = None
+    ):
+        self.max_tokens = max_tokens or settings.CHAT_HISTORY_MAX_TOKENS
+        self.keep_turns = keep_turns if keep_turns is not None else settings.CHAT_HISTORY_KEEP_TURNS
+        self.batch_turns = batch_turns if batch_turns is not None else settings.CHAT_HISTORY_SUMMARY_BATCH_TURNS
+        self.summary_max_tokens = summary_max_tokens or settings.CHAT_SUMMARY_MAX_TOKENS
+        self._count_tokens = count_tokens
+        self._summarize = summarize or self.summarize
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens in ``text``, counted with ModelService's tiktoken encoding"""
+        if self._count_tokens is not None:
+            return self._count_tokens(text)
+        from app.services.model import model_service
+
+        if model_service.tokenizer is None:
+            model_service.initialize()
+        return len(model_service.tokenizer.encode(text))
+
+    def message_tokens(self, content: str) -> int:
+        return self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    async def summarize(self, summary: Optional[str], messages: List[Message]) -> str:
+        """Fold ``messages`` into ``summary`` with one model call"""
+        from app.services.openai_client import get_async_openai
+
+        lines = "\n".join(f"{message.role.value}: {message.content}" for message in messages)
+        response = await get_async_openai().chat.completions.create(
+            model=settings.CHAT_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{lines}"}
+            ],
+            temperature=0,
+            max_tokens=self.summary_max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+    def fold_count(self, session: ChatSession, pending: List[Message], fixed_tokens: int) -> int:
+        """How many of the oldest unsummarized messages to fold now"""
+        keep = self.keep_turns * 2
+        fold = len(pending) - keep if len(pending) >= keep + self.batch_turns * 2 else 0
+        costs = [self.message_tokens(message.content) for message in pending]
+
+        def fits(start: int) -> bool:
+            reserve = self.summary_max_tokens if session.summary or start > 0 else 0
+            return fixed_tokens + reserve + sum(costs[start:]) <= self.max_tokens
+
+        # Recent turns are folded too if they alone overflow the budget
+        while fold < len(pending) and not fits(fold):
+            fold += 1
+        return fold
+
+    async def prepare(self, session: ChatSession, message: str, system_prompt: str) -> List[Dict]:
+        """
+        OpenAI messages for the next turn: system prompt, running summary,
+        recent history and the new message. Updates the session's summary
+        when messages are folded; the caller saves the session.
+        """
+        pending = session.unsummarized()
+        fold = 0
+        if pending:
+            fixed_tokens = self.message_tokens(system_prompt) + self.message_tokens(message)
+            fold = self.fold_count(session, pending, fixed_tokens)
+
+        if fold:
+            try:
+                session.summary = await self._summarize(session.summary, pending[:fold])
+                session.mark_summarized(pending[:fold])
+            except Exception as e:
+                # Send the recent messages without the folded ones; retry next turn
+                logger.warning(f"Error summarizing chat history: {str(e)}")
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if session.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{session.summary}"})
+        messages.extend({"role": msg.role.value, "content": msg.content} for msg in pending[fold:])
+        messages.append({"role": "user", "content": message})
+        return messages
+
+# Global instance
+history_manager = HistoryManager()
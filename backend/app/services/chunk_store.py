@@ -0,0 +1,100 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from bson import Binary
+from pymongo import ReplaceOne
+from app.core.config import settings
+from app.db.mongodb import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ChunkStore:
+    """
+    Chunk text in the ``document_chunks`` collection, keyed by vector ID.
+
+    Vector metadata only carries IDs and small fields; the text of the top-k
+    matches is fetched with a single ``$in`` query. With
+    ``CHUNK_STORE_COMPRESSION=zstd`` the text is stored zstd-compressed
+    whenever that makes it smaller.
+    """
+
+    def __init__(self, compression: Optional[str] = None, level: Optional[int] = None):
+        self.compression = (compression if compression is not None else settings.CHUNK_STORE_COMPRESSION) or None
+        self.level = level or settings.CHUNK_STORE_COMPRESSION_LEVEL
+        if self.compression not in (None, "zstd"):
+            raise ValueError(f"Unsupported chunk compression: {self.compression}")
+        self._compressor = None
+        self._decompressor = None
+
+    async def collection(self):
+        if db.db is None:
+            await db.connect_to_database()
+        return db.db.document_chunks
+
+    async def ensure_indexes(self):
+        collection = await self.collection()
+        await collection.create_index("document_id")
+
+    def _zstd(self):
+        if self._compressor is None:
+            import zstandard
+            self._compressor = zstandard.ZstdCompressor(level=self.level)
+            self._decompressor = zstandard.ZstdDecompressor()
+        return self._compressor, self._decompressor
+
+    def encode(self, text: str) -> Dict:
+        """Stored form of a chunk's text"""
+        raw = text.encode("utf-8")
+        if self.compression == "zstd":
+            compressed = self._zstd()[0].compress(raw)
+            if len(compressed) < len(raw):
+                return {"zstd": Binary(compressed)}
+        return {"text": text}
+
+    def decode(self, record: Dict) -> str:
+        if "zstd" in record:
+            return self._zstd()[1].decompress(bytes(record["zstd"])).decode("utf-8")
+        return record.get("text", "")
+
+    async def put(self, ids: List[str], texts: List[str], metadatas: List[Dict]) -> int:
+        """Insert or replace chunks by vector ID in one unordered bulk write"""
+        if not ids:
+            return 0
+        now = datetime.utcnow()
+        operations = [
+            ReplaceOne({"_id": id}, {
+                "document_id": metadata.get("document_id"),
+                "chunk_index": metadata.get("chunk_index"),
+                **({"user_id": metadata["user_id"]} if metadata.get("user_id") else {}),
+                **self.encode(text),
+                "updated_at": now
+            }, upsert=True)
+            for id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        collection = await self.collection()
+        await collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def get_many(self, ids: Iterable[str]) -> Dict[str, str]:
+        """Texts of the given chunks in one ``$in`` query; unknown IDs are skipped"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        collection = await self.collection()
+        cursor = collection.find({"_id": {"$in": ids}}, {"text": 1, "zstd": 1})
+        return {record["_id"]: self.decode(record) async for record in cursor}
+
+    async def delete(self, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        collection = await self.collection()
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        return result.deleted_count
+
+    async def delete_document(self, document_id: str) -> int:
+        collection = await self.collection()
+        result = await collection.delete_many({"document_id": document_id})
+        return result.deleted_count
+
+# Global instance
+chunk_store = ChunkStore()
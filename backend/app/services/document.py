@@ -4,6 +4,7 @@ from fastapi import UploadFile, HTTPException
 from datetime import datetime, UTC
 from bson import ObjectId
 from app.db.mongodb import db
+from app.core.uploads import save_upload_stream
 from app.models.document import Document, DocumentCreate, DocumentStatus
 from app.services.vector_store import vector_store_service
 
@@ -18,14 +19,11 @@ class DocumentService:
         # Handle different file types
         if isinstance(file, UploadFile):
             filename = file.filename
-            file_ext = os.path.splitext(filename)[1].lower()
-            file_content = await file.read()
         elif hasattr(file, 'read'):  # More generic file-like object check
             filename = getattr(file, 'name', 'unknown')
-            file_ext = os.path.splitext(filename)[1].lower()
-            file_content = file.read()
         else:
             raise ValueError("Unsupported file type")
+        file_ext = os.path.splitext(filename)[1].lower()
         
         # Validate file extension
         if file_ext not in ALLOWED_EXTENSIONS:
@@ -34,23 +32,13 @@ class DocumentService:
                 detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
             )
 
-        # Validate file size
-        file_size = 0
-        file_size = len(file_content)
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE/1024/1024}MB"
-            )
-        
         # Create upload directory if it doesn't exist
         upload_dir = f"uploads/{user_id}"
         os.makedirs(upload_dir, exist_ok=True)
         
-        # Save file
+        # Stream file to disk, enforcing the size limit as it is read
         file_path = f"{upload_dir}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        stored = await save_upload_stream(file, file_path, max_size=MAX_FILE_SIZE)
 
         # Create document in database
         document = DocumentCreate(
@@ -61,6 +49,8 @@ class DocumentService:
         )
         
         doc_dict = document.dict()
+        doc_dict["file_size"] = stored.file_size
+        doc_dict["content_hash"] = stored.content_hash
         doc_dict["created_at"] = datetime.now(UTC)
         doc_dict["updated_at"] = datetime.now(UTC)
         doc_dict["status"] = DocumentStatus.PENDING
@@ -2,14 +2,16 @@ from typing import Optional, List
 from contextlib import AsyncExitStack
 from fastapi import UploadFile
 from app.models.document import Document
+from app.services.chunk_store import chunk_store
 from app.services.vector_store import VectorStoreService
 from app.core.config import settings
 from app.db.mongodb import db
+from app.core.uploads import save_upload_stream
 from bson import ObjectId
 import os
 import aiofiles
 from datetime import datetime, timezone
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 class DocumentProcessor:
     def __init__(self, vector_store: Optional[VectorStoreService] = None):
@@ -62,7 +64,6 @@ class DocumentProcessor:
                 {
                     "document_id": document_id,
                     "chunk_index": i,
-                    "text": chunk,
                     "title": document.title
                 }
                 for i, chunk in enumerate(chunks)
@@ -74,6 +75,12 @@ class DocumentProcessor:
                     texts=chunks,
                     metadata_list=metadata_list
                 )
+                # Chunk text goes to the chunk store; metadata stays small
+                if settings.CHUNK_STORE_ENABLED:
+                    await chunk_store.put([vector["id"] for vector in vectors], chunks, metadata_list)
+                else:
+                    for vector, chunk in zip(vectors, chunks):
+                        vector["metadata"]["text"] = chunk
                 await self.vector_store.batch_upsert(vectors)
 
             # Update document status
@@ -94,12 +101,9 @@ class DocumentProcessor:
         file_extension = os.path.splitext(file.filename)[1]
         file_path = os.path.join(settings.UPLOAD_DIR, f"{document_id}{file_extension}")
         
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
-            
-        return file_path
+        # Stream file to disk
+        stored = await save_upload_stream(file, file_path)
+        return stored.file_path
 
     def split_text(self, text: str) -> List[str]:
         """Optimize text splitting with better chunking"""
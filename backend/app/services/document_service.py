@@ -2,9 +2,10 @@ import os
 import logging
 from typing import List, Optional
 from fastapi import UploadFile, HTTPException
-from ..models.document import DocumentResponse
+from ..models.document import DocumentResponse, DocumentStatus
 from bson import ObjectId
 from ..db.mongodb import db
+from ..core.uploads import save_upload_stream
 import PyPDF2
 import io
 from datetime import datetime
@@ -22,7 +23,8 @@ class DocumentService:
     async def initialize(self):
         """Initialize database connection"""
         if self.collection is None:  # Check collection instead of db
-            await db.connect_to_database()
+            if db.client is None:
+                await db.connect_to_database()
             database = db.client['DocChat']
             self.collection = database['documents']
             logger.info("Initialized database connection and collection")
@@ -54,25 +56,25 @@ class DocumentService:
                 detail=f"Failed to list documents: {str(e)}"
             )
 
-    async def store_document(self, file: UploadFile) -> dict:
+    async def store_document(self, file: UploadFile, user_id: Optional[str] = None) -> dict:
         """Store a document and return its metadata"""
         try:
             await self.initialize()
             
-            # Generate safe filename and save file
+            # Generate safe filename and stream file content to disk
             filename = file.filename
             file_path = self.get_document_path(filename)
-            
-            # Save file content
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
+            stored = await save_upload_stream(file, file_path)
                 
             # Create document metadata
             document = {
                 "title": filename,
-                "file_path": file_path,
+                "file_path": stored.file_path,
                 "file_type": file.content_type or "application/octet-stream",
+                "file_size": stored.file_size,
+                "content_hash": stored.content_hash,
+                **({"user_id": user_id} if user_id else {}),
+                "status": DocumentStatus.PENDING,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
@@ -83,6 +85,8 @@ class DocumentService:
             
             logger.info(f"Stored document: {document['title']}")
             return document
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error storing document: {str(e)}")
             raise HTTPException(
@@ -0,0 +1,118 @@
+from typing import Callable, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def get_tokenizer():
+    """
+    ModelService's tokenizer, loaded on first use. The OpenAI embedding
+    models use the same cl100k_base encoding as its chat model.
+    """
+    from app.services.model import model_service
+
+    if model_service.tokenizer is None:
+        model_service.initialize()
+    return model_service.tokenizer
+
+class EmbeddingBatcher:
+    """
+    Embed many chunks with few requests.
+
+    Chunks are packed in order into ``embed_documents`` batches bounded by a
+    token budget and a maximum batch size. A bounded number of batches run at
+    once, and failed batches are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_tokens_per_batch: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: float = 1.0,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        self.embeddings = embeddings
+        self.max_tokens_per_batch = max_tokens_per_batch or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_MAX_SIZE
+        self.max_concurrency = max_concurrency or settings.EMBEDDING_MAX_CONCURRENT_BATCHES
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = retry_backoff
+        self._count_tokens = count_tokens
+        self.stats: Dict[str, float] = {}
+
+    def count_tokens(self, text: str) -> int:
+        if self._count_tokens is not None:
+            return self._count_tokens(text)
+        return len(get_tokenizer().encode(text, disallowed_special=()))
+
+    def pack(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into batches that fit the token and size budgets"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (
+                current_tokens + tokens > self.max_tokens_per_batch
+                or len(current) >= self.max_batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            # A single oversized chunk still gets a batch of its own
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[List[float]]:
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await self.embeddings.aembed_documents(texts)
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    self.stats["retries"] = self.stats.get("retries", 0) + 1
+                    delay = self.retry_backoff * 2 ** attempt
+                    logger.warning(f"Embedding batch of {len(texts)} failed ({e}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, returning vectors in the same order"""
+        started = time.perf_counter()
+        self.stats = {"chunks": len(texts), "batches": 0, "retries": 0}
+        if not texts:
+            return []
+
+        batches = self.pack(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(
+            self._embed_batch([texts[i] for i in batch], semaphore)
+            for batch in batches
+        ))
+
+        vectors: List[List[float]] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+
+        elapsed = time.perf_counter() - started
+        self.stats.update({
+            "batches": len(batches),
+            "seconds": elapsed,
+            "chunks_per_sec": len(texts) / elapsed if elapsed > 0 else 0.0
+        })
+        logger.info(
+            f"Embedded {len(texts)} chunks in {len(batches)} batches "
+            f"({self.stats['chunks_per_sec']:.1f} chunks/sec)"
+        )
+        return vectors
@@ -0,0 +1,279 @@
+from typing import Dict, List, Optional, Tuple
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store of chunk embeddings.
+
+    Entries are keyed by (model name, SHA-256 of the chunk text) and kept in a
+    local SQLite file shared by every process on the host. When the cache
+    grows past ``max_entries``, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or settings.EMBEDDING_CACHE_PATH
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+        return self._conn
+
+    def open(self):
+        """Open the database ahead of the first lookup"""
+        with self._lock:
+            self._connect()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up embeddings by key, refreshing the LRU position of hits"""
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connect()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store embeddings, evicting least recently used entries over the cap"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU/TTL cache of query embeddings.
+
+    Queries are normalized (whitespace collapsed, case folded) so repeat
+    questions that differ only in spacing or case share an entry.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split()).casefold()
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = (model, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, model: str, query: str, vector: List[float]):
+        key = (model, self.normalize(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeat work from caches.
+
+    Document embeddings come from an EmbeddingCache: only texts missing from
+    the cache reach the underlying model, and texts repeated within a call are
+    embedded once. Query embeddings come from a QueryEmbeddingCache.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        cache: Optional[EmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        model_name: Optional[str] = None
+    ):
+        self.underlying = underlying
+        self.cache = cache
+        self.query_cache = query_cache
+        if model_name is None:
+            model_name = getattr(underlying, "model", None) or type(underlying).__name__
+            # Shortened vectors must not share entries with full-size ones
+            if getattr(underlying, "dimensions", None):
+                model_name = f"{model_name}@{underlying.dimensions}"
+        self.model_name = model_name
+
+    def _plan(self, texts: List[str], cached: Dict[str, List[float]], keys: List[str]) -> Dict[str, str]:
+        """Map each missing key to one representative text"""
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return missing
+
+    @staticmethod
+    def _as_stored(keys, vectors: List[List[float]]) -> Dict[str, List[float]]:
+        """Round fresh vectors to float32 so hits and misses return identical values"""
+        return {key: array("f", vector).tolist() for key, vector in zip(keys, vectors)}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.underlying.embed_documents(texts)
+        keys = [self.cache.key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = self._plan(texts, cached, keys)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_entries = self._as_stored(missing.keys(), vectors)
+            self.cache.put_many(new_entries)
+            cached.update(new_entries)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return await self.underlying.aembed_documents(texts)
+        keys = [self.cache.key(self.model_name, text) for text in texts]
+        cached = await asyncio.to_thread(self.cache.get_many, keys)
+        missing = self._plan(texts, cached, keys)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            new_entries = self._as_stored(missing.keys(), vectors)
+            await asyncio.to_thread(self.cache.put_many, new_entries)
+            cached.update(new_entries)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_cache is None:
+            return self.underlying.embed_query(text)
+        vector = self.query_cache.get(self.model_name, text)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.query_cache.put(self.model_name, text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.query_cache is None:
+            return await self.underlying.aembed_query(text)
+        vector = self.query_cache.get(self.model_name, text)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            self.query_cache.put(self.model_name, text, vector)
+        return vector
+
+def with_embedding_cache(embeddings: Embeddings) -> Embeddings:
+    """Put the shared embedding caches in front of an embeddings model, if enabled"""
+    cache = embedding_cache if settings.EMBEDDING_CACHE_ENABLED else None
+    query_cache = query_embedding_cache if settings.QUERY_EMBEDDING_CACHE_ENABLED else None
+    if cache is None and query_cache is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, cache=cache, query_cache=query_cache)
+
+# Global instances
+embedding_cache = EmbeddingCache()
+query_embedding_cache = QueryEmbeddingCache()
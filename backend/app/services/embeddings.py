@@ -0,0 +1,30 @@
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+from app.services.embedding_cache import with_embedding_cache
+from app.services.openai_client import client_kwargs
+
+# Native output size of the OpenAI embedding models
+MODEL_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+def embedding_dimension() -> int:
+    """Size of the vectors produced by the configured embedding model"""
+    return settings.EMBEDDING_DIMENSIONS or MODEL_DIMENSIONS.get(settings.EMBEDDING_MODEL, 1536)
+
+def create_embeddings() -> Embeddings:
+    """
+    The configured OpenAI embeddings model behind the shared caches, on the
+    shared OpenAI connection pool.
+
+    ``EMBEDDING_DIMENSIONS`` asks text-embedding-3 models for shorter vectors,
+    which the API truncates and renormalizes.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    kwargs = {"model": settings.EMBEDDING_MODEL, **client_kwargs()}
+    if settings.EMBEDDING_DIMENSIONS:
+        kwargs["dimensions"] = settings.EMBEDDING_DIMENSIONS
+    return with_embedding_cache(OpenAIEmbeddings(**kwargs))
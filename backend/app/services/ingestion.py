@@ -0,0 +1,170 @@
+from typing import Optional, Dict
+from datetime import datetime
+from bson import ObjectId
+from app.db.mongodb import db
+from app.models.document import DocumentStatus, IngestionJob, IngestionStage
+from app.services.pdf_extractor import pdf_extractor
+import aiofiles
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class IngestionService:
+    """Runs document ingestion (extract, split, embed, upsert) as tracked jobs"""
+
+    @property
+    def jobs(self):
+        return db.db.ingestion_jobs
+
+    async def create_job(self, document: Dict) -> IngestionJob:
+        """Record a new ingestion job for a stored document"""
+        job = {
+            "document_id": document["id"],
+            "title": document.get("title", "Unknown"),
+            "file_path": document["file_path"],
+            "file_type": document.get("file_type", "application/octet-stream"),
+            "user_id": document.get("user_id"),
+            "status": DocumentStatus.PENDING,
+            "stage": IngestionStage.QUEUED,
+            "chunks_total": 0,
+            "chunks_indexed": 0,
+            "timings": {},
+            "attempts": 0,
+            "created_at": datetime.utcnow()
+        }
+        job["available_at"] = job["created_at"]
+        result = await self.jobs.insert_one(job)
+        job["id"] = str(result.inserted_id)
+        return IngestionJob(**job)
+
+    async def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Get an ingestion job by ID"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        job = await self.jobs.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            return None
+        job["id"] = str(job.pop("_id"))
+        return IngestionJob(**job)
+
+    async def _update_job(self, job_id: str, fields: Dict):
+        await self.jobs.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+
+    async def _update_document_status(self, document_id: str, status: DocumentStatus, **fields):
+        await db.db.documents.update_one(
+            {"_id": ObjectId(document_id)},
+            {"$set": {"status": status, "updated_at": datetime.utcnow(), **fields}}
+        )
+
+    async def extract_text(self, file_path: str, file_type: str) -> str:
+        """Extract plain text from a stored document"""
+        if file_path.endswith('.pdf') or file_type == "application/pdf":
+            return await pdf_extractor.extract_text(file_path)
+
+        # For non-PDF files, try basic text extraction
+        async with aiofiles.open(file_path, 'rb') as f:
+            content = await f.read()
+        return content.decode('utf-8', errors='ignore')
+
+    async def mark_failed(self, job_id: str, error: str):
+        """Mark a job and its document as permanently failed"""
+        job = await self.jobs.find_one_and_update(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "status": DocumentStatus.FAILED,
+                "stage": IngestionStage.FAILED,
+                "error": error,
+                "finished_at": datetime.utcnow()
+            }}
+        )
+        if job:
+            await self._update_document_status(job["document_id"], DocumentStatus.FAILED, error=error)
+
+    async def run_job(self, job_id: str) -> bool:
+        """
+        Run an ingestion job to completion, recording stage timings.
+
+        Errors are recorded on the job and re-raised so the queue can decide
+        whether to retry or fail the job.
+        """
+        from app.services.rag_service import get_rag_service
+        from app.services.vector_store import tenant_namespace
+
+        job = await self.jobs.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            logger.warning(f"Ingestion job {job_id} not found")
+            return False
+
+        document_id = job["document_id"]
+        timings: Dict[str, float] = {}
+        stage = IngestionStage.EXTRACTING
+
+        try:
+            rag_service = await asyncio.to_thread(get_rag_service)
+            await self._update_job(job_id, {
+                "status": DocumentStatus.PROCESSING,
+                "stage": stage,
+                "started_at": datetime.utcnow()
+            })
+            await self._update_document_status(document_id, DocumentStatus.PROCESSING)
+
+            started = time.perf_counter()
+            text_content = await self.extract_text(job["file_path"], job["file_type"])
+            timings["extracting"] = time.perf_counter() - started
+
+            stage = IngestionStage.SPLITTING
+            await self._update_job(job_id, {"stage": stage, "timings": timings})
+            started = time.perf_counter()
+            chunks = rag_service.split_text(text_content)
+            timings["splitting"] = time.perf_counter() - started
+
+            stage = IngestionStage.EMBEDDING
+            await self._update_job(job_id, {
+                "stage": stage,
+                "chunks_total": len(chunks),
+                "timings": timings
+            })
+            started = time.perf_counter()
+            vector_ids = await rag_service.index_chunks(
+                chunks,
+                metadata={
+                    "id": document_id,
+                    "title": job["title"],
+                    "file_path": job["file_path"],
+                    "file_type": job["file_type"],
+                    "user_id": job.get("user_id")
+                }
+            )
+            timings["embedding"] = time.perf_counter() - started
+            chunks_indexed = len(vector_ids)
+
+            # Drop vectors left over from a longer previous version of the document
+            document = await db.db.documents.find_one({"_id": ObjectId(document_id)}, {"vector_ids": 1})
+            previous_ids = (document or {}).get("vector_ids") or []
+            stale_ids = sorted(set(previous_ids) - set(vector_ids))
+            if stale_ids:
+                await rag_service.delete_vectors(stale_ids, tenant_namespace(job.get("user_id")))
+
+            await self._update_job(job_id, {
+                "status": DocumentStatus.COMPLETED,
+                "stage": IngestionStage.COMPLETED,
+                "chunks_indexed": chunks_indexed,
+                "chunks_per_sec": chunks_indexed / timings["embedding"] if timings["embedding"] > 0 else 0.0,
+                "timings": timings,
+                "finished_at": datetime.utcnow()
+            })
+            await self._update_document_status(document_id, DocumentStatus.COMPLETED, vector_ids=vector_ids)
+            logger.info(f"Ingestion job {job_id} completed: {chunks_indexed} chunks in {sum(timings.values()):.2f}s")
+            return True
+
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed during {stage.value}: {str(e)}")
+            await self._update_job(job_id, {
+                "error": f"{stage.value}: {str(e)}",
+                "timings": timings
+            })
+            raise
+
+ingestion_service = IngestionService()
@@ -0,0 +1,348 @@
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.vector_index import NumpyVectorIndex, _Segment
+from app.services.vector_io import run_vector_io, vector_io_executor
+import asyncio
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows per matrix product when assigning vectors to lists
+ASSIGN_CHUNK_ROWS = 65536
+
+def train_centroids(sample: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over L2-normalized rows, returning normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # Re-seed empty lists with random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids.astype(np.float32)
+
+class _IVFSegment(_Segment):
+    """
+    A namespace of the IVF index.
+
+    Rows are partitioned into ``nlist`` inverted lists by their nearest
+    centroid; a query scores only the ``nprobe`` lists closest to it. Lists
+    are compact row arrays plus a pending buffer for rows inserted since the
+    last compaction, which merges them in. Deleted rows are tombstoned: they are masked out at query
+    time and only reclaimed when the lists are compacted.
+    """
+
+    def __init__(self, directory: Optional[str], dimension: Optional[int], nlist: Optional[int],
+                 nprobe: int, train_min_vectors: int, quantization: Optional[str] = None,
+                 rescore_factor: int = 4, log_compaction_threshold: Optional[float] = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min_vectors = train_min_vectors
+        self.centroids: Optional[np.ndarray] = None
+        self.list_of = np.full(0, -1, dtype=np.int32)
+        self.lists: List[np.ndarray] = []
+        self.pending: List[List[int]] = []
+        self.tombstones: List[int] = []
+        self.trained_count = 0
+        self.epoch = 0  # Bumped by train() so stale compactions are discarded
+        super().__init__(directory, dimension, quantization, rescore_factor, log_compaction_threshold)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def _centroids_path(self) -> str:
+        return os.path.join(self.directory, "centroids.npy")
+
+    @property
+    def _assignments_path(self) -> str:
+        return os.path.join(self.directory, "assignments.npy")
+
+    def _map(self, capacity: int):
+        super()._map(capacity)
+        list_of = np.full(capacity, -1, dtype=np.int32)
+        list_of[:len(self.list_of)] = self.list_of[:capacity]
+        self.list_of = list_of
+
+    def _load(self):
+        super()._load()
+        if self.dimension is None or not os.path.exists(self._centroids_path):
+            if self.count >= self.train_min_vectors:
+                self.train()
+            return
+        self.centroids = np.load(self._centroids_path)
+        self.nlist = len(self.centroids)
+        if os.path.exists(self._assignments_path):
+            saved = np.load(self._assignments_path)
+            size = min(len(saved), self.capacity)
+            self.list_of[:size] = saved[:size]
+        self.list_of[~self.alive] = -1
+        self.trained_count = self.count
+        self.lists = self.build_lists(self.list_of[:len(self.ids)])
+        self.pending = [[] for _ in range(self.nlist)]
+        # Rows written after the assignments were saved
+        self._assign_rows(np.flatnonzero(self.alive & (self.list_of < 0)))
+
+    def _release(self, row: int):
+        # Tombstone: the row stays in its list until compaction
+        self.list_of[row] = -1
+        self.tombstones.append(row)
+
+    def _assign_rows(self, rows: np.ndarray, pending: bool = True):
+        """Assign rows to their nearest centroid, queuing them on its pending buffer"""
+        for start in range(0, len(rows), ASSIGN_CHUNK_ROWS):
+            chunk = rows[start:start + ASSIGN_CHUNK_ROWS]
+            labels = np.argmax(self.matrix[chunk] @ self.centroids.T, axis=1).astype(np.int32)
+            self.list_of[chunk] = labels
+            if pending:
+                for row, label in zip(chunk.tolist(), labels.tolist()):
+                    self.pending[label].append(row)
+
+    def train(self, nlist: Optional[int] = None, sample_size: Optional[int] = None):
+        """(Re)train centroids on a sample of live rows and reassign every row"""
+        live = np.flatnonzero(self.alive[:len(self.ids)])
+        nlist = nlist or self.nlist or max(16, int(4 * np.sqrt(len(live))))
+        nlist = min(nlist, len(live))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(live), sample_size or nlist * 64)
+        sample = np.asarray(self.matrix[np.sort(rng.choice(live, size=sample_size, replace=False))])
+
+        started = time.perf_counter()
+        self.centroids = train_centroids(sample, nlist)
+        self.nlist = nlist
+        self.list_of[:] = -1
+        self._assign_rows(live, pending=False)
+        self.lists = self.build_lists(self.list_of[:len(self.ids)])
+        self.pending = [[] for _ in range(nlist)]
+        self.trained_count = len(live)
+        self.epoch += 1
+        logger.info(f"Trained {nlist} IVF lists on {sample_size} of {len(live)} vectors "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+    def upsert(self, vectors: List[Dict]) -> int:
+        written = super().upsert(vectors)
+        if self.trained:
+            ids = dict.fromkeys(vector["id"] for vector in vectors)
+            self._assign_rows(np.fromiter((self.rows[id] for id in ids), dtype=np.int64, count=len(ids)))
+        elif self.count >= self.train_min_vectors:
+            self.train()
+        return written
+
+    def query(self, vector: List[float], filter: Optional[Dict], top_k: int) -> List[Tuple[str, float, Dict]]:
+        if not self.rows or top_k <= 0:
+            return []
+        query = self._normalize(vector)
+        candidates = self._candidates(filter) if filter else None
+        # Small corpora and selective filters are cheaper to scan exactly
+        if not self.trained or (candidates is not None and len(candidates) <= self.train_min_vectors):
+            return self._scan(query, candidates, top_k)
+
+        nprobe = min(self.nprobe, self.nlist)
+        probed = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        parts = []
+        for label in probed.tolist():
+            parts.append(self.lists[label])
+            if self.pending[label]:
+                parts.append(np.asarray(self.pending[label], dtype=np.int64))
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        # Skip tombstones and rows that moved to another list since compaction
+        rows = np.unique(rows[np.isin(self.list_of[rows], probed)])
+        if candidates is not None:
+            rows = rows[np.isin(rows, candidates, assume_unique=True)]
+        return self._scan(query, rows, top_k)
+
+    def needs_compaction(self, threshold: float) -> bool:
+        """Whether tombstones or pending rows exceed ``threshold`` of the live vectors"""
+        if not self.trained:
+            return False
+        limit = threshold * max(self.count, 1)
+        pending = sum(len(rows) for rows in self.pending)
+        return len(self.tombstones) >= max(limit, 1) or pending >= max(limit, 1)
+
+    def snapshot(self) -> Tuple[int, np.ndarray, List[int], List[int]]:
+        """State that compaction works from, taken under the index lock"""
+        return (
+            self.epoch,
+            self.list_of[:len(self.ids)].copy(),
+            list(self.tombstones),
+            [len(pending) for pending in self.pending]
+        )
+
+    def build_lists(self, list_of: np.ndarray) -> List[np.ndarray]:
+        rows = np.flatnonzero(list_of >= 0)
+        labels = list_of[rows]
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+        return [rows[order[bounds[i]:bounds[i + 1]]] for i in range(self.nlist)]
+
+    def install_lists(self, epoch: int, lists: List[np.ndarray], tombstones: List[int], pending_sizes: List[int]) -> bool:
+        """Swap in compacted lists, keeping rows written while they were built"""
+        if epoch != self.epoch:
+            return False
+        self.lists = lists
+        self.pending = [pending[size:] for pending, size in zip(self.pending, pending_sizes)]
+        reclaimed = set(tombstones)
+        self.tombstones = [row for row in self.tombstones if row not in reclaimed]
+        self.free.extend(tombstones)
+        return True
+
+    def save_assignments(self):
+        if not self.directory or not self.trained:
+            return
+        np.save(self._centroids_path, self.centroids)
+        np.save(self._assignments_path, self.list_of[:len(self.ids)])
+
+    def compact(self):
+        super().compact()
+        self.save_assignments()
+
+    def close(self):
+        self.save_assignments()
+        super().close()
+
+    def memory_bytes(self) -> Dict[str, int]:
+        memory = super().memory_bytes()
+        memory["centroids"] = self.centroids.nbytes if self.trained else 0
+        memory["lists"] = (sum(rows.nbytes for rows in self.lists) + 8 * sum(len(p) for p in self.pending)
+                           + self.list_of.nbytes)
+        return memory
+
+class IVFVectorIndex(NumpyVectorIndex):
+    """
+    Approximate in-process index: inverted file (IVF) over the NumPy backend.
+
+    Namespaces under ``train_min_vectors`` are searched exactly; once a
+    namespace reaches it, spherical k-means centroids are trained and queries
+    scan only the ``nprobe`` nearest lists. Inserts are assigned to lists
+    incrementally to per-list pending buffers, and deletes leave tombstones.
+    Once either exceeds ``compaction_threshold`` of the live vectors, a
+    background compaction rebuilds the lists.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: Optional[int] = None,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        train_min_vectors: Optional[int] = None,
+        compaction_threshold: Optional[float] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None
+    ):
+        self.nlist = nlist or settings.IVF_NLIST
+        self.nprobe = nprobe or settings.IVF_NPROBE
+        self.train_min_vectors = train_min_vectors or settings.IVF_TRAIN_MIN_VECTORS
+        self.compaction_threshold = compaction_threshold or settings.IVF_COMPACTION_THRESHOLD
+        self._compactions: Dict[str, asyncio.Future] = {}
+        self._compacting: Set[str] = set()
+        self._compacting_lock = threading.Lock()
+        super().__init__(path, dimension, quantization, rescore_factor)
+
+    def _new_segment(self, namespace: str) -> _IVFSegment:
+        return _IVFSegment(
+            self._segment_directory(namespace),
+            self.dimension,
+            self.nlist,
+            self.nprobe,
+            self.train_min_vectors,
+            self.quantization,
+            self.rescore_factor,
+            self.log_compaction_threshold
+        )
+
+    def train(self, namespace: Optional[str] = None, nlist: Optional[int] = None):
+        """Retrain a namespace's lists, e.g. after a bulk load changed its distribution"""
+        with self._lock.write():
+            segment = self._segment(namespace)
+            if segment and segment.count:
+                segment.train(nlist)
+
+    def compact_lists(self, namespace: Optional[str] = None):
+        """
+        Rebuild a namespace's lists, merging pending rows and reclaiming tombstones.
+
+        The lists are rebuilt from a snapshot outside the lock, so queries and
+        writes continue meanwhile.
+        """
+        with self._lock.read():
+            segment = self._segment(namespace)
+            if segment is None or not segment.trained:
+                return
+            epoch, list_of, tombstones, pending_sizes = segment.snapshot()
+        lists = segment.build_lists(list_of)
+        with self._lock.write():
+            if not segment.install_lists(epoch, lists, tombstones, pending_sizes):
+                return
+            segment.compact()
+        logger.info(f"Compacted IVF namespace '{namespace or ''}', reclaimed {len(tombstones)} rows")
+
+    def needs_compaction(self, namespace: Optional[str] = None) -> bool:
+        with self._lock.read():
+            segment = self._segment(namespace)
+            return segment is not None and segment.needs_compaction(self.compaction_threshold)
+
+    def _compact_while_due(self, namespace: str):
+        # Writes that land during a pass can make another one due
+        try:
+            while True:
+                # Checked and cleared together, so a compaction scheduled
+                # meanwhile is not lost
+                with self._compacting_lock:
+                    if not self.needs_compaction(namespace):
+                        self._compacting.discard(namespace)
+                        return
+                self.compact_lists(namespace)
+        except Exception:
+            with self._compacting_lock:
+                self._compacting.discard(namespace)
+            logger.exception(f"IVF compaction of namespace '{namespace}' failed")
+            raise
+
+    async def upsert(self, vectors: List[Dict], namespace: Optional[str] = None) -> int:
+        written = await super().upsert(vectors, namespace)
+        await self._compact_if_due(namespace)
+        return written
+
+    async def delete(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        await super().delete(ids, namespace)
+        await self._compact_if_due(namespace)
+
+    async def _compact_if_due(self, namespace: Optional[str]):
+        if await run_vector_io(self.needs_compaction, namespace):
+            self.schedule_compaction(namespace)
+
+    def schedule_compaction(self, namespace: Optional[str] = None) -> asyncio.Future:
+        """Compact a namespace in the vector I/O pool, at most once at a time"""
+        namespace = namespace or ""
+        with self._compacting_lock:
+            # Tracked under the lock: the future only resolves once the loop runs
+            if namespace in self._compacting:
+                return self._compactions[namespace]
+            self._compacting.add(namespace)
+        future = asyncio.get_running_loop().run_in_executor(vector_io_executor(), self._compact_while_due, namespace)
+        self._compactions[namespace] = future
+        return future
+
+    async def wait_for_compaction(self):
+        await asyncio.gather(*self._compactions.values())
+
+    def _stats(self) -> Dict:
+        stats = super()._stats()
+        for namespace, segment in self._segments.items():
+            stats["namespaces"][namespace].update({
+                "nlist": segment.nlist if segment.trained else 0,
+                "tombstones": len(segment.tombstones)
+            })
+        return stats
@@ -0,0 +1,322 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+import json
+import logging
+import math
+import os
+import re
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words, numbers and identifiers such as "ERR-404", "v2.1.3" or "clause_7.2"
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+SEPARATORS = re.compile(r"[-./:_]")
+
+# Metadata kept per chunk for filtering and for building result documents
+FILTER_FIELDS = ("document_id", "user_id")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms of ``text``. Compound identifiers are kept whole and
+    also split into their parts, so "ERR-404" matches "err-404" and "404".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = SEPARATORS.split(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+class LexicalIndex:
+    """
+    In-process BM25 index over document chunks.
+
+    Each term's postings are compact ``int32`` row and ``float32`` term
+    frequency arrays; rows added since the term was last read wait in a small
+    pending buffer and are merged in on the next query that uses the term.
+    Scoring is vectorized per query term. Deletes mark rows dead and
+    ``compact()`` drops them. Chunks persist to an append-only ``chunks.jsonl``
+    log under ``path`` and are re-tokenized on load. Once replaced and
+    deleted records exceed ``compaction_threshold`` of the live chunks, the
+    next write compacts the index and rewrites the log.
+
+    Chunks belong to a namespace, mirroring the vector index's namespaces;
+    IDs are unique across namespaces.
+
+    The index belongs to one process: chunks added by another process (or
+    appended by it to the same log) are not seen until a restart.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        compaction_threshold: Optional[float] = None
+    ):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.compaction_threshold = compaction_threshold or settings.LEXICAL_COMPACTION_THRESHOLD
+        self._lock = threading.RLock()
+        self._log = None
+        self.log_records = 0  # Records written to the log since it was last rewritten
+        self._reset()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def _reset(self):
+        self.terms: Dict[str, int] = {}
+        self.post_rows: List[np.ndarray] = []
+        self.post_tfs: List[np.ndarray] = []
+        self.pending: Dict[int, List[Tuple[int, int]]] = {}
+        self.ids: List[Optional[str]] = []
+        self.texts: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict]] = []
+        self.namespaces: Dict[str, Set[int]] = {}
+        self.row_namespaces: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.total_length = 0.0
+        self.by_field: Dict[str, Dict[str, Set[int]]] = {field: {} for field in FILTER_FIELDS}
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def garbage(self) -> int:
+        """Logged records that no longer describe a live chunk"""
+        return self.log_records - self.count
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "chunks.jsonl")
+
+    def _load(self):
+        if not os.path.exists(self._log_path):
+            return
+        chunks: Dict[str, Tuple[str, Dict, str]] = {}
+        with open(self._log_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                self.log_records += 1
+                record = json.loads(line)
+                if record.get("deleted"):
+                    chunks.pop(record["id"], None)
+                else:
+                    chunks.pop(record["id"], None)
+                    chunks[record["id"]] = (record["text"], record["metadata"], record.get("namespace", ""))
+        for id, (text, metadata, namespace) in chunks.items():
+            self._add(id, text, metadata, namespace)
+
+    def _append_log(self, records: List[Dict]):
+        self.log_records += len(records)
+        if not self.path or not records:
+            return
+        if self._log is None:
+            self._log = open(self._log_path, "a", encoding="utf-8")
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+
+    def _grow(self, size: int):
+        if size <= len(self.lengths):
+            return
+        capacity = max(1024, len(self.lengths) * 2, size)
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[:len(self.lengths)] = self.lengths
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.lengths, self.alive = lengths, alive
+
+    def _add(self, id: str, text: str, metadata: Dict, namespace: str = ""):
+        if id in self.rows:
+            self._remove(id)
+        terms = tokenize(text)
+        row = len(self.ids)
+        self._grow(row + 1)
+        self.ids.append(id)
+        self.texts.append(text)
+        self.metadata.append(metadata)
+        self.row_namespaces.append(namespace)
+        self.namespaces.setdefault(namespace, set()).add(row)
+        self.rows[id] = row
+        self.lengths[row] = len(terms)
+        self.alive[row] = True
+        self.total_length += len(terms)
+
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            term_id = self.terms.get(term)
+            if term_id is None:
+                term_id = self.terms[term] = len(self.post_rows)
+                self.post_rows.append(np.zeros(0, dtype=np.int32))
+                self.post_tfs.append(np.zeros(0, dtype=np.float32))
+            self.pending.setdefault(term_id, []).append((row, frequency))
+
+        for field in FILTER_FIELDS:
+            if metadata.get(field):
+                self.by_field[field].setdefault(metadata[field], set()).add(row)
+
+    def _remove(self, id: str) -> bool:
+        row = self.rows.pop(id, None)
+        if row is None:
+            return False
+        metadata = self.metadata[row] or {}
+        for field in FILTER_FIELDS:
+            rows = self.by_field[field].get(metadata.get(field))
+            if rows is not None:
+                rows.discard(row)
+        self.namespaces[self.row_namespaces[row]].discard(row)
+        self.alive[row] = False
+        self.total_length -= float(self.lengths[row])
+        self.texts[row] = None
+        self.metadata[row] = None
+        return True
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[Dict]] = None, namespace: str = ""):
+        """Index chunks by ID, replacing any chunk already stored under the same ID"""
+        metadatas = metadatas or [{} for _ in texts]
+        records = []
+        with self._lock:
+            for id, text, metadata in zip(ids, texts, metadatas):
+                metadata = {key: value for key, value in metadata.items() if key != "text"}
+                self._add(id, text, metadata, namespace)
+                records.append({"id": id, "text": text, "metadata": metadata, "namespace": namespace})
+            self._append_log(records)
+            self._compact_if_due()
+
+    def move(self, ids: Iterable[str], namespace: str) -> int:
+        """Move chunks to another namespace"""
+        with self._lock:
+            chunks = [(id, self.texts[self.rows[id]], self.metadata[self.rows[id]]) for id in ids if id in self.rows]
+        if chunks:
+            self.add([id for id, *_ in chunks], [text for _, text, _ in chunks], [m for *_, m in chunks], namespace)
+        return len(chunks)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            records = [{"id": id, "deleted": True} for id in ids if self._remove(id)]
+            self._append_log(records)
+            self._compact_if_due()
+            return len(records)
+
+    def _compact_if_due(self):
+        if self.garbage and self.garbage >= self.compaction_threshold * self.count:
+            self.compact()
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        pending = self.pending.pop(term_id, None)
+        if pending:
+            added = np.asarray(pending, dtype=np.int64)
+            self.post_rows[term_id] = np.concatenate([self.post_rows[term_id], added[:, 0].astype(np.int32)])
+            self.post_tfs[term_id] = np.concatenate([self.post_tfs[term_id], added[:, 1].astype(np.float32)])
+        return self.post_rows[term_id], self.post_tfs[term_id]
+
+    def _filter_mask(self, filter: Dict) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, condition in filter.items():
+            if isinstance(condition, dict):
+                values = condition.get("$in", [condition.get("$eq")])
+            else:
+                values = [condition]
+            if field in FILTER_FIELDS:
+                rows = set().union(*(self.by_field[field].get(value, ()) for value in values))
+                field_mask = np.zeros(len(self.ids), dtype=bool)
+                field_mask[list(rows)] = True
+            else:
+                field_mask = np.array([
+                    metadata is not None and metadata.get(field) in values for metadata in self.metadata
+                ], dtype=bool)
+            mask &= field_mask
+        return mask
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[Tuple[str, float, str, Dict]]:
+        """
+        Top chunks by BM25 score as ``(id, score, text, metadata)``, best
+        first. Term statistics cover every namespace; ``namespace`` only
+        limits which chunks are returned.
+        """
+        with self._lock:
+            live = self.count
+            term_ids = [self.terms[term] for term in dict.fromkeys(tokenize(query)) if term in self.terms]
+            if not term_ids or live == 0 or top_k <= 0:
+                return []
+
+            used = len(self.ids)
+            scores = np.zeros(used, dtype=np.float32)
+            average_length = self.total_length / live
+            for term_id in term_ids:
+                rows, tfs = self._postings(term_id)
+                keep = self.alive[rows]
+                rows, tfs = rows[keep], tfs[keep]
+                if len(rows) == 0:
+                    continue
+                idf = math.log(1 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[rows] / average_length)
+                scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+            if filter:
+                scores[~self._filter_mask(filter)] = 0
+            if namespace is not None:
+                in_namespace = np.zeros(used, dtype=bool)
+                in_namespace[list(self.namespaces.get(namespace, ()))] = True
+                scores[~in_namespace] = 0
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [
+                (self.ids[row], float(scores[row]), self.texts[row], dict(self.metadata[row]))
+                for row in matched.tolist()
+            ]
+
+    def compact(self):
+        """Drop deleted chunks from memory and from the log"""
+        with self._lock:
+            chunks = [
+                (id, self.texts[row], self.metadata[row], self.row_namespaces[row])
+                for id, row in sorted(self.rows.items(), key=lambda item: item[1])
+            ]
+            self._reset()
+            for id, text, metadata, namespace in chunks:
+                self._add(id, text, metadata, namespace)
+            self.log_records = len(chunks)
+            if self.path:
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                temp_path = f"{self._log_path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for id, text, metadata, namespace in chunks:
+                        f.write(json.dumps({"id": id, "text": text, "metadata": metadata, "namespace": namespace}) + "\n")
+                os.replace(temp_path, self._log_path)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: each ID scores the sum of 1 / (k + rank) over the lists"""
+    k = k or settings.RRF_K
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
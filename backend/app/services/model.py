@@ -1,8 +1,8 @@
 from typing import List, Dict, Tuple, Optional
 import tiktoken
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from app.services.openai_client import get_chat_model
 import os
 import logging
 
@@ -29,12 +29,8 @@ class ModelService:
     async def generate_response(self, messages: List[Dict], model_name: str, user_id: str, request_type: str) -> Tuple[str, Dict]:
         """Generate a response using the specified model"""
         try:
-            # Initialize ChatOpenAI with the specified model
-            chat = ChatOpenAI(
-                model_name=model_name,
-                temperature=0.7,
-                streaming=False
-            )
+            # Shared ChatOpenAI for the model, on the shared connection pool
+            chat = get_chat_model(model_name, temperature=0.7)
             
             # Create a chain
             chain = (
@@ -68,11 +64,8 @@ def generate_response(query: str) -> str:
     if not os.getenv('OPENAI_API_KEY'):
         raise ValueError("OpenAI API key is not set. Please set the OPENAI_API_KEY environment variable.")
 
-    # Initialize the chat model
-    chat_model = ChatOpenAI(
-        model="gpt-3.5-turbo", 
-        api_key=os.getenv('OPENAI_API_KEY')
-    )
+    # Shared chat model, on the shared connection pool
+    chat_model = get_chat_model("gpt-3.5-turbo", openai_api_key=os.getenv('OPENAI_API_KEY'))
     
     # Create a prompt template
     prompt = ChatPromptTemplate.from_messages([
@@ -89,5 +82,4 @@ def generate_response(query: str) -> str:
     return response
 
 # Global instance
-model_service = ModelService()
-model_service.initialize()
\ No newline at end of file
+model_service = ModelService()
\ No newline at end of file
@@ -0,0 +1,90 @@
+from typing import Dict, Tuple
+from app.core.config import settings
+import threading
+
+_http_clients = None
+_async_openai = None
+_chat_models: Dict[Tuple, object] = {}
+_lock = threading.Lock()
+
+def http_timeout():
+    import httpx
+
+    return httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+def http_clients():
+    """
+    The process-wide (sync, async) httpx clients for OpenAI calls. Connections
+    are kept alive and reused across requests and services, up to
+    ``OPENAI_MAX_CONNECTIONS`` at once.
+    """
+    global _http_clients
+    with _lock:
+        if _http_clients is None:
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+            )
+            _http_clients = (
+                httpx.Client(limits=limits, timeout=http_timeout()),
+                httpx.AsyncClient(limits=limits, timeout=http_timeout())
+            )
+        return _http_clients
+
+def get_async_openai():
+    """The shared AsyncOpenAI client, on the shared connection pool"""
+    global _async_openai
+    if _async_openai is None:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=http_timeout(),
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=http_clients()[1]
+        )
+        with _lock:
+            if _async_openai is None:
+                _async_openai = client
+    return _async_openai
+
+def client_kwargs() -> Dict:
+    """Keyword arguments that put a LangChain OpenAI model on the shared clients"""
+    sync_client, async_client = http_clients()
+    return {
+        "openai_api_key": settings.OPENAI_API_KEY,
+        "openai_api_base": settings.OPENAI_BASE_URL,
+        "request_timeout": http_timeout(),
+        "max_retries": settings.OPENAI_MAX_RETRIES,
+        "http_client": sync_client,
+        "http_async_client": async_client
+    }
+
+def get_chat_model(model_name: str = "gpt-3.5-turbo", temperature: float = 0.7, **kwargs):
+    """
+    A LangChain ChatOpenAI on the shared clients, created once per
+    configuration and then reused
+    """
+    key = (model_name, temperature, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+    model = _chat_models.get(key)
+    if model is None:
+        from langchain_openai import ChatOpenAI
+
+        model = ChatOpenAI(model=model_name, temperature=temperature, **{**client_kwargs(), **kwargs})
+        with _lock:
+            model = _chat_models.setdefault(key, model)
+    return model
+
+async def close_openai_clients():
+    """Close the shared connection pool"""
+    global _http_clients, _async_openai
+    with _lock:
+        clients, _http_clients, _async_openai = _http_clients, None, None
+        _chat_models.clear()
+    if clients is not None:
+        clients[0].close()
+        await clients[1].aclose()
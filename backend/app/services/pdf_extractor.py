@@ -0,0 +1,69 @@
+from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+def _count_pages(file_path: str) -> int:
+    """Count the pages of a PDF (runs in a worker process)"""
+    return len(PyPDF2.PdfReader(file_path).pages)
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) of a PDF (runs in a worker process)"""
+    pdf_reader = PyPDF2.PdfReader(file_path)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+class PDFExtractor:
+    """Page-parallel PDF text extraction on a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, tasks_per_worker: int = 2):
+        self.max_workers = max_workers or settings.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+        # More ranges than workers keeps the pool busy when pages differ in cost
+        self.tasks_per_worker = tasks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Split pages into contiguous [start, end) ranges for the workers"""
+        pages_per_task = max(1, math.ceil(page_count / (self.max_workers * self.tasks_per_worker)))
+        return [
+            (start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+
+    async def extract_pages(self, file_path: str) -> List[str]:
+        """Extract the text of every page, in page order"""
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(self.executor, _count_pages, file_path)
+
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _extract_page_range, file_path, start, end)
+            for start, end in self.page_ranges(page_count)
+        ))
+        return [page for pages in results for page in pages]
+
+    async def extract_text(self, file_path: str) -> str:
+        """Extract the full text of a PDF"""
+        return "\n".join(await self.extract_pages(file_path))
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+pdf_extractor = PDFExtractor()
@@ -1,40 +1,54 @@
-from typing import Dict, List, Optional
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Pinecone
-from langchain_community.chat_models import ChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pinecone import Pinecone as PineconeClient, ServerlessSpec
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from ..core.config import settings
+from .embedding_batcher import EmbeddingBatcher
+from .chunk_store import chunk_store
+from .embeddings import create_embeddings
+from .lexical_index import LexicalIndex
+from .openai_client import get_chat_model
+from .retriever import (
+    HandleRetriever, HybridRetriever, IndexHandle, ScopedRetriever, TwoStageRetriever, retrieval_scope
+)
+from .vector_index import VectorIndexStore, get_vector_index
+from .vector_store import chunk_vector_id, delete_in_batches, document_namespace, tenant_namespace
+from functools import partial
+import asyncio
 import logging
-import os
+import numpy as np
+import threading
 
 logger = logging.getLogger(__name__)
 
+UPSERT_BATCH_SIZE = 100  # Pinecone recommends at most 100 vectors per upsert
+
+def document_vector(embeddings: List[List[float]]) -> List[float]:
+    """Document-level vector: the normalized mean of its chunk vectors"""
+    mean = np.asarray(embeddings, dtype=np.float32).mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm > 0 else mean).tolist()
+
 class RAGService:
     def __init__(self):
+        # The chain and splitter classes load with the service, not the module
+        from langchain.chains import ConversationalRetrievalChain
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         # Verify environment variables
-        if not settings.PINECONE_API_KEY:
-            raise ValueError("PINECONE_API_KEY not found in environment variables")
-        if not settings.PINECONE_ENV:
-            raise ValueError("PINECONE_ENV not found in environment variables")
-        if not settings.PINECONE_INDEX_NAME:
-            raise ValueError("PINECONE_INDEX_NAME not found in environment variables")
+        backend = settings.VECTOR_STORE_BACKEND.lower()
+        if backend == "pinecone":
+            if not settings.PINECONE_API_KEY:
+                raise ValueError("PINECONE_API_KEY not found in environment variables")
+            if not settings.PINECONE_ENV:
+                raise ValueError("PINECONE_ENV not found in environment variables")
+            if not settings.PINECONE_INDEX_NAME:
+                raise ValueError("PINECONE_INDEX_NAME not found in environment variables")
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
 
         logger.info("Initializing RAG service with:")
-        logger.info(f"Pinecone Environment: {settings.PINECONE_ENV}")
-        logger.info(f"Pinecone Index: {settings.PINECONE_INDEX_NAME}")
-        
-        # Initialize Pinecone with new API
-        os.environ["PINECONE_API_KEY"] = settings.PINECONE_API_KEY
-        os.environ["PINECONE_ENVIRONMENT"] = settings.PINECONE_ENV
-        
-        self.pc = PineconeClient(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENV
-        )
+        logger.info(f"Vector store backend: {backend}")
+        if backend == "pinecone":
+            logger.info(f"Pinecone Environment: {settings.PINECONE_ENV}")
+            logger.info(f"Pinecone Index: {settings.PINECONE_INDEX_NAME}")
         
         # Initialize text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -43,48 +57,103 @@ class RAGService:
         )
         
         # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        self.embeddings = create_embeddings()
         
-        # Get or create Pinecone index
-        self.index_name = settings.PINECONE_INDEX_NAME
-        if self.index_name not in self.pc.list_indexes().names():
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=1536,  # OpenAI embeddings dimension
-                metric="cosine",
-                spec=ServerlessSpec(
-                    cloud="aws",
-                    region="us-west-2"
-                )
-            )
+        # Get or create the vector index
+        self.index = get_vector_index()
+        
+        # Chunk text lives in MongoDB; vector metadata keeps IDs and small fields
+        self.chunk_store = chunk_store if settings.CHUNK_STORE_ENABLED else None
         
         # Initialize vectorstore
-        self.vectorstore = Pinecone.from_existing_index(
-            index_name=self.index_name,
-            embedding=self.embeddings,
-            namespace=""  # Optional: specify a namespace if needed
+        self.vectorstore = VectorIndexStore(self.index, self.embeddings, chunk_store=self.chunk_store)
+        self.index_handle = IndexHandle(self.vectorstore)
+        
+        # One vector per document, for picking documents before chunks
+        self.document_store = VectorIndexStore(
+            self.index, self.embeddings, namespace=settings.DOCUMENT_INDEX_NAMESPACE
         )
         
+        # BM25 index over the same chunks, searched alongside the vectors
+        self.lexical_index = LexicalIndex(settings.LEXICAL_INDEX_PATH) if settings.HYBRID_SEARCH_ENABLED else None
+        
         # Initialize LLM
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        self.llm = get_chat_model("gpt-3.5-turbo", temperature=0.7)
         
-        # Initialize RAG chain
+        # Initialize RAG chain once; the retriever follows the handle and
+        # the request's retrieval scope, so writes, index swaps and per-user
+        # searches never require rebuilding it
         self.qa_chain = ConversationalRetrievalChain.from_llm(
             llm=self.llm,
-            retriever=self.vectorstore.as_retriever(
-                search_kwargs={"k": 3}  # Retrieve top 3 most relevant chunks
+            retriever=ScopedRetriever(
+                factory=partial(self.create_retriever, k=3)  # Retrieve top 3 most relevant chunks
             ),
             return_source_documents=True
         )
 
-    async def get_response(self, query: str, chat_history: List = []) -> Dict:
-        """Get response using RAG"""
+    def create_retriever(
+        self,
+        k: int = 3,
+        filter: Optional[Dict] = None,
+        user_id: Optional[str] = None,
+        document_ids: Optional[List[str]] = None
+    ):
+        """
+        Hybrid BM25 + vector retriever when enabled, otherwise vector only.
+        With ``RETRIEVAL_MODE=two_stage`` it only searches the chunks of the
+        documents whose document vectors best match the query.
+
+        ``user_id`` limits the search to that user's namespace and chunks;
+        ``document_ids`` limits it to those documents.
+        """
+        namespace = tenant_namespace(user_id)
+        filter = dict(filter or {})
+        if user_id:
+            filter["user_id"] = user_id
+        if document_ids:
+            filter["document_id"] = {"$in": list(document_ids)}
+        filter = filter or None
+
+        if self.lexical_index is not None:
+            retriever = HybridRetriever(
+                handle=self.index_handle,
+                lexical_index=self.lexical_index,
+                k=k,
+                fetch_k=max(settings.HYBRID_FETCH_K, k),
+                rrf_k=settings.RRF_K,
+                filter=filter,
+                namespace=namespace
+            )
+        else:
+            search_kwargs = {"k": k, "namespace": namespace, **({"filter": filter} if filter else {})}
+            retriever = HandleRetriever(handle=self.index_handle, search_kwargs=search_kwargs)
+        if settings.RETRIEVAL_MODE.lower() == "two_stage" and not document_ids:
+            return TwoStageRetriever(
+                document_store=self.document_store,
+                chunk_retriever=retriever,
+                top_documents=settings.TWO_STAGE_TOP_DOCUMENTS,
+                filter=filter,
+                namespace=document_namespace(namespace)
+            )
+        return retriever
+
+    @property
+    def generation(self) -> int:
+        """Index generation; changes whenever vectors are written or deleted"""
+        return self.index_handle.generation
+
+    async def get_response(
+        self,
+        query: str,
+        chat_history: List = [],
+        user_id: Optional[str] = None,
+        document_ids: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Get response using RAG, searching only ``user_id``'s chunks and, when
+        given, only the chunks of ``document_ids``
+        """
+        scope = retrieval_scope.set({"user_id": user_id, "document_ids": document_ids})
         try:
             # Get response from chain
             result = await self.qa_chain.acall({
@@ -92,114 +161,215 @@ class RAGService:
                 "chat_history": chat_history
             })
             
-            # Extract sources from documents
-            sources = []
-            if result.get("source_documents"):
-                for doc in result["source_documents"]:
-                    sources.append({
-                        "title": doc.metadata.get("title", "Unknown"),
-                        "content": doc.page_content,
-                        "document_id": doc.metadata.get("document_id")
-                    })
-            
             return {
                 "answer": result["answer"],
-                "sources": sources
+                "sources": self.sources(result.get("source_documents") or [])
             }
             
         except Exception as e:
             logger.error(f"Error getting RAG response: {str(e)}")
             raise
+        finally:
+            retrieval_scope.reset(scope)
+
+    @staticmethod
+    def sources(documents: List) -> List[Dict]:
+        """Source entries returned with an answer"""
+        return [
+            {
+                "title": doc.metadata.get("title", "Unknown"),
+                "content": doc.page_content,
+                "document_id": doc.metadata.get("document_id")
+            }
+            for doc in documents
+        ]
+
+    async def stream_response(
+        self,
+        query: str,
+        chat_history: List = [],
+        user_id: Optional[str] = None,
+        document_ids: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], AsyncIterator[str]]:
+        """
+        Retrieve the sources, then stream the answer.
+
+        Uses the same retriever and prompts as ``get_response``, but calls
+        the model with ``astream``. Returns the sources right away, with an
+        async iterator over the answer's tokens.
+        """
+        question = query
+        if chat_history:
+            # Condense the follow-up into a standalone question, as the chain does
+            question = await self.qa_chain.question_generator.apredict(
+                question=query,
+                chat_history="\n".join(f"Human: {human}\nAssistant: {ai}" for human, ai in chat_history)
+            )
+        retriever = self.create_retriever(k=3, user_id=user_id, document_ids=document_ids)
+        documents = await retriever.ainvoke(question)
+
+        combine = self.qa_chain.combine_docs_chain
+        messages = combine.llm_chain.prompt.format_messages(**{
+            combine.document_variable_name: "\n\n".join(doc.page_content for doc in documents),
+            "question": question
+        })
 
-    async def process_document(self, content: str, metadata: Dict) -> None:
+        async def tokens() -> AsyncIterator[str]:
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    yield chunk.content
+
+        return self.sources(documents), tokens()
+
+    def split_text(self, content: str) -> List[str]:
+        """Split document text into chunks"""
+        return self.text_splitter.split_text(content)
+
+    async def process_document(self, content: str, metadata: Dict) -> List[str]:
         """Process and store document in vector database"""
+        # Split text into chunks
+        texts = self.split_text(content)
+        print(f"Split document into {len(texts)} chunks")
+        return await self.index_chunks(texts, metadata)
+
+    async def index_chunks(self, texts: List[str], metadata: Dict) -> List[str]:
+        """
+        Embed and store pre-split chunks, returning their vector IDs.
+
+        IDs are deterministic (``{document_id}#{chunk_index}``), so indexing the
+        same document again overwrites its vectors instead of duplicating them.
+        """
         try:
-            # Split text into chunks
-            texts = self.text_splitter.split_text(content)
-            print(f"Split document into {len(texts)} chunks")
-            
             # Create documents with metadata
             documents = [
                 {"text": text, "metadata": {
                     "title": metadata.get("title", "Unknown"),
                     "file_path": metadata.get("file_path", ""),
                     "chunk_id": f"{metadata.get('id', '')}_chunk_{i}",
+                    "chunk_index": i,
                     "document_id": metadata.get("id", ""),
-                    "source": text[:200] + "..."  # First 200 chars as preview
+                    **({"user_id": metadata["user_id"]} if metadata.get("user_id") else {})
                 }}
                 for i, text in enumerate(texts)
             ]
             
-            # Add to Pinecone
-            self.vectorstore.add_texts(
-                texts=[doc["text"] for doc in documents],
-                metadatas=[doc["metadata"] for doc in documents]
+            # Embed in token-budgeted batches
+            embeddings = await EmbeddingBatcher(self.embeddings).embed(
+                [doc["text"] for doc in documents]
             )
             
-            # Refresh the retriever
-            self.qa_chain = ConversationalRetrievalChain.from_llm(
-                llm=self.llm,
-                retriever=self.vectorstore.as_retriever(
-                    search_kwargs={"k": 3}
-                ),
-                return_source_documents=True
-            )
+            # Add to the vector index. The text goes to the chunk store first, so
+            # a query never sees a vector whose text is missing; without a chunk
+            # store it stays in metadata, where the retriever expects it
+            vectors = [
+                {
+                    "id": chunk_vector_id(doc["text"], doc["metadata"], i),
+                    "values": embedding,
+                    "metadata": doc["metadata"] if self.chunk_store else {**doc["metadata"], "text": doc["text"]}
+                }
+                for i, (doc, embedding) in enumerate(zip(documents, embeddings))
+            ]
+            if self.chunk_store is not None:
+                await self.chunk_store.put(
+                    [vector["id"] for vector in vectors],
+                    [doc["text"] for doc in documents],
+                    [doc["metadata"] for doc in documents]
+                )
+            namespace = tenant_namespace(metadata.get("user_id"))
+            for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                await self.index.upsert(
+                    vectors=vectors[start:start + UPSERT_BATCH_SIZE],
+                    namespace=namespace
+                )
+            if self.lexical_index is not None:
+                await asyncio.to_thread(
+                    self.lexical_index.add,
+                    [vector["id"] for vector in vectors],
+                    [doc["text"] for doc in documents],
+                    [doc["metadata"] for doc in documents],
+                    namespace
+                )
+            if embeddings and metadata.get("id"):
+                await self.index.upsert(
+                    vectors=[{
+                        "id": metadata["id"],
+                        "values": document_vector(embeddings),
+                        "metadata": {
+                            "document_id": metadata["id"],
+                            "title": metadata.get("title", "Unknown"),
+                            "chunk_count": len(embeddings),
+                            **({"user_id": metadata["user_id"]} if metadata.get("user_id") else {})
+                        }
+                    }],
+                    namespace=document_namespace(namespace)
+                )
+            self.index_handle.bump()
             
             print(f"Successfully processed document: {metadata.get('title', 'Unknown')}")
+            return [vector["id"] for vector in vectors]
         except Exception as e:
             print(f"Error processing document: {str(e)}")
             raise e
 
-    async def delete_document_vectors(self, document_id: str) -> None:
-        """Delete all vectors associated with a document"""
+    async def delete_vectors(self, vector_ids: List[str], namespace: str = "") -> None:
+        """Delete vectors by ID in size-limited batches, several at a time"""
+        async def delete_batch(batch: List[str]):
+            await self.index.delete(ids=batch, namespace=namespace)
+            if self.chunk_store is not None:
+                await self.chunk_store.delete(batch)
+
+        await delete_in_batches(delete_batch, vector_ids)
+        if self.lexical_index is not None:
+            await asyncio.to_thread(self.lexical_index.delete, vector_ids)
+        self.index_handle.bump()
+
+    async def list_document_vector_ids(self, document_id: str, namespace: str = "") -> List[str]:
+        """List a document's vector IDs by their ``{document_id}#`` prefix"""
+        return await self.index.list_ids(prefix=f"{document_id}#", namespace=namespace)
+
+    async def delete_document_vectors(
+        self,
+        document_id: str,
+        vector_ids: Optional[List[str]] = None,
+        user_id: Optional[str] = None
+    ) -> None:
+        """
+        Delete all vectors associated with a document.
+
+        Uses the document's ``vector_ids`` manifest when given, otherwise lists
+        the IDs by prefix. The retriever reads the live index through the
+        index handle, so it does not need to be rebuilt afterwards. The
+        document-level vector is removed as well. ``user_id`` selects the
+        owner's namespace.
+        """
         try:
-            # Get the Pinecone index
-            index = self.pc.Index(self.index_name)
-            
-            # For Serverless/Starter indexes, we need to:
-            # 1. Query to get vector IDs associated with the document
-            # 2. Delete vectors by their IDs
-            
-            # Query vectors with matching document_id
-            query_response = index.query(
-                vector=[0] * 1536,  # Dummy vector for metadata-only query
-                filter={
-                    "document_id": document_id
-                },
-                top_k=10000,  # Adjust based on your needs
-                include_metadata=True
-            )
+            namespace = tenant_namespace(user_id)
+            if vector_ids is None:
+                vector_ids = await self.list_document_vector_ids(document_id, namespace)
             
-            if query_response.matches:
-                # Extract vector IDs
-                vector_ids = [match.id for match in query_response.matches]
-                
-                # Delete vectors by IDs
-                if vector_ids:
-                    index.delete(ids=vector_ids)
-                    
+            if vector_ids:
+                await self.delete_vectors(vector_ids, namespace)
                 logger.info(f"Successfully deleted {len(vector_ids)} vectors for document: {document_id}")
-                
-                # Re-initialize the vectorstore to reflect the changes
-                self.vectorstore = Pinecone.from_existing_index(
-                    index_name=self.index_name,
-                    embedding=self.embeddings,
-                    namespace=""
-                )
-                
-                # Refresh the retriever with the updated vectorstore
-                self.qa_chain = ConversationalRetrievalChain.from_llm(
-                    llm=self.llm,
-                    retriever=self.vectorstore.as_retriever(
-                        search_kwargs={"k": 3}
-                    ),
-                    return_source_documents=True
-                )
             else:
                 logger.info(f"No vectors found for document: {document_id}")
+            await self.index.delete(ids=[document_id], namespace=document_namespace(namespace))
                 
         except Exception as e:
             logger.error(f"Error deleting vectors: {str(e)}")
             raise
 
-rag_service = RAGService()
\ No newline at end of file
+_rag_service: Optional[RAGService] = None
+_rag_service_lock = threading.Lock()
+
+def get_rag_service() -> RAGService:
+    """
+    The process-wide RAG service, built on first use. Construction connects
+    to the vector index, so it happens during startup warm-up (or on the
+    first request) rather than at import. Blocking: call it from a thread or
+    a sync FastAPI dependency.
+    """
+    global _rag_service
+    with _rag_service_lock:
+        if _rag_service is None:
+            _rag_service = RAGService()
+        return _rag_service
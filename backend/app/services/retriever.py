@@ -0,0 +1,196 @@
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import Field
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+import asyncio
+import threading
+
+# Per-request retrieval options (such as ``user_id`` and ``document_ids``)
+# read by ScopedRetriever; set it around a chain call
+retrieval_scope: ContextVar[Dict[str, Any]] = ContextVar("retrieval_scope", default={})
+
+class IndexHandle:
+    """
+    Long-lived reference to the active vector store.
+
+    Retrievers read the store through the handle on every query. Writes bump
+    the ``generation`` counter, which caches can include in their keys. A new
+    store can be swapped in without rebuilding the chains that use the handle.
+    """
+
+    def __init__(self, vectorstore: VectorStore):
+        self._vectorstore = vectorstore
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def vectorstore(self) -> VectorStore:
+        return self._vectorstore
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def bump(self) -> int:
+        """Record a write to the index"""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def swap(self, vectorstore: VectorStore) -> int:
+        """Point every retriever at a different vector store"""
+        with self._lock:
+            self._vectorstore = vectorstore
+            self._generation += 1
+            return self._generation
+
+class HandleRetriever(BaseRetriever):
+    """Retriever that always searches the handle's current vector store"""
+
+    handle: IndexHandle
+    search_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.handle.vectorstore.similarity_search(query, **self.search_kwargs)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.handle.vectorstore.asimilarity_search(query, **self.search_kwargs)
+
+    def scoped(self, filter: Dict[str, Any]) -> "HandleRetriever":
+        """Copy of the retriever with ``filter`` added to its search filter"""
+        search_filter = {**self.search_kwargs.get("filter", {}), **filter}
+        return self.model_copy(update={"search_kwargs": {**self.search_kwargs, "filter": search_filter}})
+
+def chunk_key(document: Document) -> str:
+    """Key matching a retrieved chunk to its vector ID, ``{document_id}#{chunk_index}``"""
+    document_id = document.metadata.get("document_id")
+    if document_id and "chunk_index" in document.metadata:
+        return f"{document_id}#{document.metadata['chunk_index']}"
+    return document.page_content
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing vector search with BM25 keyword search.
+
+    Both searches return ``fetch_k`` candidates, which are merged by reciprocal
+    rank fusion, so exact terms such as part numbers or error codes surface
+    even when their embeddings are not close to the query's.
+    """
+
+    handle: IndexHandle
+    lexical_index: LexicalIndex
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filter: Optional[Dict[str, Any]] = None
+    namespace: Optional[str] = None
+
+    @property
+    def _dense_kwargs(self) -> Dict[str, Any]:
+        kwargs = {"k": self.fetch_k, "filter": self.filter}
+        if self.namespace is not None:
+            kwargs["namespace"] = self.namespace
+        return kwargs
+
+    def scoped(self, filter: Dict[str, Any]) -> "HybridRetriever":
+        """Copy of the retriever with ``filter`` added to both searches"""
+        return self.model_copy(update={"filter": {**(self.filter or {}), **filter}})
+
+    def _fuse(self, dense: List[Document], lexical: List[Tuple[str, float, str, Dict]]) -> List[Document]:
+        documents = {}
+        for document in dense:
+            documents.setdefault(chunk_key(document), document)
+        for id, _, text, metadata in lexical:
+            documents.setdefault(id, Document(page_content=text, metadata=metadata))
+        fused = reciprocal_rank_fusion(
+            [[chunk_key(document) for document in dense], [id for id, *_ in lexical]],
+            k=self.rrf_k
+        )
+        return [documents[id] for id, _ in fused[:self.k]]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense = self.handle.vectorstore.similarity_search(query, **self._dense_kwargs)
+        lexical = self.lexical_index.search(query, top_k=self.fetch_k, filter=self.filter, namespace=self.namespace)
+        return self._fuse(dense, lexical)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense, lexical = await asyncio.gather(
+            self.handle.vectorstore.asimilarity_search(query, **self._dense_kwargs),
+            asyncio.to_thread(self.lexical_index.search, query, self.fetch_k, self.filter, self.namespace)
+        )
+        return self._fuse(dense, lexical)
+
+class TwoStageRetriever(BaseRetriever):
+    """
+    Retriever that first picks the ``top_documents`` most relevant documents
+    by their document-level vectors, then searches chunks only within them.
+
+    ``chunk_retriever`` must provide ``scoped(filter)``. When no document
+    vectors exist yet, every chunk is searched.
+    """
+
+    document_store: VectorStore
+    chunk_retriever: BaseRetriever
+    top_documents: int = 10
+    filter: Optional[Dict[str, Any]] = None
+    namespace: Optional[str] = None
+
+    @property
+    def _document_kwargs(self) -> Dict[str, Any]:
+        kwargs = {"k": self.top_documents, "filter": self.filter}
+        if self.namespace is not None:
+            kwargs["namespace"] = self.namespace
+        return kwargs
+
+    def _scope(self, documents: List[Document]) -> BaseRetriever:
+        document_ids = list(dict.fromkeys(
+            document.metadata["document_id"] for document in documents if document.metadata.get("document_id")
+        ))
+        if not document_ids:
+            return self.chunk_retriever
+        return self.chunk_retriever.scoped({"document_id": {"$in": document_ids}})
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.document_store.similarity_search(query, **self._document_kwargs)
+        return self._scope(documents).invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.document_store.asimilarity_search(query, **self._document_kwargs)
+        return await self._scope(documents).ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+class ScopedRetriever(BaseRetriever):
+    """
+    Retriever that builds the actual retriever for each query from
+    ``retrieval_scope``, so a chain built once can serve per-user and
+    per-document searches.
+    """
+
+    factory: Callable[..., BaseRetriever]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        retriever = self.factory(**retrieval_scope.get())
+        return retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        retriever = self.factory(**retrieval_scope.get())
+        return await retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.db.mongodb import db
+from app.models.chat import ChatSession, Message
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough per-object overhead of a cached session and of each message
+SESSION_OVERHEAD_BYTES = 1024
+MESSAGE_OVERHEAD_BYTES = 256
+
+WRITE_THROUGH = "write_through"
+WRITE_BEHIND = "write_behind"
+
+class SessionCache:
+    """
+    In-process cache of active chat sessions, bounded by count and by
+    estimated bytes (least recently used sessions are evicted first).
+
+    With ``write_through`` durability every turn is stored in MongoDB before
+    it returns; the cache only saves the reads. With ``write_behind`` new
+    messages and session fields are buffered and written in batches with
+    ``bulk_write`` every ``flush_interval`` seconds, when ``flush_batch_size``
+    messages are pending, and on shutdown. A crash loses at most the last
+    interval. Write-behind only applies while the flusher runs (``start``);
+    otherwise writes go through.
+
+    Write-behind assumes one process serves a session (a single worker, or
+    requests routed by session): other processes do not see its buffered
+    writes. With write-through, ``ChatService.get_session`` checks a cached
+    session's ``message_count`` and ``updated_at`` against MongoDB before
+    using it, and reloads it when another process has changed it.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        durability: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+        flush_batch_size: Optional[int] = None,
+        max_pending_messages: Optional[int] = None
+    ):
+        self.max_sessions = max_sessions or settings.CHAT_SESSION_CACHE_MAX_SESSIONS
+        self.max_bytes = max_bytes or settings.CHAT_SESSION_CACHE_MAX_BYTES
+        self.durability = (durability or settings.CHAT_SESSION_DURABILITY).lower()
+        if self.durability not in (WRITE_THROUGH, WRITE_BEHIND):
+            raise ValueError(f"Unknown chat session durability: {self.durability}")
+        self.flush_interval = flush_interval or settings.CHAT_SESSION_FLUSH_INTERVAL_SECONDS
+        self.flush_batch_size = flush_batch_size or settings.CHAT_SESSION_FLUSH_BATCH_SIZE
+        self.max_pending_messages = max_pending_messages or settings.CHAT_SESSION_MAX_PENDING_MESSAGES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+        self.flushes = 0
+        self._entries: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._pending_sessions: Dict[str, Dict] = {}
+        self._pending_messages: List[Dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def write_behind(self) -> bool:
+        return self.durability == WRITE_BEHIND and self._task is not None
+
+    @staticmethod
+    def estimate_bytes(session: ChatSession) -> int:
+        return SESSION_OVERHEAD_BYTES + len(session.summary or "") + sum(
+            len(message.content) + MESSAGE_OVERHEAD_BYTES for message in session.messages
+        )
+
+    def get(self, session_id: str, user_id: str) -> Optional[ChatSession]:
+        session = self._entries.get(session_id)
+        if session is None or session.user_id != user_id:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return session
+
+    def put(self, session: ChatSession):
+        """Cache ``session``, keeping only its unsummarized messages"""
+        session.messages = session.unsummarized()
+        size = self.estimate_bytes(session)
+        self._bytes += size - self._sizes.get(session.id, 0)
+        self._sizes[session.id] = size
+        self._entries[session.id] = session
+        self._entries.move_to_end(session.id)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+            self.invalidate(next(iter(self._entries)))
+            self.evictions += 1
+
+    def reject(self, session_id: str):
+        """Drop a cached session found to be stale, counting its lookup as a miss"""
+        self.hits -= 1
+        self.misses += 1
+        self.stale += 1
+        self.invalidate(session_id)
+
+    def invalidate(self, session_id: str):
+        """Drop a cached session; its buffered writes stay pending until flushed"""
+        if self._entries.pop(session_id, None) is not None:
+            self._bytes -= self._sizes.pop(session_id)
+
+    def has_pending(self, session_id: Optional[str] = None) -> bool:
+        if session_id is None:
+            return bool(self._pending_sessions)
+        return session_id in self._pending_sessions
+
+    async def record(self, session: ChatSession, messages: List[Message]):
+        """
+        Buffer ``messages`` (already numbered) and the session's fields for
+        the next flush. Waits for a flush when too many messages are pending.
+        """
+        self._pending_messages.extend({**message.dict(), "session_id": session.id} for message in messages)
+        self._pending_sessions[session.id] = {
+            "$set": {
+                "title": session.title,
+                "summary": session.summary,
+                "summarized_count": session.summarized_count,
+                "updated_at": session.updated_at
+            },
+            # $max keeps retried or reordered flushes from moving the count back
+            "$max": {"message_count": session.message_count}
+        }
+        self.put(session)
+        if len(self._pending_messages) >= self.max_pending_messages:
+            await self.flush()
+        elif len(self._pending_messages) >= self.flush_batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write buffered messages and session updates; returns the messages written"""
+        async with self._flush_lock:
+            sessions, messages = self._pending_sessions, self._pending_messages
+            self._pending_sessions, self._pending_messages = {}, []
+            if not sessions:
+                return 0
+            try:
+                if messages:
+                    await self._insert_messages(messages)
+                await db.db.sessions.bulk_write(
+                    [UpdateOne({"id": session_id}, update) for session_id, update in sessions.items()],
+                    ordered=False
+                )
+            except Exception:
+                # Keep them for the next flush; newer updates of a session win
+                self._pending_sessions = {**sessions, **self._pending_sessions}
+                self._pending_messages = messages + self._pending_messages
+                raise
+            self.flushes += 1
+            return len(messages)
+
+    async def _insert_messages(self, messages: List[Dict]):
+        try:
+            await db.db.chat_messages.bulk_write([InsertOne(message) for message in messages], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            # Stored by an earlier, partly failed flush, or by another process
+            # writing the same session; reload those sessions from MongoDB
+            conflicted = {messages[error["index"]]["session_id"] for error in errors}
+            logger.warning(f"{len(errors)} chat messages were already stored; reloading {len(conflicted)} sessions")
+            for session_id in conflicted:
+                self.invalidate(session_id)
+
+    async def discard(self, session_id: str):
+        """Forget a session and its buffered writes, e.g. when it is deleted"""
+        async with self._flush_lock:
+            self.invalidate(session_id)
+            self._pending_sessions.pop(session_id, None)
+            self._pending_messages = [m for m in self._pending_messages if m["session_id"] != session_id]
+
+    async def start(self):
+        """Start the write-behind flusher"""
+        if self.durability == WRITE_BEHIND and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        written = await self.flush()
+        if written:
+            logger.info(f"Flushed {written} buffered chat messages on shutdown")
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing chat sessions: {str(e)}")
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "durability": self.durability,
+            "write_behind": self.write_behind,
+            "pending_sessions": len(self._pending_sessions),
+            "pending_messages": len(self._pending_messages),
+            "flushes": self.flushes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# Global instance
+session_cache = SessionCache()
@@ -0,0 +1,869 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.core.config import settings
+from app.services.vector_io import run_vector_io
+import asyncio
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields with an inverted index in the local backend
+INDEXED_FIELDS = ("document_id", "user_id")
+
+# Directory name of the default ("") namespace in the local backend
+DEFAULT_NAMESPACE_DIR = "__default__"
+
+# Quantized copies the local backend can keep for a first-pass scan
+QUANTIZATION_DTYPES = {"int8": np.int8, "float16": np.float16}
+
+# Rows decoded at a time when scanning quantized vectors
+QUANTIZED_BLOCK_ROWS = 2048
+
+class ReadWriteLock:
+    """
+    Any number of readers at once, or one writer. Waiting writers hold back
+    new readers, so a steady stream of queries cannot starve upserts. The
+    writer may re-enter and read; readers must not nest.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writes = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._condition.notify_all()
+
+def quantization_dtype(quantization: Optional[str]):
+    if not quantization or quantization == "none":
+        return None
+    if quantization not in QUANTIZATION_DTYPES:
+        raise ValueError(f"Unknown vector quantization: {quantization}")
+    return QUANTIZATION_DTYPES[quantization]
+
+class VectorIndex(ABC):
+    """
+    Async vector index interface shared by every backend.
+
+    Records are dicts with ``id``, ``values`` and ``metadata``; query results
+    are dicts with ``id``, ``score`` and ``metadata``, the same shape Pinecone
+    returns. Filters use Pinecone's syntax for equality and ``$in``.
+    """
+
+    @abstractmethod
+    async def upsert(self, vectors: List[Dict], namespace: Optional[str] = None) -> int:
+        """Insert or overwrite vectors by ID"""
+
+    @abstractmethod
+    async def query(
+        self,
+        vector: List[float],
+        filter: Optional[Dict] = None,
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        include_metadata: bool = True
+    ) -> List[Dict]:
+        """Return the ``top_k`` most similar vectors, best first"""
+
+    @abstractmethod
+    async def delete(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        """Delete vectors by ID; unknown IDs are ignored"""
+
+    @abstractmethod
+    async def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        """List vector IDs that start with ``prefix``"""
+
+    @abstractmethod
+    async def fetch(self, ids: List[str], namespace: Optional[str] = None) -> List[Dict]:
+        """Records stored under ``ids``; unknown IDs are skipped"""
+
+    @abstractmethod
+    async def describe_index_stats(self) -> Dict:
+        """Vector counts and dimension, in Pinecone's stats format"""
+
+class PineconeVectorIndex(VectorIndex):
+    """
+    VectorIndex backed by a Pinecone index. The sync client runs in the
+    bounded vector I/O pool, with a timeout on every call.
+    """
+
+    def __init__(self, index, timeout: Optional[float] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.index = index
+        self.timeout = timeout or settings.VECTOR_IO_TIMEOUT_SECONDS
+        self.executor = executor
+
+    async def _call(self, fn: Callable, *args, **kwargs):
+        return await run_vector_io(fn, *args, timeout=self.timeout, executor=self.executor, **kwargs)
+
+    async def upsert(self, vectors: List[Dict], namespace: Optional[str] = None) -> int:
+        await self._call(self.index.upsert, vectors=vectors, namespace=namespace or "")
+        return len(vectors)
+
+    async def query(
+        self,
+        vector: List[float],
+        filter: Optional[Dict] = None,
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        include_metadata: bool = True
+    ) -> List[Dict]:
+        response = await self._call(
+            self.index.query,
+            vector=vector,
+            filter=filter or None,
+            top_k=top_k,
+            namespace=namespace or "",
+            include_metadata=include_metadata
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+            for match in response.matches
+        ]
+
+    async def delete(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        await self._call(self.index.delete, ids=ids, namespace=namespace or "")
+
+    async def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        def list_all():
+            ids = []
+            for page in self.index.list(prefix=prefix, namespace=namespace or ""):
+                ids.extend(page)
+            return ids
+        return await self._call(list_all)
+
+    async def fetch(self, ids: List[str], namespace: Optional[str] = None) -> List[Dict]:
+        response = await self._call(self.index.fetch, ids=ids, namespace=namespace or "")
+        return [
+            {"id": id, "values": list(vector.values), "metadata": dict(vector.metadata or {})}
+            for id, vector in response.vectors.items()
+        ]
+
+    async def describe_index_stats(self) -> Dict:
+        stats = await self._call(self.index.describe_index_stats)
+        return stats.to_dict() if hasattr(stats, "to_dict") else dict(stats)
+
+class _Segment:
+    """
+    One namespace of the local index.
+
+    Vectors are L2-normalized float32 rows of a matrix that is memory-mapped
+    from ``vectors.f32`` (or held in RAM when there is no directory), so cosine
+    similarity is a single matrix-vector product. IDs and metadata are kept
+    in memory and persisted to an append-only ``records.jsonl`` log. Deleted
+    rows are zeroed and reused by later upserts. Once overwritten and deleted
+    records exceed ``log_compaction_threshold`` of the live vectors, the next
+    write rewrites the log.
+
+    With ``quantization``, an int8 (scaled per row) or float16 copy of the
+    vectors is kept in RAM. Scans score that copy first, then rescore the best
+    ``top_k * rescore_factor`` rows against the full-precision matrix, which
+    can stay on disk.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        dimension: Optional[int] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4,
+        log_compaction_threshold: Optional[float] = None
+    ):
+        self.directory = directory
+        self.dimension = dimension
+        self.log_compaction_threshold = log_compaction_threshold or settings.VECTOR_LOG_COMPACTION_THRESHOLD
+        self.log_records = 0  # Vector records in the log since it was last rewritten
+        self.capacity = 0
+        self.matrix: Optional[np.ndarray] = None
+        self.codes_dtype = quantization_dtype(quantization)
+        self.rescore_factor = rescore_factor
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict]] = []
+        self.rows: Dict[str, int] = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.free: List[int] = []
+        self.postings: Dict[str, Dict[Any, Set[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._log = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def garbage(self) -> int:
+        """Logged records that no longer describe a live vector"""
+        return self.log_records - self.count if self.directory else 0
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _records_path(self) -> str:
+        return os.path.join(self.directory, "records.jsonl")
+
+    def _load(self):
+        if not os.path.exists(self._records_path):
+            return
+        records: Dict[str, Tuple[int, Dict]] = {}
+        with open(self._records_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "dimension" in record:
+                    self.dimension = record["dimension"]
+                    continue
+                self.log_records += 1
+                if record.get("deleted"):
+                    records.pop(record["id"], None)
+                else:
+                    records[record["id"]] = (record["row"], record["metadata"])
+        if self.dimension is None:
+            return
+
+        rows = os.path.getsize(self._vectors_path) // (4 * self.dimension)
+        self._map(rows)
+        for id, (row, metadata) in records.items():
+            self._assign(id, row, metadata)
+        self.free = [row for row in range(len(self.ids)) if not self.alive[row]][::-1]
+        self._encode(np.flatnonzero(self.alive))
+
+    def _map(self, capacity: int):
+        """(Re)map the matrix with room for ``capacity`` rows"""
+        if self.directory:
+            if self.matrix is not None:
+                self.matrix.flush()
+            self.matrix = None
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(capacity * self.dimension * 4)
+            self.matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+            )
+        else:
+            matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self.matrix is not None:
+                matrix[:self.capacity] = self.matrix[:self.capacity]
+            self.matrix = matrix
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+        if self.codes_dtype is not None:
+            codes = np.zeros((capacity, self.dimension), dtype=self.codes_dtype)
+            scales = np.ones(capacity, dtype=np.float32)
+            if self.codes is not None:
+                codes[:self.capacity] = self.codes
+                scales[:self.capacity] = self.scales
+            self.codes, self.scales = codes, scales
+        self.capacity = capacity
+
+    def _encode(self, rows: np.ndarray):
+        """Refresh the quantized copy of ``rows`` from the full-precision matrix"""
+        if self.codes is None:
+            return
+        for start in range(0, len(rows), QUANTIZED_BLOCK_ROWS):
+            block = rows[start:start + QUANTIZED_BLOCK_ROWS]
+            vectors = np.asarray(self.matrix[block])
+            if self.codes_dtype == np.int8:
+                scales = np.abs(vectors).max(axis=1) / 127
+                scales[scales == 0] = 1
+                self.codes[block] = np.round(vectors / scales[:, None]).astype(np.int8)
+                self.scales[block] = scales
+            else:
+                self.codes[block] = vectors.astype(self.codes_dtype)
+
+    def _assign(self, id: str, row: int, metadata: Dict):
+        while len(self.ids) <= row:
+            self.ids.append(None)
+            self.metadata.append(None)
+        self.ids[row] = id
+        self.metadata[row] = metadata
+        self.rows[id] = row
+        self.alive[row] = True
+        for field in INDEXED_FIELDS:
+            if field in metadata:
+                self.postings[field].setdefault(metadata[field], set()).add(row)
+
+    def _unassign(self, row: int):
+        metadata = self.metadata[row] or {}
+        for field in INDEXED_FIELDS:
+            if field in metadata:
+                rows = self.postings[field].get(metadata[field])
+                if rows is not None:
+                    rows.discard(row)
+                    if not rows:
+                        del self.postings[field][metadata[field]]
+        del self.rows[self.ids[row]]
+        self.ids[row] = None
+        self.metadata[row] = None
+        self.alive[row] = False
+        self.matrix[row] = 0
+        if self.codes is not None:
+            self.codes[row] = 0
+
+    def _release(self, row: int):
+        """Make a deleted row available to later upserts"""
+        self.free.append(row)
+
+    def _append_log(self, records: List[Dict]):
+        if not self.directory:
+            return
+        if self._log is None:
+            new_log = not os.path.exists(self._records_path)
+            self._log = open(self._records_path, "a", encoding="utf-8")
+            if new_log:
+                self._log.write(json.dumps({"dimension": self.dimension}) + "\n")
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+        self.log_records += len(records)
+
+    def _compact_if_due(self):
+        if self.garbage > 0 and self.garbage >= self.log_compaction_threshold * self.count:
+            self.compact()
+
+    def upsert(self, vectors: List[Dict]) -> int:
+        if not vectors:
+            return 0
+        values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = values.shape[1]
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {values.shape[1]} does not match index dimension {self.dimension}")
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+
+        records = []
+        written = []
+        for vector, normalized in zip(vectors, values):
+            id = vector["id"]
+            metadata = dict(vector.get("metadata") or {})
+            row = self.rows.get(id)
+            if row is not None:
+                self._unassign(row)
+            elif self.free:
+                row = self.free.pop()
+            else:
+                row = len(self.ids)
+            if row >= self.capacity:
+                self._map(max(1024, self.capacity * 2, row + 1))
+            self.matrix[row] = normalized
+            self._assign(id, row, metadata)
+            written.append(row)
+            records.append({"id": id, "row": row, "metadata": metadata})
+        self._encode(np.asarray(written, dtype=np.int64))
+        self._append_log(records)
+        self._compact_if_due()
+        return len(records)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        records = []
+        for id in ids:
+            row = self.rows.get(id)
+            if row is None:
+                continue
+            self._unassign(row)
+            self._release(row)
+            records.append({"id": id, "deleted": True})
+        self._append_log(records)
+        self._compact_if_due()
+        return len(records)
+
+    def fetch(self, ids: Iterable[str]) -> List[Dict]:
+        """Stored records; the values come back L2-normalized"""
+        return [
+            {"id": id, "values": self.matrix[row].tolist(), "metadata": dict(self.metadata[row])}
+            for id, row in ((id, self.rows.get(id)) for id in ids)
+            if row is not None
+        ]
+
+    def _candidates(self, filter: Dict) -> Optional[np.ndarray]:
+        """Rows matching the filter, or None when every live row matches"""
+        rows: Optional[Set[int]] = None
+        unindexed = {}
+        for field, condition in filter.items():
+            if field not in INDEXED_FIELDS:
+                unindexed[field] = condition
+                continue
+            values = _filter_values(condition)
+            matched = set().union(*(self.postings[field].get(value, ()) for value in values))
+            rows = matched if rows is None else rows & matched
+        if unindexed:
+            pool = rows if rows is not None else self.rows.values()
+            rows = {row for row in pool if _matches(self.metadata[row], unindexed)}
+        if rows is None:
+            return None
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def _top_k(self, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[str, float, Dict]]:
+        """Best ``k`` rows by score; rows scored -inf are never returned"""
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self.ids[rows[i]], float(scores[i]), self.metadata[rows[i]])
+            for i in top
+            if scores[i] > -np.inf
+        ]
+
+    def _approximate_scores(self, rows: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """Scores from the quantized copy, decoded a block at a time"""
+        used = len(self.ids)
+        count = used if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, QUANTIZED_BLOCK_ROWS):
+            end = min(start + QUANTIZED_BLOCK_ROWS, count)
+            block = slice(start, end) if rows is None else rows[start:end]
+            scores[start:end] = self.codes[block].astype(np.float32) @ query
+            if self.codes_dtype == np.int8:
+                scores[start:end] *= self.scales[block]
+        return scores
+
+    def _scan(self, query: np.ndarray, candidates: Optional[np.ndarray], top_k: int) -> List[Tuple[str, float, Dict]]:
+        """Brute-force top-k over the candidate rows, or every live row"""
+        if candidates is None:
+            used = len(self.ids)
+            rows = np.arange(used)
+            dead = ~self.alive[:used]
+        else:
+            rows = candidates
+            dead = None
+
+        if self.codes is None:
+            scores = self.matrix[:len(rows)] @ query if candidates is None else self.matrix[rows] @ query
+            if dead is not None:
+                scores[dead] = -np.inf
+            return self._top_k(rows, scores, top_k)
+
+        # Quantized first pass, then full-precision rescoring of a shortlist
+        scores = self._approximate_scores(candidates, query)
+        if dead is not None:
+            scores[dead] = -np.inf
+        size = min(len(scores), top_k * self.rescore_factor)
+        if size == 0:
+            return []
+        shortlist = np.argpartition(-scores, size - 1)[:size] if size < len(scores) else np.arange(len(scores))
+        shortlist = rows[shortlist[scores[shortlist] > -np.inf]]
+        return self._top_k(shortlist, self.matrix[shortlist] @ query, top_k)
+
+    def query(self, vector: List[float], filter: Optional[Dict], top_k: int) -> List[Tuple[str, float, Dict]]:
+        if not self.rows or top_k <= 0:
+            return []
+        candidates = self._candidates(filter) if filter else None
+        return self._scan(self._normalize(vector), candidates, top_k)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Approximate size of the vector data, by part"""
+        used = len(self.ids)
+        memory = {"vectors": used * (self.dimension or 0) * 4}
+        if self.codes is not None:
+            memory["quantized"] = self.codes[:used].nbytes + self.scales[:used].nbytes
+        return memory
+
+    def compact(self):
+        """Rewrite the record log with one line per live vector"""
+        if not self.directory or self.dimension is None:
+            return
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        temp_path = f"{self._records_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dimension": self.dimension}) + "\n")
+            for id, row in self.rows.items():
+                f.write(json.dumps({"id": id, "row": row, "metadata": self.metadata[row]}) + "\n")
+        os.replace(temp_path, self._records_path)
+        self.log_records = self.count
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+
+def _filter_values(condition) -> List:
+    if isinstance(condition, dict):
+        if "$in" in condition:
+            return list(condition["$in"])
+        if "$eq" in condition:
+            return [condition["$eq"]]
+        raise ValueError(f"Unsupported filter condition: {condition}")
+    return [condition]
+
+def _matches(metadata: Optional[Dict], filter: Dict) -> bool:
+    if metadata is None:
+        return False
+    return all(metadata.get(field) in _filter_values(condition) for field, condition in filter.items())
+
+class NumpyVectorIndex(VectorIndex):
+    """
+    In-process VectorIndex for local development, tests and small-to-medium
+    corpora.
+
+    Each namespace is a separate segment on disk under ``path``. Queries are
+    exact cosine top-k over the memory-mapped matrix with ``argpartition``.
+    ``document_id`` and ``user_id`` have inverted indexes, so filtered
+    queries only score the matching rows. Without a ``path``, the index lives
+    in memory. The files belong to one process: there is no cross-process
+    locking, and writes by another process are not seen until a restart.
+    Record logs are rewritten once superseded records pass
+    ``log_compaction_threshold`` of a namespace's live vectors.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: Optional[int] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+        log_compaction_threshold: Optional[float] = None
+    ):
+        self.path = path
+        self.dimension = dimension
+        self.quantization = quantization if quantization is not None else settings.VECTOR_QUANTIZATION
+        self.rescore_factor = rescore_factor or settings.VECTOR_RESCORE_FACTOR
+        self.log_compaction_threshold = log_compaction_threshold or settings.VECTOR_LOG_COMPACTION_THRESHOLD
+        quantization_dtype(self.quantization)
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = ReadWriteLock()
+        if path and os.path.isdir(path):
+            for name in os.listdir(path):
+                if os.path.isdir(os.path.join(path, name)):
+                    namespace = "" if name == DEFAULT_NAMESPACE_DIR else unquote(name)
+                    self._segments[namespace] = self._new_segment(namespace)
+
+    def _segment_directory(self, namespace: str) -> Optional[str]:
+        if not self.path:
+            return None
+        return os.path.join(self.path, quote(namespace, safe="") or DEFAULT_NAMESPACE_DIR)
+
+    def _new_segment(self, namespace: str) -> _Segment:
+        return _Segment(
+            self._segment_directory(namespace),
+            self.dimension,
+            self.quantization,
+            self.rescore_factor,
+            self.log_compaction_threshold
+        )
+
+    def _segment(self, namespace: Optional[str], create: bool = False) -> Optional[_Segment]:
+        namespace = namespace or ""
+        segment = self._segments.get(namespace)
+        if segment is None and create:
+            segment = self._segments[namespace] = self._new_segment(namespace)
+        return segment
+
+    # Every call runs in the vector I/O pool, so waiting for the lock never
+    # blocks the event loop. Queries, fetches and stats share a read lock and
+    # scan in parallel (NumPy releases the GIL for the matrix products);
+    # upserts, deletes and compaction take the write lock.
+
+    def upsert_sync(self, vectors: List[Dict], namespace: Optional[str] = None) -> int:
+        with self._lock.write():
+            return self._segment(namespace, create=True).upsert(vectors)
+
+    def query_sync(
+        self,
+        vector: List[float],
+        filter: Optional[Dict] = None,
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        include_metadata: bool = True
+    ) -> List[Dict]:
+        with self._lock.read():
+            segment = self._segment(namespace)
+            matches = segment.query(vector, filter, top_k) if segment else []
+        return [
+            {"id": id, "score": score, "metadata": dict(metadata) if include_metadata else {}}
+            for id, score, metadata in matches
+        ]
+
+    async def upsert(self, vectors: List[Dict], namespace: Optional[str] = None) -> int:
+        return await run_vector_io(self.upsert_sync, vectors, namespace)
+
+    async def query(
+        self,
+        vector: List[float],
+        filter: Optional[Dict] = None,
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        include_metadata: bool = True
+    ) -> List[Dict]:
+        return await run_vector_io(self.query_sync, vector, filter, top_k, namespace, include_metadata)
+
+    def delete_sync(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        with self._lock.write():
+            segment = self._segment(namespace)
+            if segment:
+                segment.delete(ids)
+
+    def list_ids_sync(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        with self._lock.read():
+            segment = self._segment(namespace)
+            return [id for id in segment.rows if id.startswith(prefix)] if segment else []
+
+    def fetch_sync(self, ids: List[str], namespace: Optional[str] = None) -> List[Dict]:
+        with self._lock.read():
+            segment = self._segment(namespace)
+            return segment.fetch(ids) if segment else []
+
+    def describe_index_stats_sync(self) -> Dict:
+        with self._lock.read():
+            return self._stats()
+
+    def _stats(self) -> Dict:
+        dimensions = [segment.dimension for segment in self._segments.values() if segment.dimension]
+        return {
+            "dimension": dimensions[0] if dimensions else self.dimension,
+            "total_vector_count": sum(segment.count for segment in self._segments.values()),
+            "namespaces": {
+                namespace: {"vector_count": segment.count, "memory_bytes": segment.memory_bytes()}
+                for namespace, segment in self._segments.items()
+            }
+        }
+
+    async def delete(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        await run_vector_io(self.delete_sync, ids, namespace)
+
+    async def list_ids(self, prefix: str, namespace: Optional[str] = None) -> List[str]:
+        return await run_vector_io(self.list_ids_sync, prefix, namespace)
+
+    async def fetch(self, ids: List[str], namespace: Optional[str] = None) -> List[Dict]:
+        return await run_vector_io(self.fetch_sync, ids, namespace)
+
+    async def describe_index_stats(self) -> Dict:
+        return await run_vector_io(self.describe_index_stats_sync)
+
+    def compact(self):
+        """Shrink each namespace's record log to its live vectors"""
+        with self._lock.write():
+            for segment in self._segments.values():
+                segment.compact()
+
+    def close(self):
+        with self._lock.write():
+            for segment in self._segments.values():
+                segment.close()
+
+def _check_no_running_loop(async_method: str):
+    """
+    The sync wrappers run the async API with ``asyncio.run``, which cannot
+    nest in a running event loop. A private loop in another thread is not
+    an option either: the chunk store's MongoDB client is bound to the app's loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise RuntimeError(
+        f"VectorIndexStore's sync API cannot be called from a running event loop; "
+        f"await {async_method}() instead (ainvoke() for retrievers and chains)"
+    )
+
+class VectorIndexStore(VectorStore):
+    """
+    LangChain vector store over a VectorIndex, for retrievers and chains.
+
+    Matches whose metadata has no ``text_key`` get their text from
+    ``chunk_store`` (anything with an async ``get_many(ids)``), in one
+    lookup per query.
+    """
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        embedding: Embeddings,
+        text_key: str = "text",
+        namespace: Optional[str] = None,
+        chunk_store=None
+    ):
+        self.index = index
+        self._embedding = embedding
+        self.text_key = text_key
+        self.namespace = namespace
+        self.chunk_store = chunk_store
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        from app.services.vector_store import chunk_vector_id
+
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = await self._embedding.aembed_documents(texts)
+        ids = ids or [chunk_vector_id(text, metadata, i) for i, (text, metadata) in enumerate(zip(texts, metadatas))]
+        if self.chunk_store is not None:
+            await self.chunk_store.put(ids, texts, metadatas)
+        await self.index.upsert([
+            {"id": id, "values": vector, "metadata": metadata if self.chunk_store else {**metadata, self.text_key: text}}
+            for id, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+        ], namespace=kwargs.get("namespace", self.namespace))
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        _check_no_running_loop("aadd_texts")
+        return asyncio.run(self.aadd_texts(texts, metadatas, **kwargs))
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        vector = await self._embedding.aembed_query(query)
+        matches = await self.index.query(
+            vector=vector,
+            filter=filter,
+            top_k=k,
+            namespace=kwargs.get("namespace", self.namespace),
+            include_metadata=True
+        )
+        missing = [match["id"] for match in matches if self.text_key not in (match.get("metadata") or {})]
+        texts = await self.chunk_store.get_many(missing) if missing and self.chunk_store else {}
+        results = []
+        for match in matches:
+            metadata = dict(match.get("metadata") or {})
+            text = metadata.pop(self.text_key, None)
+            if text is None:
+                text = texts.get(match["id"], "")
+            results.append((Document(page_content=text, metadata=metadata), match["score"]))
+        return results
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k=k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        # VectorIndex is async-only; sync callers outside an event loop run it to completion
+        _check_no_running_loop("asimilarity_search_with_score")
+        return asyncio.run(self.asimilarity_search_with_score(query, k=k, **kwargs))
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        store = cls(NumpyVectorIndex(), embedding)
+        store.add_texts(texts, metadatas)
+        return store
+
+_shared_index: Optional[VectorIndex] = None
+_shared_index_lock = threading.Lock()
+
+def get_vector_index() -> VectorIndex:
+    """
+    The process-wide vector index. Services share it, so Pinecone calls reuse
+    one connection pool and local indexes have a single in-memory copy.
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = create_vector_index()
+        return _shared_index
+
+def create_vector_index() -> VectorIndex:
+    """Create the vector index selected by ``VECTOR_STORE_BACKEND``"""
+    backend = settings.VECTOR_STORE_BACKEND.lower()
+    if backend == "numpy":
+        logger.info(f"Using local vector index at {settings.LOCAL_VECTOR_INDEX_PATH}")
+        return NumpyVectorIndex(settings.LOCAL_VECTOR_INDEX_PATH)
+    if backend == "ivf":
+        from app.services.ivf_index import IVFVectorIndex
+
+        logger.info(f"Using local IVF vector index at {settings.LOCAL_VECTOR_INDEX_PATH}")
+        return IVFVectorIndex(settings.LOCAL_VECTOR_INDEX_PATH)
+    if backend != "pinecone":
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {settings.VECTOR_STORE_BACKEND}")
+
+    from pinecone import Pinecone, ServerlessSpec
+    from app.services.embeddings import embedding_dimension
+
+    if not settings.PINECONE_API_KEY:
+        raise ValueError("PINECONE_API_KEY not found in environment variables")
+    pc = Pinecone(api_key=settings.PINECONE_API_KEY, environment=settings.PINECONE_ENV)
+    if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():
+        pc.create_index(
+            name=settings.PINECONE_INDEX_NAME,
+            dimension=embedding_dimension(),
+            metric="cosine",
+            spec=ServerlessSpec(
+                cloud="aws",
+                region="us-west-2"
+            )
+        )
+    # One HTTP connection per pool thread
+    return PineconeVectorIndex(pc.Index(
+        settings.PINECONE_INDEX_NAME,
+        pool_threads=settings.VECTOR_IO_MAX_CONCURRENCY,
+        connection_pool_maxsize=settings.VECTOR_IO_MAX_CONCURRENCY
+    ))
@@ -0,0 +1,51 @@
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.core.config import settings
+import asyncio
+import threading
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def vector_io_executor() -> ThreadPoolExecutor:
+    """
+    Bounded thread pool shared by every blocking vector index call, so slow
+    calls queue here instead of blocking the event loop or taking over the
+    default executor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.VECTOR_IO_MAX_CONCURRENCY,
+                thread_name_prefix="vector-io"
+            )
+        return _executor
+
+def shutdown_vector_io():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+async def run_vector_io(
+    fn: Callable,
+    *args,
+    timeout: Optional[float] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    **kwargs
+):
+    """
+    Run a blocking vector call in the bounded pool.
+
+    ``timeout`` covers the time queued for a thread as well as the call; a
+    call still queued when it expires never runs. One that already started
+    finishes in its thread, but the caller gets a ``TimeoutError``.
+    """
+    future = asyncio.get_running_loop().run_in_executor(executor or vector_io_executor(), partial(fn, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{getattr(fn, '__name__', 'Vector call')} timed out after {timeout}s") from None
@@ -1,12 +1,108 @@
-from typing import List, Dict, Optional
-from langchain_community.embeddings import OpenAIEmbeddings
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Dict, Optional
 from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.chunk_store import chunk_store
+from app.services.embeddings import create_embeddings
+from app.services.vector_index import VectorIndex, get_vector_index
 import asyncio
+import hashlib
 import logging
 import traceback
 
+if TYPE_CHECKING:
+    from app.services.lexical_index import LexicalIndex
+
 logger = logging.getLogger(__name__)
 
+def vector_id(document_id: str, chunk_index: int) -> str:
+    """Deterministic ID of a document chunk's vector"""
+    return f"{document_id}#{chunk_index}"
+
+def chunk_vector_id(text: str, metadata: Dict, default_index: int) -> str:
+    """
+    Vector ID for a chunk: ``{document_id}#{chunk_index}`` when the chunk
+    belongs to a document, otherwise the SHA-256 of its text. Either way,
+    re-ingesting the same content overwrites the same vectors.
+    """
+    document_id = metadata.get("document_id")
+    if document_id:
+        return vector_id(document_id, metadata.get("chunk_index", default_index))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def tenant_namespace(user_id: Optional[str]) -> str:
+    """
+    Namespace holding a user's chunks: ``user-{user_id}`` with per-user
+    namespaces, otherwise the shared ``""`` namespace (also used for
+    documents without an owner).
+    """
+    if not user_id or settings.VECTOR_NAMESPACE_MODE.lower() != "user":
+        return ""
+    return f"user-{user_id}"
+
+def document_namespace(namespace: str) -> str:
+    """Namespace holding the document-level vectors of a chunk namespace"""
+    return f"{namespace}{settings.DOCUMENT_INDEX_NAMESPACE}"
+
+async def migrate_to_tenant_namespaces(
+    index: VectorIndex,
+    lexical_index: Optional["LexicalIndex"] = None,
+    batch_size: int = 100,
+    concurrency: Optional[int] = None,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Move vectors from the shared namespaces into per-user namespaces, using
+    each vector's ``user_id`` metadata. Vectors are copied before they are
+    deleted, so an interrupted run can simply be repeated. Returns the number
+    of vectors moved (or to be moved, with ``dry_run``) per target namespace.
+    Chunks in ``lexical_index`` follow their vectors.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.VECTOR_DELETE_CONCURRENCY)
+    moved: Dict[str, int] = {}
+
+    async def move_batch(source: str, ids: List[str], target_of: Callable[[str], str]):
+        async with semaphore:
+            targets: Dict[str, List[Dict]] = {}
+            for record in await index.fetch(ids, namespace=source):
+                target = target_of(tenant_namespace(record["metadata"].get("user_id")))
+                if target != source:
+                    targets.setdefault(target, []).append(record)
+            for target, records in targets.items():
+                moved[target] = moved.get(target, 0) + len(records)
+                if not dry_run:
+                    await index.upsert(records, namespace=target)
+                    if lexical_index is not None and source == "":
+                        await asyncio.to_thread(lexical_index.move, [record["id"] for record in records], target)
+                    await index.delete([record["id"] for record in records], namespace=source)
+
+    for source, target_of in (("", lambda namespace: namespace), (document_namespace(""), document_namespace)):
+        ids = await index.list_ids(prefix="", namespace=source)
+        await asyncio.gather(*(
+            move_batch(source, ids[start:start + batch_size], target_of)
+            for start in range(0, len(ids), batch_size)
+        ))
+    return moved
+
+async def delete_in_batches(
+    delete: Callable[[List[str]], Awaitable],
+    vector_ids: List[str],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> int:
+    """Run ``delete`` over size-limited batches of IDs, a bounded number at once"""
+    batch_size = batch_size or settings.VECTOR_DELETE_BATCH_SIZE
+    semaphore = asyncio.Semaphore(concurrency or settings.VECTOR_DELETE_CONCURRENCY)
+
+    async def delete_batch(batch: List[str]):
+        async with semaphore:
+            await delete(batch)
+
+    await asyncio.gather(*(
+        delete_batch(vector_ids[start:start + batch_size])
+        for start in range(0, len(vector_ids), batch_size)
+    ))
+    return len(vector_ids)
+
 class VectorStoreService:
     def __init__(self):
         self.embeddings = None
@@ -15,9 +111,9 @@ class VectorStoreService:
     async def initialize(self):
         """Initialize vector store connections"""
         if not self.embeddings:
-            self.embeddings = OpenAIEmbeddings(
-                openai_api_key=settings.OPENAI_API_KEY
-            )
+            self.embeddings = create_embeddings()
+        if not self.index:
+            self.index = get_vector_index()
 
     async def create_embeddings(self, texts: List[str], metadata_list: List[Dict]) -> List[Dict]:
         """Create embeddings for multiple texts"""
@@ -25,15 +121,14 @@ class VectorStoreService:
             await self.initialize()
 
         try:
-            # Create embeddings in parallel
-            embedding_tasks = [self.embeddings.aembed_query(text) for text in texts]
-            embeddings = await asyncio.gather(*embedding_tasks)
+            # Create embeddings in token-budgeted batches
+            embeddings = await EmbeddingBatcher(self.embeddings).embed(texts)
 
             # Create vector records
             vectors = []
             for i, embedding in enumerate(embeddings):
                 vectors.append({
-                    "id": f"vec_{i}",
+                    "id": chunk_vector_id(texts[i], metadata_list[i], i),
                     "values": embedding,
                     "metadata": metadata_list[i]
                 })
@@ -52,8 +147,29 @@ class VectorStoreService:
             logger.error(f"Vector upsert error: {e}")
             return False
 
-    async def search(self, query: str, filter: dict = None, top_k: int = 3):
-        """Search for similar vectors with enhanced error handling"""
+    async def delete_vectors(self, vector_ids: List[str], namespace: Optional[str] = None) -> bool:
+        """Delete vectors, and their stored chunk text, by ID in parallel batches"""
+        async def delete_batch(batch: List[str]):
+            await self.index.delete(ids=batch, namespace=namespace)
+            if settings.CHUNK_STORE_ENABLED:
+                await chunk_store.delete(batch)
+
+        try:
+            if not self.index:
+                await self.initialize()
+            await delete_in_batches(delete_batch, vector_ids)
+            return True
+        except Exception as e:
+            logger.error(f"Vector delete error: {e}")
+            return False
+
+    async def search(self, query: str, filter: dict = None, top_k: int = 3, namespace: Optional[str] = None):
+        """
+        Search for similar vectors with enhanced error handling.
+
+        A ``user_id`` filter also selects that user's namespace, so only
+        their vectors are scored.
+        """
         try:
             # If no index is set (like in tests), use a mock implementation
             if not self.index:
@@ -75,13 +191,23 @@ class VectorStoreService:
 
             # If an index is set, use its search method
             query_embedding = await self.embeddings.aembed_query(query)
+            if namespace is None:
+                namespace = tenant_namespace((filter or {}).get("user_id"))
             results = await self.index.query(
                 vector=query_embedding,
                 filter=filter or {},
                 top_k=top_k,
+                namespace=namespace,
                 include_metadata=True
             )
             
+            # Fetch the text of matches indexed without it in one $in query
+            missing = [result["id"] for result in results if "text" not in (result.get("metadata") or {})]
+            texts = await chunk_store.get_many(missing) if missing and settings.CHUNK_STORE_ENABLED else {}
+            for result in results:
+                if result["id"] in texts:
+                    result["metadata"] = {**(result.get("metadata") or {}), "text": texts[result["id"]]}
+            
             # Normalize metadata to ensure required keys exist
             normalized_results = []
             for result in results:
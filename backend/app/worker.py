@@ -0,0 +1,50 @@
+"""
+Standalone ingestion worker.
+
+Run with ``python -m app.worker`` to process ingestion jobs outside the API
+process. Start as many workers as needed; they share the MongoDB job queue.
+Workers need a vector index other processes can reach (Pinecone): the local
+``numpy`` and ``ivf`` backends belong to the process that loaded them.
+"""
+import asyncio
+import logging
+import signal
+from app.core.background import background_task_manager
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.mongodb import db
+from app.services.pdf_extractor import pdf_extractor
+from app.services.embedding_cache import embedding_cache
+
+logger = logging.getLogger(__name__)
+
+async def run_worker():
+    setup_logging()
+    if settings.VECTOR_STORE_BACKEND.lower() in ("numpy", "ivf"):
+        # Another process writing the same files would corrupt them, and the
+        # API would not see this worker's vectors until it restarts
+        logger.error(f"VECTOR_STORE_BACKEND={settings.VECTOR_STORE_BACKEND} keeps the index in the API process; "
+                     "run ingestion there (RUN_INGESTION_WORKER=true) instead of in a separate worker.")
+        raise SystemExit(1)
+    if settings.HYBRID_SEARCH_ENABLED:
+        logger.warning("HYBRID_SEARCH_ENABLED is set, but the BM25 index is per process: chunks this worker "
+                       "ingests only reach the API's keyword search after it restarts. Run ingestion in the "
+                       "API process (RUN_INGESTION_WORKER=true) when hybrid search is on.")
+    await db.connect_to_database()
+    await background_task_manager.ensure_indexes()
+    await background_task_manager.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    logger.info("Stopping ingestion worker")
+    await background_task_manager.stop()
+    pdf_extractor.shutdown()
+    embedding_cache.close()
+    await db.close_database_connection()
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.ivf_index import IVFVectorIndex
+from app.services.vector_index import NumpyVectorIndex
+
+def synthetic(count: int, dimension: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered float32 vectors, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    values = centers[rng.integers(0, clusters, count)]
+    values += 0.5 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return values
+
+async def build(index, values: np.ndarray, batch: int = 2000) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(values), batch):
+        await index.upsert([
+            {"id": str(i), "values": values[i], "metadata": {"document_id": f"doc{i % 100}"}}
+            for i in range(start, min(start + batch, len(values)))
+        ])
+    return time.perf_counter() - started
+
+async def search(index, queries: np.ndarray, top_k: int):
+    started = time.perf_counter()
+    results = [
+        [match["id"] for match in await index.query(query, top_k=top_k, include_metadata=False)]
+        for query in queries
+    ]
+    return results, len(queries) / (time.perf_counter() - started)
+
+def recall(results, truth) -> float:
+    return float(np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]))
+
+async def run(args):
+    values = synthetic(args.vectors, args.dimension, args.clusters)
+    queries = synthetic(args.queries, args.dimension, args.clusters, seed=1)
+    print(f"{args.vectors} x {args.dimension}-d vectors, {args.queries} queries, recall@{args.top_k}\n")
+
+    exact = NumpyVectorIndex()
+    build_time = await build(exact, values)
+    truth, qps = await search(exact, queries, args.top_k)
+    vector_bytes = args.vectors * args.dimension * 4
+    print(f"{'exact':>12}: build {build_time:6.2f}s  {qps:8.1f} QPS  recall 1.000  "
+          f"memory {vector_bytes / 2**20:7.1f} MB")
+    del exact
+
+    ivf = IVFVectorIndex(nlist=args.nlist, nprobe=args.nprobe[0], train_min_vectors=min(args.vectors, 20000))
+    build_time = await build(ivf, values)
+    await ivf.wait_for_compaction()
+    stats = (await ivf.describe_index_stats())["namespaces"][""]
+    memory = sum(stats["memory_bytes"].values())
+    for nprobe in args.nprobe:
+        ivf._segment("").nprobe = nprobe
+        results, qps = await search(ivf, queries, args.top_k)
+        print(f"{f'ivf/{nprobe}':>12}: build {build_time:6.2f}s  {qps:8.1f} QPS  "
+              f"recall {recall(results, truth):.3f}  memory {memory / 2**20:7.1f} MB  "
+              f"({stats['nlist']} lists)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF index against exact search")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=500, help="Topics in the synthetic data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
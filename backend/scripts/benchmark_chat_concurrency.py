@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from openai import AsyncOpenAI, OpenAI
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+sys.path.append(str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.models.chat import ChatSession
+from app.services import openai_client
+from app.services.chat import ChatService
+from fake_openai_server import FakeOpenAIServer
+
+def request(i: int):
+    return {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": f"question {i}"}], "max_tokens": 500}
+
+async def rounds(chat, chats: int, count: int):
+    latencies = []
+    for _ in range(count):
+        latencies.extend(await asyncio.gather(*(chat(i) for i in range(chats))))
+    return latencies
+
+async def blocking_client(server, chats: int, count: int):
+    """The previous ChatService path: a sync client called inside async code"""
+    client = OpenAI(api_key="fake", base_url=server.base_url)
+
+    async def chat(i: int):
+        started = time.perf_counter()
+        client.chat.completions.create(**request(i))
+        return time.perf_counter() - started
+
+    return await rounds(chat, chats, count)
+
+async def client_per_call(server, chats: int, count: int):
+    """An async client per call: concurrent, but every call opens a new connection"""
+    async def chat(i: int):
+        started = time.perf_counter()
+        async with AsyncOpenAI(api_key="fake", base_url=server.base_url) as client:
+            await client.chat.completions.create(**request(i))
+        return time.perf_counter() - started
+
+    return await rounds(chat, chats, count)
+
+async def shared_pool(server, chats: int, count: int):
+    """ChatService streaming on the shared AsyncOpenAI client and keep-alive pool"""
+    service = ChatService()
+    session = ChatSession(id="bench", user_id="bench", created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+
+    async def chat(i: int):
+        started = time.perf_counter()
+        async for _ in service.stream_reply(session, f"question {i}"):
+            pass
+        return time.perf_counter() - started
+
+    try:
+        return await rounds(chat, chats, count)
+    finally:
+        await openai_client.close_openai_clients()
+
+def run(args):
+    server = FakeOpenAIServer(latency=args.latency, per_item_latency=0.001, max_concurrent=args.chats * 2).start()
+    settings.OPENAI_BASE_URL = server.base_url
+    settings.OPENAI_API_KEY = "fake"
+    print(f"{args.chats} concurrent chats, {args.rounds} rounds, {args.latency * 1000:.0f}ms per completion\n")
+    print(f"{'client':>16}  {'wall s':>7}  {'chats/s':>8}  {'p50 s':>6}  {'peak in flight':>14}  {'connections':>11}")
+    try:
+        for name, fn in (("blocking sync", blocking_client), ("client per call", client_per_call), ("shared pool", shared_pool)):
+            server.reset_counters()
+            started = time.perf_counter()
+            latencies = asyncio.run(fn(server, args.chats, args.rounds))
+            wall = time.perf_counter() - started
+            total = args.chats * args.rounds
+            print(f"{name:>16}  {wall:7.2f}  {total / wall:8.1f}  {statistics.median(latencies):6.2f}  "
+                  f"{server.peak_in_flight:14d}  {server.connections:11d}")
+    finally:
+        server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test concurrent chats against a fake OpenAI server")
+    parser.add_argument("--chats", type=int, default=32, help="Chats in flight at once")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per completion")
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
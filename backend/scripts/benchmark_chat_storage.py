@@ -0,0 +1,94 @@
+import argparse
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+import bson
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.core.config import settings
+from app.models.chat import ChatSession, Message, MessageRole
+from app.services.chat import ChatService
+
+WORDS = "the policy allows refunds within thirty days of purchase when a receipt is provided".split()
+
+def text(rng: random.Random, length: int) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)
+
+def turn(rng: random.Random, args):
+    return [
+        Message(role=MessageRole.USER, content=text(rng, args.question_chars)),
+        Message(role=MessageRole.ASSISTANT, content=text(rng, args.answer_chars))
+    ]
+
+def embedded_write_bytes(session: ChatSession) -> int:
+    """The previous ``save_session``: ``$set`` of the whole session, messages included"""
+    return len(bson.encode({"q": {"id": session.id}, "u": {"$set": session.dict()}}))
+
+def append_write_bytes(session: ChatSession, messages) -> int:
+    """``append_messages``: a small session update plus an insert of the new messages"""
+    update = {
+        "$inc": {"message_count": len(messages)},
+        "$set": {
+            "title": session.title,
+            "summary": session.summary,
+            "summarized_count": session.summarized_count,
+            "updated_at": session.updated_at
+        }
+    }
+    inserted = [{**message.dict(), "session_id": session.id} for message in messages]
+    return len(bson.encode({"q": {"id": session.id}, "u": update})) + sum(len(bson.encode(doc)) for doc in inserted)
+
+def append_read_bytes(session: ChatSession) -> int:
+    """``get_session``: the session document plus its unsummarized messages"""
+    tail = session.unsummarized()[-settings.CHAT_SESSION_LOAD_MAX_MESSAGES:]
+    return len(bson.encode(ChatService.session_document(session))) + sum(
+        len(bson.encode(message.dict())) for message in tail
+    )
+
+def run(args):
+    keep = settings.CHAT_HISTORY_KEEP_TURNS * 2
+    batch = settings.CHAT_HISTORY_SUMMARY_BATCH_TURNS * 2
+    print(f"{args.question_chars}-char questions, {args.answer_chars}-char answers; "
+          f"summary folds {batch} messages once {keep + batch} are unsummarized\n")
+    print(f"{'turns':>5}  {'embedded written':>16}  {'append written':>14}  {'ratio':>6}  "
+          f"{'last turn embedded':>18}  {'last turn append':>16}  {'read embedded':>13}  {'read append':>11}")
+    for turns in args.turns:
+        rng = random.Random(0)
+        now = datetime.utcnow()
+        session = ChatSession(id="bench-session", user_id="bench-user", created_at=now, updated_at=now)
+        embedded = append = last_embedded = last_append = 0
+        for _ in range(turns):
+            pending = session.unsummarized()
+            if len(pending) >= keep + batch:
+                session.summary = text(rng, settings.CHAT_SUMMARY_MAX_TOKENS * 4)
+                session.mark_summarized(pending[:len(pending) - keep])
+            messages = turn(rng, args)
+            for i, message in enumerate(messages):
+                message.seq = len(session.messages) + i
+            session.messages.extend(messages)
+            last_embedded = embedded_write_bytes(session)
+            last_append = append_write_bytes(session, messages)
+            embedded += last_embedded
+            append += last_append
+        read_embedded = len(bson.encode(session.dict()))
+        print(f"{turns:>5}  {embedded / 1e6:14.2f}MB  {append / 1e6:12.2f}MB  {embedded / append:5.0f}x  "
+              f"{last_embedded / 1e3:16.1f}KB  {last_append / 1e3:14.1f}KB  "
+              f"{read_embedded / 1e3:11.1f}KB  {append_read_bytes(session) / 1e3:9.1f}KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes written and read per chat turn with embedded vs append-only messages")
+    parser.add_argument("--turns", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--question-chars", type=int, default=200)
+    parser.add_argument("--answer-chars", type=int, default=1200)
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
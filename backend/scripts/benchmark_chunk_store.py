@@ -0,0 +1,92 @@
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+import bson
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.config import settings
+from app.services.chunk_store import ChunkStore
+
+def load_corpus(paths):
+    """Text of the given PDFs or text files, or of the bundled documents directory"""
+    from pypdf import PdfReader
+
+    paths = [Path(p) for p in paths] or sorted(Path(settings.DOCUMENTS_DIR).glob("*.pdf"))
+    texts = []
+    for path in paths:
+        if path.suffix.lower() == ".pdf":
+            texts.append("\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages))
+        else:
+            texts.append(path.read_text(encoding="utf-8"))
+    return texts
+
+def chunk_metadata(document_id: str, i: int, text: str, slim: bool):
+    metadata = {
+        "title": "Policies and Guidance - Gifts.pdf",
+        "file_path": f"uploads/{document_id}.pdf",
+        "chunk_id": f"{document_id}_chunk_{i}",
+        "chunk_index": i,
+        "document_id": document_id
+    }
+    if not slim:
+        # Layout before the chunk store: a preview plus the full text
+        metadata["source"] = text[:200] + "..."
+        metadata["text"] = text
+    return metadata
+
+def query_response_bytes(matches):
+    """Size of a Pinecone query response carrying these matches' metadata"""
+    return len(json.dumps({"matches": [
+        {"id": id, "score": 0.8731, "values": [], "metadata": metadata} for id, metadata in matches
+    ], "namespace": ""}).encode("utf-8"))
+
+def chunk_fetch_bytes(store: ChunkStore, ids, texts):
+    """Size of the documents returned by the chunk store's ``$in`` query"""
+    return sum(len(bson.encode({"_id": id, **store.encode(text)})) for id, text in zip(ids, texts))
+
+def run(args):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = []
+    for d, text in enumerate(load_corpus(args.files)):
+        document_id = f"{d:024x}"
+        chunks.extend((f"{document_id}#{i}", document_id, i, chunk) for i, chunk in enumerate(splitter.split_text(text)))
+    print(f"{len(chunks)} chunks, {sum(len(c[3]) for c in chunks) / len(chunks):.0f} characters on average\n")
+
+    rng = random.Random(0)
+    plain, zstd = ChunkStore(compression=""), ChunkStore(compression="zstd")
+    print(f"{'top_k':>5}  {'before':>8}  {'after: vectors':>14}  {'+ chunks':>8}  {'+ zstd chunks':>13}")
+    for top_k in args.top_k:
+        totals = [0, 0, 0, 0]
+        for _ in range(args.queries):
+            picked = rng.sample(chunks, min(top_k, len(chunks)))
+            ids, texts = [c[0] for c in picked], [c[3] for c in picked]
+            totals[0] += query_response_bytes([(c[0], chunk_metadata(c[1], c[2], c[3], slim=False)) for c in picked])
+            slim = query_response_bytes([(c[0], chunk_metadata(c[1], c[2], c[3], slim=True)) for c in picked])
+            totals[1] += slim
+            totals[2] += slim + chunk_fetch_bytes(plain, ids, texts)
+            totals[3] += slim + chunk_fetch_bytes(zstd, ids, texts)
+        before, vectors, with_chunks, with_zstd = (total / args.queries for total in totals)
+        print(f"{top_k:>5}  {before:8.0f}  {vectors:14.0f}  {with_chunks:8.0f}  {with_zstd:13.0f}")
+
+    stored = [len(json.dumps(chunk_metadata(c[1], c[2], c[3], slim))) for c in chunks for slim in (False, True)]
+    print(f"\nMetadata stored per vector: {sum(stored[::2]) / len(chunks):.0f} B before, "
+          f"{sum(stored[1::2]) / len(chunks):.0f} B after")
+    zstd_ratio = sum(len(bson.encode(zstd.encode(c[3]))) for c in chunks) / sum(len(bson.encode(plain.encode(c[3]))) for c in chunks)
+    print(f"zstd chunk documents are {zstd_ratio:.0%} of plain ones")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes per query with and without the chunk store")
+    parser.add_argument("files", nargs="*", help="PDF or text files (defaults to the documents directory)")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 10])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
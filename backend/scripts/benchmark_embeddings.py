@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from langchain_openai import OpenAIEmbeddings
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+sys.path.append(str(Path(__file__).parent))
+
+from app.services.embedding_batcher import EmbeddingBatcher
+from fake_openai_server import FakeOpenAIServer
+
+def make_chunks(count: int):
+    return [
+        f"Chunk {i}: policy clause {i % 97} covers gifts, hospitality and conflicts of interest. " * 10
+        for i in range(count)
+    ]
+
+async def per_chunk(embeddings, texts):
+    """The previous path: one aembed_query per chunk, all at once"""
+    return await asyncio.gather(*[embeddings.aembed_query(text) for text in texts])
+
+async def batched(embeddings, texts):
+    return await EmbeddingBatcher(embeddings).embed(texts)
+
+async def run(name, fn, embeddings, texts, server):
+    server.reset_counters()
+    started = time.perf_counter()
+    try:
+        vectors = await fn(embeddings, texts)
+        status = f"{len(vectors)} vectors"
+    except Exception as e:
+        status = f"FAILED ({type(e).__name__})"
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>10}: {elapsed:7.2f}s  {len(texts) / elapsed:8.1f} chunks/sec  "
+        f"{server.requests:5d} requests  {server.rate_limited:5d} rate limited  {status}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-chunk vs batched embedding")
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request")
+    parser.add_argument("--max-concurrent", type=int, default=16, help="Server-side rate limit")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency, max_concurrent=args.max_concurrent).start()
+    embeddings = OpenAIEmbeddings(
+        openai_api_key="fake",
+        openai_api_base=server.base_url,
+        max_retries=6
+    )
+    texts = make_chunks(args.chunks)
+    print(f"Embedding {args.chunks} chunks against a fake server "
+          f"({args.latency * 1000:.0f}ms/request, {args.max_concurrent} concurrent max)\n")
+
+    try:
+        asyncio.run(run("per-chunk", per_chunk, embeddings, texts, server))
+        asyncio.run(run("batched", batched, embeddings, texts, server))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
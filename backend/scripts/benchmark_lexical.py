@@ -0,0 +1,83 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.lexical_index import LexicalIndex
+
+def synthetic_chunks(count: int, vocabulary: int, words: int, seed: int = 0):
+    """Chunks of Zipf-distributed words, with a unique part number in every tenth chunk"""
+    rng = np.random.default_rng(seed)
+    terms = [f"w{i}" for i in range(vocabulary)]
+    draws = np.minimum(rng.zipf(1.2, (count, words)) - 1, vocabulary - 1)
+    texts = []
+    for i, row in enumerate(draws):
+        text = " ".join(terms[j] for j in row)
+        if i % 10 == 0:
+            text += f" part PN-{i:07d}"
+        texts.append(text)
+    return texts
+
+def sample_queries(count: int, vocabulary: int, chunks: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in range(count):
+        if i % 4 == 0:
+            queries.append(f"where is PN-{int(rng.integers(0, chunks // 10)) * 10:07d}")
+        else:
+            ranks = np.minimum(rng.zipf(1.2, 4) - 1, vocabulary - 1)
+            queries.append(" ".join(f"w{j}" for j in ranks))
+    return queries
+
+def run(args):
+    print(f"{'chunks':>8}  {'index s':>8}  {'p50 ms':>7}  {'p95 ms':>7}  {'QPS':>7}  {'PN hit@1':>8}")
+    for count in args.chunks:
+        texts = synthetic_chunks(count, args.vocabulary, args.words)
+        index = LexicalIndex()
+        started = time.perf_counter()
+        for start in range(0, count, 100):
+            batch = range(start, min(start + 100, count))
+            index.add(
+                [f"doc{i // 50}#{i % 50}" for i in batch],
+                [texts[i] for i in batch],
+                [{"document_id": f"doc{i // 50}"} for i in batch]
+            )
+        indexing = time.perf_counter() - started
+
+        queries = sample_queries(args.queries, args.vocabulary, count)
+        # The first query using a term merges its pending postings; time the steady state
+        for query in queries:
+            index.search(query, top_k=args.top_k)
+        timings, hits, lookups = [], 0, 0
+        for query in queries:
+            started = time.perf_counter()
+            results = index.search(query, top_k=args.top_k)
+            timings.append(time.perf_counter() - started)
+            if "PN-" in query:
+                lookups += 1
+                part = query.split("PN-")[1]
+                hits += bool(results) and f"PN-{part}" in results[0][2]
+        timings.sort()
+        p50 = statistics.median(timings) * 1000
+        p95 = timings[int(len(timings) * 0.95)] * 1000
+        print(f"{count:>8}  {indexing:8.2f}  {p50:7.2f}  {p95:7.2f}  {len(timings) / sum(timings):7.0f}  "
+              f"{hits / max(lookups, 1):8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 query latency as the number of chunks grows")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=150, help="Words per chunk")
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
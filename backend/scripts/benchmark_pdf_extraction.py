@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+import PyPDF2
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.core.config import settings
+from app.services.pdf_extractor import PDFExtractor
+
+def build_test_pdf(source_path: str, pages: int) -> str:
+    """Repeat the pages of a source PDF until the target page count is reached"""
+    source = PyPDF2.PdfReader(source_path)
+    writer = PyPDF2.PdfWriter()
+    for i in range(pages):
+        writer.add_page(source.pages[i % len(source.pages)])
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        writer.write(f)
+    return path
+
+def extract_sequential(file_path: str) -> int:
+    """The previous single-threaded extraction path"""
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        text_content = "\n".join(
+            page.extract_text() for page in pdf_reader.pages
+        )
+    return len(text_content)
+
+async def benchmark(file_path: str, pages: int, worker_counts):
+    started = time.perf_counter()
+    extract_sequential(file_path)
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential':>12}: {elapsed:7.2f}s  {pages / elapsed:8.1f} pages/sec")
+
+    for workers in worker_counts:
+        extractor = PDFExtractor(max_workers=workers)
+        # Warm up the pool so process start-up is not counted
+        await extractor.extract_pages(file_path)
+
+        started = time.perf_counter()
+        extracted = await extractor.extract_pages(file_path)
+        elapsed = time.perf_counter() - started
+        extractor.shutdown()
+
+        assert len(extracted) == pages
+        print(f"{workers:>4} workers: {elapsed:7.2f}s  {pages / elapsed:8.1f} pages/sec")
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    default_pdf = next(iter(sorted(settings.DOCUMENTS_DIR.glob("*.pdf"))), None)
+
+    parser = argparse.ArgumentParser(description="Benchmark page-parallel PDF extraction")
+    parser.add_argument("--pdf", default=str(default_pdf) if default_pdf else None,
+                        help="Source PDF whose pages are repeated")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1))))
+    args = parser.parse_args()
+
+    if not args.pdf:
+        parser.error("no source PDF found, pass --pdf")
+
+    test_pdf = build_test_pdf(args.pdf, args.pages)
+    print(f"Extracting {args.pages} pages from {args.pdf} on {cpu_count} cores\n")
+    try:
+        asyncio.run(benchmark(test_pdf, args.pages, args.workers))
+    finally:
+        os.remove(test_pdf)
+
+if __name__ == "__main__":
+    main()
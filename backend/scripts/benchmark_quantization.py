@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.vector_index import NumpyVectorIndex
+
+def synthetic_embeddings(count: int, dimension: int, latent: int, topics: int, seed: int = 0) -> np.ndarray:
+    """
+    Embedding-like vectors: clustered topics in a low-rank latent space with a
+    decaying spectrum, mixed into ``dimension`` outputs plus a little noise.
+    """
+    rng = np.random.default_rng(seed)
+    mixing = np.random.default_rng(42).standard_normal((latent, dimension)).astype(np.float32)
+    spectrum = (1.0 / np.sqrt(np.arange(1, latent + 1))).astype(np.float32)
+    centers = np.random.default_rng(7).standard_normal((topics, latent)).astype(np.float32)
+    points = centers[rng.integers(0, topics, count)] + 0.6 * rng.standard_normal((count, latent)).astype(np.float32)
+    values = (points * spectrum) @ mixing
+    values += 0.05 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return values / np.linalg.norm(values, axis=1, keepdims=True)
+
+def pca_projection(values: np.ndarray, dimension: int) -> np.ndarray:
+    """Top principal directions, standing in for the API's ``dimensions`` parameter"""
+    sample = values[:min(len(values), 20000)]
+    _, _, vt = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+    return vt[:dimension].T.astype(np.float32)
+
+async def evaluate(values, queries, truth, top_k, quantization):
+    index = NumpyVectorIndex(quantization=quantization)
+    for start in range(0, len(values), 5000):
+        await index.upsert([
+            {"id": str(i), "values": values[i], "metadata": {}}
+            for i in range(start, min(start + 5000, len(values)))
+        ])
+    started = time.perf_counter()
+    results = [
+        [int(match["id"]) for match in await index.query(query, top_k=top_k, include_metadata=False)]
+        for query in queries
+    ]
+    qps = len(queries) / (time.perf_counter() - started)
+    recall = float(np.mean([len(set(r) & t) / top_k for r, t in zip(results, truth)]))
+    memory = (await index.describe_index_stats())["namespaces"][""]["memory_bytes"]
+    return recall, qps, memory
+
+async def run(args):
+    values = synthetic_embeddings(args.vectors, 1536, args.latent, args.topics)
+    queries = synthetic_embeddings(args.queries, 1536, args.latent, args.topics, seed=1)
+    scores = queries @ values.T
+    truth = [set(np.argsort(-row)[:args.top_k].tolist()) for row in scores]
+    del scores
+
+    print(f"{args.vectors} synthetic chunks, {args.queries} queries, recall@{args.top_k} "
+          f"against exact 1536-d float32\n")
+    print(f"{'setup':>20}  {'RAM/vector':>10}  {'RAM per 1M':>10}  {'disk per 1M':>11}  {'recall':>6}  {'QPS':>7}")
+    for dimension in args.dimensions:
+        if dimension == 1536:
+            data, query_data = values, queries
+        else:
+            projection = pca_projection(values, dimension)
+            data, query_data = values @ projection, queries @ projection
+        for quantization in [None] + args.quantization:
+            recall, qps, memory = await evaluate(data, query_data, truth, args.top_k, quantization)
+            if quantization:
+                # Full-precision rows stay memory-mapped on disk for rescoring
+                resident, disk = memory["quantized"], memory["vectors"]
+            else:
+                resident, disk = memory["vectors"], memory["vectors"]
+            per_vector = resident / len(data)
+            name = f"{dimension}-d {quantization or 'float32'}"
+            print(f"{name:>20}  {per_vector:8.0f} B  {per_vector * 1e6 / 2**30:7.2f} GB  "
+                  f"{disk / len(data) * 1e6 / 2**30:8.2f} GB  {recall:6.3f}  {qps:7.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reduced-dimension and quantized vectors")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--latent", type=int, default=1024, help="Intrinsic dimension of the synthetic data")
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1536, 512, 256])
+    parser.add_argument("--quantization", nargs="*", default=["float16", "int8"])
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
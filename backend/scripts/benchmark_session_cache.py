@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.core.config import settings
+from app.db.mongodb import db
+from app.services.chat import ChatService
+from app.services.session_cache import SessionCache
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def run_turns(service: ChatService, args):
+    """
+    Chat turns without the model call: load the session, then store the
+    exchange. Sessions are picked at random so several are active at once.
+    """
+    rng = random.Random(0)
+    sessions = [(await service.create_session(f"bench-user-{i}")) for i in range(args.sessions)]
+    latencies = []
+    for turn in range(args.turns):
+        session = rng.choice(sessions)
+        started = time.perf_counter()
+        loaded = await service.get_session(session.id, session.user_id)
+        await service.append_exchange(loaded, f"question {turn} " * 20, f"answer {turn} " * 120)
+        latencies.append(time.perf_counter() - started)
+        if args.think_ms:
+            await asyncio.sleep(args.think_ms / 1000)
+    return latencies
+
+async def measure(name: str, cache, args):
+    service = ChatService(cache=cache)
+    service.cache = cache  # None means no cache rather than the global one
+    if cache is not None:
+        await cache.start()
+    started = time.perf_counter()
+    latencies = await run_turns(service, args)
+    wall = time.perf_counter() - started
+    flush_started = time.perf_counter()
+    if cache is not None:
+        await cache.stop()
+    stored = await db.db.chat_messages.count_documents({})
+    await db.db.sessions.delete_many({})
+    await db.db.chat_messages.delete_many({})
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{name:>14}  {statistics.median(ms):7.2f}  {percentile(ms, 0.99):7.2f}  {max(ms):7.2f}  "
+          f"{len(ms) / wall:8.0f}  {(time.perf_counter() - flush_started) * 1000:8.1f}  {stored:7d}")
+
+async def main_async(args):
+    settings.MONGODB_DB_NAME = f"{settings.MONGODB_DB_NAME}_bench"
+    await db.connect_to_database()
+    await ChatService().ensure_indexes()
+    print(f"{args.turns} turns over {args.sessions} sessions, MongoDB at {settings.MONGODB_URL}\n")
+    print(f"{'storage':>14}  {'p50 ms':>7}  {'p99 ms':>7}  {'max ms':>7}  {'turns/s':>8}  "
+          f"{'flush ms':>8}  {'stored':>7}")
+    try:
+        await measure("no cache", None, args)
+        await measure("write-through", SessionCache(durability="write_through"), args)
+        await measure("write-behind", SessionCache(durability="write_behind", flush_interval=args.flush_interval), args)
+    finally:
+        await db.client.drop_database(settings.MONGODB_DB_NAME)
+        await db.close_database_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn chat storage latency with and without the session cache")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=20, help="Active sessions the turns are spread over")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause between turns")
+    parser.add_argument("--flush-interval", type=float, default=settings.CHAT_SESSION_FLUSH_INTERVAL_SECONDS)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+# Each phase runs in a fresh interpreter, so imports and connections are cold
+PHASES = {
+    "import": """
+import app.main
+""",
+    "sequential": """
+import app.main
+from app.services.rag_service import get_rag_service
+from app.services.embedding_batcher import get_tokenizer
+from app.services.model import model_service
+get_rag_service()
+get_tokenizer()
+model_service.initialize()
+""",
+    "warm-up": """
+import asyncio
+import app.main
+from app.core.warmup import readiness, warmup_steps
+asyncio.run(readiness.run(warmup_steps()))
+report["steps"] = readiness.report()["steps"]
+""",
+}
+
+TEMPLATE = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+report = {{}}
+started = time.perf_counter()
+{body}
+report["seconds"] = time.perf_counter() - started
+print(json.dumps(report))
+"""
+
+def run_phase(body: str, env) -> dict:
+    code = TEMPLATE.format(backend=str(backend_dir), body=body)
+    result = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(args):
+    env = dict(os.environ)
+    if args.backend:
+        env["VECTOR_STORE_BACKEND"] = args.backend
+
+    print(f"{'phase':<12}  {'median s':>8}  {'min s':>7}")
+    for name, body in PHASES.items():
+        try:
+            reports = [run_phase(body, env) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<12}  failed: {e}")
+            continue
+        seconds = [report["seconds"] for report in reports]
+        print(f"{name:<12}  {statistics.median(seconds):8.3f}  {min(seconds):7.3f}")
+        for step, outcome in reports[-1].get("steps", {}).items():
+            print(f"  {step:<16} {outcome['status']:<7} {outcome['seconds']:.3f}s {outcome.get('error', '')}")
+
+    print("\nimport: importing the app, which no longer builds services or calls the network")
+    print("sequential: import plus building each service in turn, as import used to")
+    print("warm-up: import plus the lifespan warm-up, with its steps in parallel")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import and warm-up time in fresh processes")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backend", help="Override VECTOR_STORE_BACKEND (e.g. numpy to stay offline)")
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
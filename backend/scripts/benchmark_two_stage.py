@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.rag_service import document_vector
+from app.services.vector_index import NumpyVectorIndex
+
+DOCUMENTS = "__documents__"
+
+def synthetic_corpus(documents: int, chunks: int, topics: int, dimension: int, seed: int = 0):
+    """
+    Documents that each cover a few topics. A chunk is one of its document's
+    topics plus a document-specific offset and noise, like sections of a manual.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimension)).astype(np.float32)
+    offsets = 0.5 * rng.standard_normal((documents, dimension)).astype(np.float32)
+    document_topics = rng.integers(0, topics, (documents, 3))
+    owner = np.repeat(np.arange(documents), chunks)
+    topic = document_topics[owner, rng.integers(0, 3, len(owner))]
+    values = centers[topic] + offsets[owner] + 0.7 * rng.standard_normal((len(owner), dimension)).astype(np.float32)
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    return values, owner
+
+async def build(values, owner, documents: int):
+    index = NumpyVectorIndex()
+    for start in range(0, len(values), 5000):
+        await index.upsert([
+            {"id": f"doc{owner[i]}#{i}", "values": values[i], "metadata": {"document_id": f"doc{owner[i]}"}}
+            for i in range(start, min(start + 5000, len(values)))
+        ])
+    await index.upsert([
+        {"id": f"doc{d}", "values": document_vector(values[owner == d]), "metadata": {"document_id": f"doc{d}"}}
+        for d in range(documents)
+    ], namespace=DOCUMENTS)
+    return index
+
+async def single_stage(index, query, top_k):
+    return [match["id"] for match in await index.query(query, top_k=top_k, include_metadata=False)]
+
+async def two_stage(index, query, top_k, top_documents):
+    documents = await index.query(query, top_k=top_documents, namespace=DOCUMENTS, include_metadata=False)
+    document_ids = [match["id"] for match in documents]
+    matches = await index.query(
+        query, filter={"document_id": {"$in": document_ids}}, top_k=top_k, include_metadata=False
+    )
+    return [match["id"] for match in matches]
+
+async def timed(search, queries, truth, sources):
+    started = time.perf_counter()
+    results = [await search(query) for query in queries]
+    elapsed = time.perf_counter() - started
+    recall = float(np.mean([len(set(r) & t) / len(t) for r, t in zip(results, truth)]))
+    # The chunk each query was drawn from, standing in for the passage that answers it
+    source_hit = float(np.mean([source in r for r, source in zip(results, sources)]))
+    return elapsed / len(queries) * 1000, recall, source_hit
+
+async def run(args):
+    values, owner = synthetic_corpus(args.documents, args.chunks_per_document, args.topics, args.dimension)
+    index = await build(values, owner, args.documents)
+    rng = np.random.default_rng(1)
+    picked = rng.integers(0, len(values), args.queries)
+    # Paraphrase-like queries: the source chunk plus noise of comparable norm
+    noise = rng.standard_normal((args.queries, args.dimension)).astype(np.float32) / np.sqrt(args.dimension)
+    queries = values[picked] + args.query_noise * noise
+    truth = [set(await single_stage(index, query, args.top_k)) for query in queries]
+    sources = [f"doc{owner[i]}#{i}" for i in picked]
+
+    print(f"{args.documents} documents, {len(values)} chunks, {args.dimension}-d, "
+          f"recall@{args.top_k} against single-stage exact search\n")
+    print(f"{'mode':>22}  {'ms/query':>8}  {'recall':>6}  {'source hit':>10}")
+    latency, recall, hit = await timed(lambda q: single_stage(index, q, args.top_k), queries, truth, sources)
+    print(f"{'single-stage':>22}  {latency:8.2f}  {recall:6.3f}  {hit:10.3f}")
+    for top_documents in args.top_documents:
+        latency, recall, hit = await timed(
+            lambda q: two_stage(index, q, args.top_k, top_documents), queries, truth, sources
+        )
+        print(f"{f'two-stage, top {top_documents} docs':>22}  {latency:8.2f}  {recall:6.3f}  {hit:10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-stage and document-then-chunk retrieval")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--chunks-per-document", type=int, default=50)
+    parser.add_argument("--topics", type=int, default=300)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--query-noise", type=float, default=3.0, help="Query noise norm relative to a chunk")
+    parser.add_argument("--top-documents", type=int, nargs="+", default=[5, 10, 20, 50])
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
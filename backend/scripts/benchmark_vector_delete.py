@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.rag_service import RAGService
+from app.services.retriever import IndexHandle
+from app.services.vector_index import PineconeVectorIndex
+from app.services.vector_store import vector_id
+
+class Match:
+    def __init__(self, id: str):
+        self.id = id
+
+class QueryResponse:
+    def __init__(self, matches):
+        self.matches = matches
+
+class FakePineconeIndex:
+    """Synchronous stand-in for a Pinecone index with per-call network latency"""
+
+    def __init__(self, latency: float, per_match_latency: float):
+        self.latency = latency
+        self.per_match_latency = per_match_latency
+        self.ids = set()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def query(self, vector, filter, top_k, include_metadata):
+        matches = sorted(
+            id for id in self.ids if id.startswith(f"{filter['document_id']}#")
+        )[:top_k]
+        time.sleep(self.latency + self.per_match_latency * len(matches))
+        self.calls += 1
+        return QueryResponse([Match(id) for id in matches])
+
+    def delete(self, ids, namespace=""):
+        if len(ids) > 1000:
+            raise ValueError("Pinecone accepts at most 1000 IDs per delete")
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            self.ids.difference_update(ids)
+
+    def delete_unbounded(self, ids):
+        time.sleep(self.latency)
+        self.calls += 1
+        self.ids.difference_update(ids)
+
+def old_delete(index: FakePineconeIndex, document_id: str, rebuild_cost: float):
+    """The previous path: dummy-vector query capped at 10k, one delete, chain rebuild"""
+    response = index.query(
+        vector=[0] * 1536,
+        filter={"document_id": document_id},
+        top_k=10000,
+        include_metadata=True
+    )
+    # Pinecone rejects more than 1000 IDs per delete; assume it had worked
+    index.delete_unbounded([match.id for match in response.matches])
+    time.sleep(rebuild_cost)  # Pinecone.from_existing_index + ConversationalRetrievalChain.from_llm
+
+async def new_delete(index: FakePineconeIndex, document_id: str, vector_ids):
+    rag = RAGService.__new__(RAGService)
+    rag.index = PineconeVectorIndex(index)
+    rag.index_handle = IndexHandle(None)
+    rag.lexical_index = None
+    rag.chunk_store = None
+    await rag.delete_document_vectors(document_id, vector_ids=vector_ids)
+
+def populate(index: FakePineconeIndex, document_id: str, chunks: int):
+    index.ids = {vector_id(document_id, i) for i in range(chunks)}
+    index.calls = 0
+    return sorted(index.ids)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deleting a large document's vectors")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per Pinecone call")
+    parser.add_argument("--per-match-latency", type=float, default=0.00002,
+                        help="Extra query seconds per returned match (payload size)")
+    parser.add_argument("--rebuild-cost", type=float, default=0.2,
+                        help="Seconds to rebuild the vectorstore and QA chain")
+    args = parser.parse_args()
+
+    index = FakePineconeIndex(args.latency, args.per_match_latency)
+    document_id = "6543210fedcba98765432100"
+    print(f"Deleting a {args.chunks}-chunk document ({args.latency * 1000:.0f}ms per call)\n")
+
+    populate(index, document_id, args.chunks)
+    started = time.perf_counter()
+    old_delete(index, document_id, args.rebuild_cost)
+    elapsed = time.perf_counter() - started
+    print(f"{'old':>8}: {elapsed:6.2f}s  {index.calls:3d} calls  {len(index.ids):6d} vectors left behind")
+
+    manifest = populate(index, document_id, args.chunks)
+    started = time.perf_counter()
+    asyncio.run(new_delete(index, document_id, manifest))
+    elapsed = time.perf_counter() - started
+    print(f"{'manifest':>8}: {elapsed:6.2f}s  {index.calls:3d} calls  {len(index.ids):6d} vectors left behind")
+
+if __name__ == "__main__":
+    main()
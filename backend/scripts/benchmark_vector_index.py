@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.services.vector_index import NumpyVectorIndex
+
+def make_vectors(count: int, dimension: int, documents: int, users: int):
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((count, dimension)).astype(np.float32)
+    return [
+        {
+            "id": f"doc{i % documents}#{i}",
+            "values": values[i],
+            "metadata": {"document_id": f"doc{i % documents}", "user_id": f"user{i % users}"}
+        }
+        for i in range(count)
+    ]
+
+async def measure(index, queries, top_k, filter=None):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await index.query(query, filter=filter, top_k=top_k)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+async def run(args):
+    vectors = make_vectors(args.vectors, args.dimension, args.documents, args.users)
+    queries = np.random.default_rng(1).standard_normal((args.queries, args.dimension)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as path:
+        index = NumpyVectorIndex(path)
+        started = time.perf_counter()
+        for start in range(0, len(vectors), 1000):
+            await index.upsert(vectors[start:start + 1000])
+        print(f"Indexed {args.vectors} x {args.dimension}-d vectors in {time.perf_counter() - started:.2f}s\n")
+
+        cases = [
+            ("unfiltered", None),
+            ("user_id", {"user_id": "user0"}),
+            ("document_id", {"document_id": "doc0"}),
+            ("$in (3 docs)", {"document_id": {"$in": ["doc0", "doc1", "doc2"]}})
+        ]
+        for name, filter in cases:
+            p50, p99 = await measure(index, queries, args.top_k, filter)
+            print(f"{name:>14}: p50 {p50 * 1000:7.3f}ms  p99 {p99 * 1000:7.3f}ms")
+        index.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-process NumPy vector index")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
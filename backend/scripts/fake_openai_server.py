@@ -0,0 +1,164 @@
+"""
+A local stand-in for the OpenAI HTTP API, used by the benchmark scripts.
+
+Responses are deterministic. Every request takes a fixed latency, and
+requests beyond ``max_concurrent`` in flight get a 429, as a rate limit would.
+Chat completions can be streamed; connections are kept alive (HTTP/1.1)
+and counted, so benchmarks can show whether clients reuse them.
+"""
+import hashlib
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOpenAIServer:
+    def __init__(self, latency: float = 0.05, per_item_latency: float = 0.0005,
+                 max_concurrent: int = 16, dimension: int = 1536):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.max_concurrent = max_concurrent
+        self.dimension = dimension
+        self.requests = 0
+        self.rate_limited = 0
+        self.connections = 0
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.rate_limited = 0
+            self.connections = 0
+            self.peak_in_flight = 0
+
+    def embedding(self, item) -> list:
+        seed = hashlib.sha256(json.dumps(item).encode()).digest()
+        values = struct.unpack("8f", hashlib.sha256(seed).digest())
+        return [values[i % 8] for i in range(self.dimension)]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                with server._lock:
+                    server.requests += 1
+                    if server._in_flight >= server.max_concurrent:
+                        server.rate_limited += 1
+                        limited = True
+                    else:
+                        server._in_flight += 1
+                        server.peak_in_flight = max(server.peak_in_flight, server._in_flight)
+                        limited = False
+
+                if limited:
+                    self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}})
+                    return
+
+                try:
+                    if self.path.endswith("/embeddings"):
+                        self._embeddings(request)
+                    elif self.path.endswith("/chat/completions"):
+                        self._chat(request)
+                    else:
+                        self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+            def _embeddings(self, request: dict):
+                inputs = request.get("input", [])
+                if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+                    inputs = [inputs]
+                time.sleep(server.latency + server.per_item_latency * len(inputs))
+                self._send(200, {
+                    "object": "list",
+                    "model": request.get("model", "text-embedding-ada-002"),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": server.embedding(item)}
+                        for i, item in enumerate(inputs)
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0}
+                })
+
+            def _chat(self, request: dict):
+                question = request.get("messages", [{}])[-1].get("content", "")
+                words = f"This is a deterministic answer to: {question}".split(" ")
+                time.sleep(server.latency)
+                completion = {
+                    "id": "chatcmpl-fake",
+                    "created": int(time.time()),
+                    "model": request.get("model", "gpt-3.5-turbo")
+                }
+                if not request.get("stream"):
+                    self._send(200, {
+                        **completion,
+                        "object": "chat.completion",
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": " ".join(words)},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)}
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, word in enumerate(words + [None]):
+                    delta = {"content": word if i == 0 else f" {word}"} if word is not None else {}
+                    chunk = {**completion, "object": "chat.completion.chunk", "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": None if word is not None else "stop"}
+                    ]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                    time.sleep(server.per_item_latency)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
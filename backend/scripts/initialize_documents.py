@@ -2,7 +2,6 @@ import asyncio
 import os
 import sys
 from pathlib import Path
-import PyPDF2
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 
@@ -11,7 +10,8 @@ backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from app.core.config import settings
-from app.services.rag_service import rag_service
+from app.services.rag_service import get_rag_service
+from app.services.pdf_extractor import pdf_extractor
 
 async def initialize_documents():
     print("\nInitializing documents...")
@@ -20,6 +20,7 @@ async def initialize_documents():
     client = AsyncIOMotorClient(settings.MONGODB_URL)
     db = client[settings.MONGODB_DB_NAME]
     
+    rag_service = get_rag_service()
     documents_dir = settings.DOCUMENTS_DIR
     
     for filename in os.listdir(documents_dir):
@@ -27,12 +28,8 @@ async def initialize_documents():
             file_path = os.path.join(documents_dir, filename)
             
             try:
-                # Extract text from PDF
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    text_content = "\n".join(
-                        page.extract_text() for page in pdf_reader.pages
-                    )
+                # Extract text from PDF on the worker pool
+                text_content = await pdf_extractor.extract_text(file_path)
                 
                 print(f"\nProcessing: {filename}")
                 print(f"Extracted {len(text_content)} characters of text")
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.db.mongodb import db
+from app.services.chat import chat_service
+
+async def migrate(args):
+    """
+    Move the embedded ``messages`` arrays of existing chat sessions into the
+    ``chat_messages`` collection. Sessions are also migrated one at a time
+    when they are first opened, so the API can keep running meanwhile.
+    """
+    await db.connect_to_database()
+    await chat_service.ensure_indexes()
+
+    query = {"messages": {"$exists": True}}
+    pending = await db.db.sessions.count_documents(query)
+    print(f"{pending} sessions with embedded messages")
+    if args.dry_run:
+        return
+
+    sessions = messages = 0
+    cursor = db.db.sessions.find(query, batch_size=args.batch_size)
+    async for document in cursor:
+        messages += len(document.get("messages") or [])
+        await chat_service.migrate_session(document)
+        sessions += 1
+        if sessions % args.batch_size == 0:
+            print(f"Migrated {sessions}/{pending} sessions")
+    print(f"Migrated {messages} messages from {sessions} sessions")
+
+    await db.close_database_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Move embedded chat messages into the chat_messages collection")
+    parser.add_argument("--batch-size", type=int, default=100, help="Sessions fetched per round trip")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args))
+
+if __name__ == "__main__":
+    main()
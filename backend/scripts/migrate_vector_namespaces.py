@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from app.core.config import settings
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_index import create_vector_index
+from app.services.vector_store import migrate_to_tenant_namespaces
+
+async def migrate(args):
+    """
+    Move chunk and document vectors out of the shared namespace into their
+    owners' namespaces. Stop the API and workers first when using a local
+    vector index, since the index files are not shared between processes.
+    """
+    if settings.VECTOR_NAMESPACE_MODE.lower() != "user":
+        print("VECTOR_NAMESPACE_MODE is not 'user'; nothing to migrate")
+        return
+
+    index = create_vector_index()
+    before = await index.describe_index_stats()
+    print(f"Vectors per namespace before: "
+          f"{ {ns: stats['vector_count'] for ns, stats in before.get('namespaces', {}).items()} }")
+
+    lexical_index = LexicalIndex(settings.LEXICAL_INDEX_PATH) if settings.HYBRID_SEARCH_ENABLED else None
+    moved = await migrate_to_tenant_namespaces(
+        index,
+        lexical_index,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        dry_run=args.dry_run
+    )
+    verb = "Would move" if args.dry_run else "Moved"
+    for namespace, count in sorted(moved.items()):
+        print(f"{verb} {count} vectors to {namespace}")
+    print(f"{verb} {sum(moved.values())} vectors into {len(moved)} namespaces")
+
+    if hasattr(index, "close"):
+        index.close()
+    if lexical_index is not None:
+        lexical_index.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Move shared-namespace vectors into per-user namespaces")
+    parser.add_argument("--batch-size", type=int, default=100, help="Vectors fetched and upserted per request")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args))
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,18 @@ import asyncio
 import os
 import sys
 from pathlib import Path
-import PyPDF2
 
 # Add the backend directory to Python path
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from app.services.document_service import document_service
-from app.services.rag_service import rag_service
+from app.services.rag_service import get_rag_service
+from app.services.pdf_extractor import pdf_extractor
 from app.core.config import settings
 
 async def process_existing_documents():
+    rag_service = get_rag_service()
     documents_dir = settings.DOCUMENTS_DIR
     
     for filename in os.listdir(documents_dir):
@@ -20,12 +21,8 @@ async def process_existing_documents():
             file_path = os.path.join(documents_dir, filename)
             
             try:
-                # Extract text from PDF
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    text_content = "\n".join(
-                        page.extract_text() for page in pdf_reader.pages
-                    )
+                # Extract text from PDF on the worker pool
+                text_content = await pdf_extractor.extract_text(file_path)
                 
                 # Create document metadata
                 document = {
@@ -2,9 +2,9 @@ import pytest
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
-from app.db.mongodb import Database
+from app.db.mongodb import db
 from app.services.vector_store import VectorStoreService
-from app.services.document_processor import DocumentProcessor
+from app.services.embedding_batcher import EmbeddingBatcher
 from typing import AsyncGenerator, List
 from langchain_community.embeddings import FakeEmbeddings
 
@@ -25,37 +25,40 @@ def event_loop(request):
         if not loop.is_closed():
             loop.close()
 
-@pytest.fixture(scope="session")
-async def test_db() -> AsyncGenerator:
-    """Create a test database connection."""
+def mongo_database_name() -> str:
     # Use a unique test database name
-    test_db_name = f"{settings.MONGODB_DB_NAME}_test"
+    return f"{settings.MONGODB_DB_NAME}_test"
+
+@pytest.fixture(scope="session")
+async def mongo_client() -> AsyncGenerator:
+    """
+    A client for the test MongoDB, or None when no server is reachable, so
+    tests that need it are skipped and the rest still run.
+    """
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        yield None
+        return
     
-    # Create an async motor client
-    client = None
+    yield client
+    
+    # Clean up: drop the test database
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URL)
-        db = client[test_db_name]
-        
-        # Initialize the global Database instance
-        Database.initialize(db)
-        
-        yield db
+        await client.drop_database(mongo_database_name())
+    except Exception as e:
+        print(f"Error dropping test database: {e}")
     finally:
-        # Clean up: drop the test database
-        if client:
-            try:
-                # Use a new event loop for cleanup to avoid closed loop issues
-                cleanup_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(cleanup_loop)
-                
-                cleanup_loop.run_until_complete(client.drop_database(test_db_name))
-            except Exception as e:
-                print(f"Error dropping test database: {e}")
-            finally:
-                if client:
-                    cleanup_loop.run_until_complete(client.close())
-                cleanup_loop.close()
+        client.close()
+
+@pytest.fixture
+def test_db(mongo_client):
+    """The test database; skips the test when MongoDB is not reachable."""
+    if mongo_client is None:
+        pytest.skip(f"MongoDB is not reachable at {settings.MONGODB_URL}")
+    return mongo_client[mongo_database_name()]
 
 @pytest.fixture
 def mock_user():
@@ -67,8 +70,15 @@ def mock_user():
     }
 
 @pytest.fixture(autouse=True)
-async def setup_test_db(test_db):
-    """Ensure database is initialized before each test."""
+async def setup_test_db(mongo_client, monkeypatch):
+    """Point the global database at the test database and clear it before each test."""
+    if mongo_client is None:
+        yield
+        return
+    test_db = mongo_client[mongo_database_name()]
+    monkeypatch.setattr(db, "client", mongo_client)
+    monkeypatch.setattr(db, "db", test_db)
+    
     # Clear all collections before each test
     collections = await test_db.list_collection_names()
     for collection in collections:
@@ -105,8 +115,10 @@ class MockEmbeddings(FakeEmbeddings):
         return [[0.1] * 1536 for _ in texts]
 
 @pytest.fixture
-async def vector_store():
+async def vector_store(monkeypatch):
     """Create a test vector store instance."""
+    # Batches are sized by word count so tests never download the tokenizer
+    monkeypatch.setattr(EmbeddingBatcher, "count_tokens", lambda self, text: len(text.split()))
     store = VectorStoreService()
     # Use mock embeddings for testing
     store.embeddings = MockEmbeddings()
@@ -126,9 +138,8 @@ def setup_model_service():
     """Initialize model service for tests."""
     from app.services.model import ModelService
     
-    # Create a new instance for testing
+    # Create a new instance for testing; it loads its tokenizer on first use
     test_service = ModelService()
-    test_service.initialize()
     
     # Replace the global instance
     import app.services.model as model_module
@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.core.config import settings
+from app.db.mongodb import db
+from app.core.background import BackgroundTaskManager
+from app.services.ingestion import ingestion_service
+from app.models.document import DocumentStatus
+from app.worker import run_worker
+
+async def create_test_job():
+    return await ingestion_service.create_job({
+        "id": str(ObjectId()),
+        "title": "test_doc.txt",
+        "file_path": "uploads/test_doc.txt",
+        "file_type": "text/plain"
+    })
+
+@pytest.mark.asyncio
+async def test_job_is_leased_once(test_db):
+    """Test a pending job can only be claimed by one worker"""
+    job = await create_test_job()
+    worker_a = BackgroundTaskManager(worker_id="worker-a")
+    worker_b = BackgroundTaskManager(worker_id="worker-b")
+    
+    claimed = await worker_a.claim_job()
+    
+    assert str(claimed["_id"]) == job.id
+    assert claimed["status"] == DocumentStatus.PROCESSING
+    assert claimed["lease_owner"] == "worker-a"
+    assert claimed["attempts"] == 1
+    assert await worker_b.claim_job() is None
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(test_db):
+    """Test a job whose worker stopped heartbeating is picked up again"""
+    job = await create_test_job()
+    worker_a = BackgroundTaskManager(worker_id="worker-a")
+    worker_b = BackgroundTaskManager(worker_id="worker-b")
+    await worker_a.claim_job()
+    
+    # Simulate worker A dying without extending its lease
+    await test_db.ingestion_jobs.update_one(
+        {"_id": ObjectId(job.id)},
+        {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    
+    claimed = await worker_b.claim_job()
+    
+    assert claimed["lease_owner"] == "worker-b"
+    assert claimed["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_cleanup_deletes_vectors_from_the_owner_namespace(test_db, monkeypatch):
+    """Test cleanup removes a failed document's vectors through the RAG service"""
+    deleted = []
+
+    class RecordingRAGService:
+        async def delete_document_vectors(self, document_id, vector_ids=None, user_id=None):
+            deleted.append((document_id, vector_ids, user_id))
+
+    from app.services import rag_service
+    monkeypatch.setattr(rag_service, "get_rag_service", lambda: RecordingRAGService())
+    result = await test_db.documents.insert_one({
+        "title": "failed.txt",
+        "status": DocumentStatus.FAILED,
+        "user_id": "u1",
+        "vector_ids": ["doc#0", "doc#1"]
+    })
+    document_id = str(result.inserted_id)
+
+    await BackgroundTaskManager()._cleanup_document(document_id)
+
+    assert deleted == [(document_id, ["doc#0", "doc#1"], "u1")]
+    assert await test_db.documents.find_one({"_id": result.inserted_id}) is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["numpy", "ivf"])
+async def test_worker_refuses_local_vector_backends(backend, monkeypatch):
+    """Test a standalone worker will not write an index held by the API process"""
+    import app.worker
+
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", backend)
+    monkeypatch.setattr(app.worker, "setup_logging", lambda: None)
+
+    with pytest.raises(SystemExit):
+        await run_worker()
+
+@pytest.mark.asyncio
+async def test_start_does_not_wait_for_mongodb(monkeypatch):
+    """Test the claim loops start while MongoDB is unreachable; warm-up creates the indexes"""
+    monkeypatch.setattr(db, "db", None)
+    worker = BackgroundTaskManager(worker_id="worker-a")
+
+    await worker.start(concurrency=1, cleanup=False)
+
+    assert len(worker._tasks) == 1 and not worker._tasks[0].done()
+    await worker.stop()
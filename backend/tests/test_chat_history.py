@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime
+from app.models.chat import ChatSession, Message, MessageRole
+from app.services.chat_history import HistoryManager
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+def conversation(turns: int, words: int = 5) -> ChatSession:
+    messages = []
+    for i in range(turns):
+        messages.append(Message(role=MessageRole.USER, content=" ".join([f"q{i}"] * words)))
+        messages.append(Message(role=MessageRole.ASSISTANT, content=" ".join([f"a{i}"] * words)))
+    return ChatSession(id="s1", user_id="u1", messages=messages, created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+
+class RecordingSummarizer:
+    """Summarizer that records what it was given and lists the folded turns"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, summary, messages):
+        self.calls.append((summary, [message.content.split()[0] for message in messages]))
+        folded = " ".join(message.content.split()[0] for message in messages)
+        return f"{summary} {folded}" if summary else folded
+
+def manager(summarizer, **kwargs) -> HistoryManager:
+    options = {"max_tokens": 1000, "keep_turns": 2, "batch_turns": 2, "summary_max_tokens": 50}
+    return HistoryManager(count_tokens=word_count, summarize=summarizer, **{**options, **kwargs})
+
+@pytest.mark.asyncio
+async def test_short_conversation_is_sent_verbatim():
+    """Test nothing is summarized while the history fits in the window"""
+    summarizer = RecordingSummarizer()
+    session = conversation(3)
+
+    messages = await manager(summarizer).prepare(session, "next", "system")
+
+    assert summarizer.calls == []
+    assert [m["content"].split()[0] for m in messages] == ["system", "q0", "a0", "q1", "a1", "q2", "a2", "next"]
+
+@pytest.mark.asyncio
+async def test_old_turns_fold_into_summary_in_batches():
+    """Test turns beyond the window are folded once a batch accumulates"""
+    summarizer = RecordingSummarizer()
+    session = conversation(4)
+
+    messages = await manager(summarizer).prepare(session, "next", "system")
+
+    assert summarizer.calls == [(None, ["q0", "a0", "q1", "a1"])]
+    assert session.summary == "q0 a0 q1 a1"
+    assert session.summarized_count == 4
+    assert messages[1] == {"role": "system", "content": "Summary of the earlier conversation:\nq0 a0 q1 a1"}
+    assert [m["content"].split()[0] for m in messages[2:]] == ["q2", "a2", "q3", "a3", "next"]
+
+@pytest.mark.asyncio
+async def test_summary_is_refreshed_incrementally():
+    """Test later folds only send the stored summary and the newly folded turns"""
+    summarizer = RecordingSummarizer()
+    history = manager(summarizer)
+    session = conversation(4)
+    await history.prepare(session, "next", "system")
+
+    # One more turn stays within the window plus a batch: no new summary call
+    session.messages.extend(conversation(1).messages)
+    await history.prepare(session, "next", "system")
+    assert len(summarizer.calls) == 1
+
+    session.messages.extend(conversation(1).messages)
+    await history.prepare(session, "next", "system")
+
+    assert summarizer.calls[1] == ("q0 a0 q1 a1", ["q2", "a2", "q3", "a3"])
+    assert session.summarized_count == 8
+
+@pytest.mark.asyncio
+async def test_token_budget_folds_recent_turns_too():
+    """Test long recent turns are folded when they alone exceed the budget"""
+    summarizer = RecordingSummarizer()
+    session = conversation(2, words=100)
+    history = manager(summarizer, max_tokens=250)
+
+    messages = await history.prepare(session, "next", "system")
+
+    total = sum(history.message_tokens(m["content"]) for m in messages)
+    assert total <= 250
+    assert session.summarized_count == 3
+    assert [m["content"].split()[0] for m in messages[2:]] == ["a1", "next"]
+
+@pytest.mark.asyncio
+async def test_summary_failure_drops_old_turns_without_losing_them():
+    """Test a failed summary leaves the session unchanged so the next turn retries"""
+    async def failing(summary, messages):
+        raise RuntimeError("rate limited")
+
+    session = conversation(4)
+    messages = await manager(failing).prepare(session, "next", "system")
+
+    assert session.summary is None and session.summarized_count == 0
+    assert [m["content"].split()[0] for m in messages] == ["system", "q2", "a2", "q3", "a3", "next"]
+
+@pytest.mark.asyncio
+async def test_stored_tail_is_counted_by_sequence_number():
+    """Test a session loaded with only its unsummarized tail folds by sequence number"""
+    summarizer = RecordingSummarizer()
+    session = conversation(8)
+    for seq, message in enumerate(session.messages):
+        message.seq = seq
+    session.summary, session.summarized_count = "q0 a0 q1 a1", 4
+    session.messages = session.messages[4:]  # What get_session loads
+
+    messages = await manager(summarizer).prepare(session, "next", "system")
+
+    assert summarizer.calls == [("q0 a0 q1 a1", ["q2", "a2", "q3", "a3", "q4", "a4", "q5", "a5"])]
+    assert session.summarized_count == 12
+    assert [m["content"].split()[0] for m in messages[2:]] == ["q6", "a6", "q7", "a7", "next"]
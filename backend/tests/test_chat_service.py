@@ -1,7 +1,12 @@
 import pytest
-from app.services.chat import chat_service
+from datetime import datetime
+from app.services.chat import ChatService, chat_service
+from app.services.session_cache import SessionCache
 from app.models.chat import ChatRequest
 
+# These tests use the global database
+pytestmark = pytest.mark.usefixtures("test_db")
+
 @pytest.mark.asyncio
 async def test_chat_session_creation(mock_user):
     """Test creating a new chat session"""
@@ -33,4 +38,109 @@ async def test_send_message(mock_user, vector_store):
     
     assert response_session is not None
     assert len(response_session.messages) == 2  # User message + AI response
-    assert response_session.messages[1].role == "assistant" 
\ No newline at end of file
+    assert response_session.messages[1].role == "assistant" 
+
+@pytest.mark.asyncio
+async def test_messages_are_appended_not_rewritten(test_db, mock_user):
+    """Test each exchange inserts its messages and leaves the session document small"""
+    session = await chat_service.create_session(mock_user['id'])
+    for i in range(3):
+        session = await chat_service.append_exchange(session, f"question {i}", f"answer {i}")
+
+    stored = await test_db.sessions.find_one({"id": session.id})
+    loaded = await chat_service.get_session(session.id, mock_user['id'])
+
+    assert "messages" not in stored and stored["message_count"] == 6
+    assert await test_db.chat_messages.count_documents({"session_id": session.id}) == 6
+    assert [m.seq for m in loaded.messages] == list(range(6))
+    assert loaded.messages[-1].content == "answer 2"
+
+@pytest.mark.asyncio
+async def test_get_session_loads_only_unsummarized_messages(test_db, mock_user):
+    """Test messages already folded into the summary are not loaded with the session"""
+    session = await chat_service.create_session(mock_user['id'])
+    for i in range(4):
+        session = await chat_service.append_exchange(session, f"question {i}", f"answer {i}")
+    session.summary, session.summarized_count = "Earlier turns", 6
+    await chat_service.save_session(session)
+
+    loaded = await chat_service.get_session(session.id, mock_user['id'])
+
+    assert loaded.summary == "Earlier turns"
+    assert [m.seq for m in loaded.messages] == [6, 7]
+
+@pytest.mark.asyncio
+async def test_messages_are_paginated_backwards(test_db, mock_user):
+    """Test pages run oldest first and ``next_before`` walks back to the start"""
+    session = await chat_service.create_session(mock_user['id'])
+    for i in range(5):
+        session = await chat_service.append_exchange(session, f"question {i}", f"answer {i}")
+
+    first = await chat_service.get_messages(session.id, mock_user['id'], limit=4)
+    second = await chat_service.get_messages(session.id, mock_user['id'], before=first.next_before, limit=4)
+    last = await chat_service.get_messages(session.id, mock_user['id'], before=second.next_before, limit=4)
+
+    assert [m.seq for m in first.messages] == [6, 7, 8, 9]
+    assert [m.seq for m in second.messages] == [2, 3, 4, 5]
+    assert [m.seq for m in last.messages] == [0, 1] and last.next_before is None
+    assert await chat_service.get_messages(session.id, "someone_else") is None
+
+@pytest.mark.asyncio
+async def test_embedded_messages_are_migrated_on_first_read(test_db, mock_user):
+    """Test a session stored with a messages array is moved to chat_messages once"""
+    now = datetime.utcnow()
+    await test_db.sessions.insert_one({
+        "id": "legacy", "user_id": mock_user['id'], "title": "Old chat", "created_at": now, "updated_at": now,
+        "messages": [{"role": "user", "content": "hi", "created_at": now},
+                     {"role": "assistant", "content": "hello", "created_at": now}]
+    })
+
+    loaded = await chat_service.get_session("legacy", mock_user['id'])
+    stored = await test_db.sessions.find_one({"id": "legacy"})
+    await chat_service.migrate_session({**stored, "messages": [{"role": "user", "content": "hi", "created_at": now}] * 2})
+    session = await chat_service.append_exchange(loaded, "again", "welcome back")
+
+    assert [m.content for m in loaded.messages] == ["hi", "hello", "again", "welcome back"]
+    assert "messages" not in stored and stored["message_count"] == 2
+    assert [m.seq for m in session.messages] == [0, 1, 2, 3]
+    assert await test_db.chat_messages.count_documents({"session_id": "legacy"}) == 4
+
+@pytest.mark.asyncio
+async def test_delete_session_removes_its_messages(test_db, mock_user):
+    """Test deleting a session also deletes its stored messages"""
+    session = await chat_service.create_session(mock_user['id'])
+    await chat_service.append_exchange(session, "question", "answer")
+
+    assert await chat_service.delete_session(session.id, mock_user['id'])
+    assert await test_db.chat_messages.count_documents({"session_id": session.id}) == 0
+
+@pytest.mark.asyncio
+async def test_cached_session_sees_other_workers_messages(test_db, mock_user):
+    """Test a write-through cache reloads a session another process appended to"""
+    ours, theirs = ChatService(cache=SessionCache()), ChatService(cache=SessionCache())
+    session = await ours.create_session(mock_user['id'])
+    session = await ours.append_exchange(session, "question 0", "answer 0")
+
+    other = await theirs.get_session(session.id, mock_user['id'])
+    await theirs.append_exchange(other, "question 1", "answer 1")
+    loaded = await ours.get_session(session.id, mock_user['id'])
+
+    assert [m.seq for m in loaded.messages] == [0, 1, 2, 3]
+    assert ours.cache.stats()["stale"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_append_keeps_newer_summary(test_db, mock_user):
+    """Test appending to an outdated copy stores its messages but not its summary"""
+    ours, theirs = ChatService(cache=SessionCache()), ChatService(cache=SessionCache())
+    session = await ours.create_session(mock_user['id'])
+    session = await ours.append_exchange(session, "question 0", "answer 0")
+
+    other = await theirs.get_session(session.id, mock_user['id'])
+    other.summary, other.summarized_count = "First exchange", 2
+    await theirs.append_exchange(other, "question 1", "answer 1")
+    await ours.append_exchange(session, "question 2", "answer 2")
+
+    stored = await test_db.sessions.find_one({"id": session.id})
+    seqs = await test_db.chat_messages.distinct("seq", {"session_id": session.id})
+    assert stored["summary"] == "First exchange" and stored["summarized_count"] == 2
+    assert stored["message_count"] == 6 and sorted(seqs) == list(range(6))
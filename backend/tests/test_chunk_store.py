@@ -0,0 +1,34 @@
+import pytest
+from app.services.chunk_store import ChunkStore
+
+def test_zstd_round_trip_only_when_smaller():
+    """Test compressed chunks decode to the original text and tiny ones stay plain"""
+    store = ChunkStore(compression="zstd")
+    text = "The refund policy allows returns within 30 days. " * 20
+
+    encoded = store.encode(text)
+
+    assert "zstd" in encoded and len(encoded["zstd"]) < len(text)
+    assert store.decode(encoded) == text
+    assert store.encode("ok") == {"text": "ok"}
+    assert ChunkStore(compression="").encode(text) == {"text": text}
+
+@pytest.mark.asyncio
+async def test_put_get_many_and_delete(test_db):
+    """Test chunks are fetched by ID in bulk and removed with their vectors or document"""
+    store = ChunkStore(compression="zstd")
+    texts = [f"chunk {i} " * 50 for i in range(3)]
+    await store.put(
+        ["doc1#0", "doc1#1", "doc2#0"],
+        texts,
+        [{"document_id": "doc1", "chunk_index": 0}, {"document_id": "doc1", "chunk_index": 1}, {"document_id": "doc2", "chunk_index": 0}]
+    )
+
+    fetched = await store.get_many(["doc1#1", "doc2#0", "missing"])
+    deleted = await store.delete(["doc2#0"])
+    deleted_document = await store.delete_document("doc1")
+
+    assert fetched == {"doc1#1": texts[1], "doc2#0": texts[2]}
+    assert deleted == 1
+    assert deleted_document == 2
+    assert await store.get_many(["doc1#0"]) == {}
@@ -1,7 +1,10 @@
 import pytest
 import os
+import hashlib
 from app.services.document import document_service
 from app.models.document import DocumentStatus
+from app.core.uploads import save_upload_stream
+from app.core.exceptions import FileSizeTooLargeError
 from fastapi import UploadFile
 from io import BytesIO
 
@@ -39,4 +42,29 @@ async def test_document_listing(test_db, mock_user):
     documents = await document_service.get_documents(mock_user['id'])
     
     assert len(documents) >= 3
-    assert all(doc.user_id == mock_user['id'] for doc in documents) 
\ No newline at end of file
+    assert all(doc.user_id == mock_user['id'] for doc in documents)
+
+@pytest.mark.asyncio
+async def test_streaming_upload_hash(tmp_path):
+    """Test streamed uploads are hashed and written in blocks"""
+    file_content = b"streamed content " * 1000
+    file = UploadFile(filename="stream.txt", file=BytesIO(file_content))
+    destination = str(tmp_path / "stream.txt")
+    
+    stored = await save_upload_stream(file, destination, chunk_size=1024)
+    
+    assert stored.file_size == len(file_content)
+    assert stored.content_hash == hashlib.sha256(file_content).hexdigest()
+    with open(destination, "rb") as f:
+        assert f.read() == file_content
+
+@pytest.mark.asyncio
+async def test_streaming_upload_size_limit(tmp_path):
+    """Test oversized uploads are rejected mid-stream without leaving files behind"""
+    file = UploadFile(filename="big.txt", file=BytesIO(b"x" * 4096))
+    destination = str(tmp_path / "big.txt")
+    
+    with pytest.raises(FileSizeTooLargeError):
+        await save_upload_stream(file, destination, max_size=2048, chunk_size=1024)
+    
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,58 @@
+import pytest
+from typing import List
+from langchain_community.embeddings import FakeEmbeddings
+from app.services.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings that record which texts reached the model"""
+    embedded: List[str] = []
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return self.embed_documents(texts)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"), max_entries=3)
+    yield cache
+    cache.close()
+
+@pytest.mark.asyncio
+async def test_repeated_chunks_are_embedded_once(cache):
+    """Test chunk texts repeated within and across documents hit the model once"""
+    model = CountingEmbeddings(size=8, embedded=[])
+    embeddings = CachedEmbeddings(model, cache, model_name="test-model")
+    
+    first = await embeddings.aembed_documents(["header", "body one", "header"])
+    second = await embeddings.aembed_documents(["header", "body one"])
+    
+    assert model.embedded == ["header", "body one"]
+    assert first[0] == first[2] == second[0]
+    assert second[1] == first[1]
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted(cache):
+    """Test the cache stays within its size cap"""
+    model = CountingEmbeddings(size=8, embedded=[])
+    embeddings = CachedEmbeddings(model, cache, model_name="test-model")
+    
+    await embeddings.aembed_documents(["a", "b", "c", "d"])
+    
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+
+def test_shortened_embeddings_use_separate_entries(cache):
+    """Test a dimensions setting is part of the cache key"""
+    class ShortEmbeddings(CountingEmbeddings):
+        model: str = "text-embedding-3-small"
+        dimensions: int = 256
+
+    full = CachedEmbeddings(CountingEmbeddings(size=8, embedded=[]), cache)
+    short = CachedEmbeddings(ShortEmbeddings(size=8, embedded=[]), cache)
+
+    assert short.model_name == "text-embedding-3-small@256"
+    assert full.model_name != short.model_name
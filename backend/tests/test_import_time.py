@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+
+# Cumulative `import app.main` time; override with IMPORT_TIME_BUDGET_SECONDS on slow machines
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "2.0"))
+
+# Loaded on first use (service construction, warm-up or a model request), never by import
+LAZY_MODULES = (
+    "langchain", "langchain_community", "langchain_openai", "langchain_anthropic",
+    "langchain_cohere", "langchain_text_splitters", "openai", "pinecone", "tiktoken"
+)
+
+def run_import(code: str) -> subprocess.CompletedProcess:
+    env = {"JWT_SECRET_KEY": "test", "OPENAI_API_KEY": "test", **os.environ}
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+
+def cumulative_import_seconds(stderr: str, module: str) -> float:
+    """Cumulative time of ``module`` from ``-X importtime`` output"""
+    for line in stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    raise AssertionError(f"{module} not found in import time output")
+
+def test_app_import_time_within_budget():
+    """Test importing the app stays within the import-time budget"""
+    result = run_import("import app.main")
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    seconds = cumulative_import_seconds(result.stderr, "app.main")
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, (
+        f"import app.main took {seconds:.2f}s, over the {IMPORT_TIME_BUDGET_SECONDS:.2f}s budget"
+    )
+
+def test_app_import_skips_provider_sdks():
+    """Test importing the app loads no LangChain chains, provider SDKs or vector clients"""
+    result = run_import(
+        "import sys, app.main\n"
+        f"print(sorted({{m.split('.')[0] for m in sys.modules}} & set({LAZY_MODULES!r})))"
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip() == "[]"
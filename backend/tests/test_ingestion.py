@@ -0,0 +1,27 @@
+import pytest
+from app.services.ingestion import ingestion_service
+from app.models.document import DocumentStatus, IngestionStage
+
+@pytest.mark.asyncio
+async def test_create_and_get_job(test_db):
+    """Test a queued job is reported with its initial stage"""
+    job = await ingestion_service.create_job({
+        "id": "507f1f77bcf86cd799439011",
+        "title": "test_doc.txt",
+        "file_path": "uploads/test_doc.txt",
+        "file_type": "text/plain"
+    })
+    
+    fetched = await ingestion_service.get_job(job.id)
+    
+    assert fetched is not None
+    assert fetched.document_id == "507f1f77bcf86cd799439011"
+    assert fetched.status == DocumentStatus.PENDING
+    assert fetched.stage == IngestionStage.QUEUED
+    assert fetched.chunks_total == 0
+
+@pytest.mark.asyncio
+async def test_get_unknown_job(test_db):
+    """Test unknown or malformed job IDs return nothing"""
+    assert await ingestion_service.get_job("not-an-id") is None
+    assert await ingestion_service.get_job("507f1f77bcf86cd799439011") is None
@@ -3,6 +3,9 @@ from app.services.document import document_service
 from app.services.chat import chat_service
 from app.services.document_processor import document_processor
 
+# These tests use the global database
+pytestmark = pytest.mark.usefixtures("test_db")
+
 @pytest.mark.asyncio
 async def test_document_chat_workflow(mock_user, vector_store):
     """Test complete workflow: document upload, processing, and chat"""
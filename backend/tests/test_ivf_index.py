@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from app.services.ivf_index import IVFVectorIndex
+
+def clustered_vectors(count: int, dimension: int = 32, clusters: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension))
+    values = (centers[rng.integers(0, clusters, count)] + 0.3 * rng.standard_normal((count, dimension))).astype(np.float32)
+    return [
+        {"id": f"doc{i % 10}#{i}", "values": values[i].tolist(), "metadata": {"document_id": f"doc{i % 10}"}}
+        for i in range(count)
+    ], values
+
+def exact_top_k(values, query, k, exclude=()):
+    normalized = values / np.linalg.norm(values, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    scores[list(exclude)] = -np.inf
+    return set(np.argsort(-scores)[:k].tolist())
+
+def make_index(**kwargs):
+    return IVFVectorIndex(nlist=16, nprobe=4, train_min_vectors=500, compaction_threshold=0.2, **kwargs)
+
+@pytest.mark.asyncio
+async def test_ivf_recall_against_brute_force():
+    """Test probing a few lists still finds nearly all exact neighbours"""
+    index = make_index()
+    vectors, values = clustered_vectors(3000)
+    await index.upsert(vectors)
+    queries = values[:50] + 0.05
+
+    hits = 0
+    for query in queries:
+        results = await index.query(query.tolist(), top_k=10)
+        found = {int(r["id"].split("#")[1]) for r in results}
+        hits += len(found & exact_top_k(values, query, 10))
+
+    assert (await index.describe_index_stats())["namespaces"][""]["nlist"] == 16
+    assert hits / (10 * len(queries)) >= 0.9
+
+@pytest.mark.asyncio
+async def test_ivf_incremental_inserts_are_searchable():
+    """Test vectors upserted after training are found without retraining"""
+    index = make_index()
+    vectors, values = clustered_vectors(1000)
+    await index.upsert(vectors[:600])
+    await index.upsert(vectors[600:])
+
+    for i in (600, 777, 999):
+        results = await index.query(values[i].tolist(), top_k=1)
+        assert results[0]["id"] == vectors[i]["id"]
+
+@pytest.mark.asyncio
+async def test_ivf_tombstones_are_compacted_in_background():
+    """Test deleted vectors disappear at once and their rows are reclaimed by compaction"""
+    index = make_index()
+    vectors, values = clustered_vectors(1000)
+    await index.upsert(vectors)
+    deleted = [v["id"] for v in vectors if v["metadata"]["document_id"] in ("doc0", "doc1")]
+
+    await index.delete(deleted[:50])
+    assert (await index.describe_index_stats())["namespaces"][""]["tombstones"] == 50
+    assert (await index.query(values[0].tolist(), top_k=1))[0]["id"] != vectors[0]["id"]
+
+    await index.delete(deleted[50:])
+    await index.wait_for_compaction()
+    stats = (await index.describe_index_stats())["namespaces"][""]
+    assert stats["tombstones"] == 0
+    assert stats["vector_count"] == 800
+
+    # Reclaimed rows are reused by new vectors, which stay searchable
+    await index.upsert([{"id": "new#0", "values": values[0].tolist(), "metadata": {"document_id": "new"}}])
+    assert (await index.query(values[0].tolist(), top_k=1))[0]["id"] == "new#0"
+    results = await index.query(values[5].tolist(), top_k=50, filter={"document_id": "doc5"})
+    assert {r["metadata"]["document_id"] for r in results} == {"doc5"}
+
+@pytest.mark.asyncio
+async def test_ivf_index_reloads_lists(tmp_path):
+    """Test centroids and list assignments persist across restarts"""
+    index = make_index(path=str(tmp_path / "ivf"))
+    vectors, values = clustered_vectors(800)
+    await index.upsert(vectors)
+    index.close()
+
+    reopened = make_index(path=str(tmp_path / "ivf"))
+    stats = (await reopened.describe_index_stats())["namespaces"][""]
+    assert stats["nlist"] == 16
+    assert (await reopened.query(values[42].tolist(), top_k=1))[0]["id"] == vectors[42]["id"]
@@ -0,0 +1,118 @@
+import pytest
+from langchain_core.documents import Document
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+from app.services.retriever import HybridRetriever, IndexHandle
+from tests.test_retriever import KeywordVectorStore
+
+CHUNKS = {
+    "manual#0": "Reset the router by holding the power button for ten seconds.",
+    "manual#1": "Error ERR-404 means the firmware image was not found on the device.",
+    "manual#2": "The router supports firmware updates over the web interface.",
+    "faq#0": "Part number AB-1234 replaces the older AB-1200 power supply.",
+    "faq#1": "Contact support if the power light keeps blinking."
+}
+
+def build_index(path=None) -> LexicalIndex:
+    index = LexicalIndex(path)
+    ids = list(CHUNKS)
+    index.add(ids, [CHUNKS[id] for id in ids], [{"document_id": id.split("#")[0]} for id in ids])
+    return index
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    """Test compound identifiers are indexed whole and split"""
+    assert tokenize("See ERR-404 in v2.1") == ["see", "err-404", "err", "404", "in", "v2.1", "v2", "1"]
+
+def test_exact_identifier_ranks_first():
+    """Test BM25 ranks the chunk containing a rare exact term first"""
+    index = build_index()
+
+    results = index.search("what is ab-1234", top_k=3)
+
+    assert results[0][0] == "faq#0"
+    assert results[0][2] == CHUNKS["faq#0"]
+    assert results[0][3]["document_id"] == "faq"
+    assert [score for _, score, *_ in results] == sorted((score for _, score, *_ in results), reverse=True)
+    assert index.search("err-404", top_k=1)[0][0] == "manual#1"
+    assert index.search("nothing matches here") == []
+
+def test_filter_delete_and_replace():
+    """Test document filters, deletes and re-adding an ID"""
+    index = build_index()
+
+    assert {id for id, *_ in index.search("power router", filter={"document_id": "faq"})} == {"faq#0", "faq#1"}
+    assert {id for id, *_ in index.search("power", filter={"document_id": {"$in": ["manual"]}})} == {"manual#0"}
+
+    index.delete(["faq#0"])
+    index.add(["manual#0"], ["Factory reset wipes all settings."], [{"document_id": "manual"}])
+
+    assert index.search("ab-1234") == []
+    assert index.search("factory")[0][0] == "manual#0"
+    assert "manual#0" not in {id for id, *_ in index.search("holding button")}
+    assert index.count == 4
+
+def test_namespaces_limit_results():
+    """Test namespaced searches only return chunks of that namespace, including after a move"""
+    index = build_index()
+    index.add(["private#0"], ["Part AB-1234 internal pricing"], [{"document_id": "private", "user_id": "u1"}], namespace="user-u1")
+
+    assert [id for id, *_ in index.search("ab-1234", namespace="")] == ["faq#0"]
+    assert [id for id, *_ in index.search("ab-1234", namespace="user-u1")] == ["private#0"]
+    assert len(index.search("ab-1234")) == 2
+
+    index.move(["faq#0"], "user-u1")
+    assert index.search("ab-1234", namespace="") == []
+    assert {id for id, *_ in index.search("ab-1234", namespace="user-u1")} == {"faq#0", "private#0"}
+
+def test_index_persists_and_compacts(tmp_path):
+    """Test the index reloads from its log, before and after compaction"""
+    index = build_index(str(tmp_path / "lexical"))
+    index.delete(["manual#1"])
+    index.close()
+
+    reopened = LexicalIndex(str(tmp_path / "lexical"))
+    assert reopened.count == 4
+    assert reopened.search("firmware")[0][0] == "manual#2"
+    reopened.move(["manual#2"], "user-u1")
+    reopened.compact()
+    reopened.add(["new#0"], ["firmware rollback"], [{"document_id": "new"}])
+    reopened.close()
+
+    compacted = LexicalIndex(str(tmp_path / "lexical"))
+    assert compacted.count == 5
+    assert [id for id, *_ in compacted.search("firmware rollback")][:2] == ["new#0", "manual#2"]
+    assert [id for id, *_ in compacted.search("firmware", namespace="user-u1")] == ["manual#2"]
+
+def test_replaced_chunks_trigger_compaction(tmp_path):
+    """Test the log is rewritten once dead records pass the threshold"""
+    path = tmp_path / "lexical"
+    index = LexicalIndex(str(path), compaction_threshold=1.0)
+    ids = list(CHUNKS)
+    for _ in range(3):
+        index.add(ids, [CHUNKS[id] for id in ids])
+    index.close()
+
+    assert index.log_records == 5
+    assert len((path / "chunks.jsonl").read_text().splitlines()) == 5
+    reopened = LexicalIndex(str(path))
+    assert reopened.garbage == 0 and reopened.search("ab-1234")[0][0] == "faq#0"
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Test IDs ranked by both lists beat IDs ranked highly by only one"""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], k=60)
+
+    assert [id for id, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+@pytest.mark.asyncio
+async def test_hybrid_retriever_adds_keyword_matches():
+    """Test fusion surfaces a BM25-only match the vector search missed"""
+    store = KeywordVectorStore(latency=0)
+    store.add_texts(["power supply overview", "router power settings"])
+    index = build_index()
+    retriever = HybridRetriever(handle=IndexHandle(store), lexical_index=index, k=3, fetch_k=2)
+
+    docs = await retriever.ainvoke("AB-1234 power")
+
+    assert any(d.page_content == CHUNKS["faq#0"] for d in docs)
+    assert len(docs) == 3
+    assert all(isinstance(d, Document) for d in docs)
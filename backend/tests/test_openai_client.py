@@ -0,0 +1,58 @@
+import pytest
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from app.core.config import settings
+from app.models.chat import ChatSession
+from app.services import openai_client
+from app.services.chat import ChatService
+
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+from fake_openai_server import FakeOpenAIServer
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = FakeOpenAIServer(latency=0.2, max_concurrent=64).start()
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+def test_clients_are_shared():
+    """Test every caller gets the same clients and one model per configuration"""
+    assert openai_client.http_clients() is openai_client.http_clients()
+    assert openai_client.get_async_openai() is openai_client.get_async_openai()
+    model = openai_client.get_chat_model("gpt-3.5-turbo", temperature=0.7)
+    assert openai_client.get_chat_model("gpt-3.5-turbo", temperature=0.7) is model
+    assert openai_client.get_chat_model("gpt-4", temperature=0.7) is not model
+    assert model.http_async_client is openai_client.http_clients()[1]
+    asyncio.run(openai_client.close_openai_clients())
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_overlap_and_reuse_connections(fake_openai):
+    """Test concurrent replies run side by side and later ones reuse kept-alive connections"""
+    service = ChatService()
+    session = ChatSession(id="s1", user_id="u1", created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+
+    async def chat(message: str) -> str:
+        return "".join([token async for token in service.stream_reply(session, message)])
+
+    try:
+        await chat("warm-up")  # Load the SDK's lazily imported modules outside the timing
+        fake_openai.reset_counters()
+        started = time.perf_counter()
+        answers = await asyncio.gather(*(chat(f"question {i}") for i in range(8)))
+        elapsed = time.perf_counter() - started
+        opened = fake_openai.connections
+
+        await asyncio.gather(*(chat(f"again {i}") for i in range(8)))
+
+        assert answers[3] == "This is a deterministic answer to: question 3"
+        # One at a time would take 8 x 0.2s
+        assert elapsed < 0.8
+        assert fake_openai.peak_in_flight == 8
+        assert opened <= 8
+        assert fake_openai.connections == opened
+    finally:
+        await openai_client.close_openai_clients()
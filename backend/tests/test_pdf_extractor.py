@@ -0,0 +1,32 @@
+import pytest
+import PyPDF2
+from app.services.pdf_extractor import PDFExtractor
+
+def test_page_ranges_cover_all_pages_in_order():
+    """Test page ranges are contiguous and cover every page once"""
+    extractor = PDFExtractor(max_workers=4)
+    
+    ranges = extractor.page_ranges(301)
+    
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == 301
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges, ranges[1:]))
+    assert len(ranges) <= 4 * extractor.tasks_per_worker
+
+@pytest.mark.asyncio
+async def test_extract_pages_returns_every_page(tmp_path):
+    """Test extraction on the process pool returns one entry per page"""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(7):
+        writer.add_blank_page(width=200, height=200)
+    pdf_path = tmp_path / "blank.pdf"
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    
+    extractor = PDFExtractor(max_workers=2)
+    try:
+        pages = await extractor.extract_pages(str(pdf_path))
+    finally:
+        extractor.shutdown()
+    
+    assert len(pages) == 7
@@ -0,0 +1,221 @@
+import pytest
+import asyncio
+from typing import Any, Iterable, List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.rag_service import RAGService
+from app.services.retriever import (
+    HandleRetriever, IndexHandle, ScopedRetriever, TwoStageRetriever, retrieval_scope
+)
+from app.services.vector_index import NumpyVectorIndex, VectorIndexStore
+
+class KeywordVectorStore(VectorStore):
+    """In-memory store that ranks texts by shared words, with simulated query latency"""
+
+    def __init__(self, latency: float = 0.002):
+        self.texts: List[str] = []
+        self.latency = latency
+
+    @property
+    def embeddings(self):
+        return None
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        start = len(self.texts)
+        self.texts.extend(texts)
+        return [str(i) for i in range(start, len(self.texts))]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        words = set(query.split())
+        ranked = sorted(self.texts, key=lambda text: -len(words & set(text.split())))
+        return [Document(page_content=text) for text in ranked[:k]]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        await asyncio.sleep(self.latency)
+        return self.similarity_search(query, k=k)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        store = cls()
+        store.add_texts(texts)
+        return store
+
+@pytest.mark.asyncio
+async def test_retriever_sees_writes_without_rebuild():
+    """Test a retriever built once returns chunks written after it was created"""
+    store = KeywordVectorStore()
+    handle = IndexHandle(store)
+    retriever = HandleRetriever(handle=handle, search_kwargs={"k": 1})
+
+    store.add_texts(["the refund policy allows returns within 30 days"])
+    handle.bump()
+    docs = await retriever.ainvoke("refund policy")
+
+    assert docs[0].page_content.startswith("the refund policy")
+    assert handle.generation == 1
+
+@pytest.mark.asyncio
+async def test_swap_redirects_existing_retrievers():
+    """Test swapping the store moves live retrievers and bumps the generation"""
+    old_store = KeywordVectorStore.from_texts(["old chunk"], None)
+    new_store = KeywordVectorStore.from_texts(["new chunk"], None)
+    handle = IndexHandle(old_store)
+    retriever = HandleRetriever(handle=handle, search_kwargs={"k": 1})
+
+    assert (await retriever.ainvoke("chunk"))[0].page_content == "old chunk"
+    assert handle.swap(new_store) == 1
+    assert (await retriever.ainvoke("chunk"))[0].page_content == "new chunk"
+
+class WordEmbeddings(Embeddings):
+    """One axis per vocabulary word, so texts with the same words embed identically"""
+
+    def __init__(self, vocabulary: List[str]):
+        self.axes = {word: i for i, word in enumerate(vocabulary)}
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * len(self.axes)
+        for word in text.split():
+            if word in self.axes:
+                vector[self.axes[word]] += 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+def local_rag_service(embeddings: Embeddings) -> RAGService:
+    """RAGService over an in-memory NumPy index, without the LLM chain"""
+    service = RAGService.__new__(RAGService)
+    service.embeddings = embeddings
+    service.index = NumpyVectorIndex()
+    service.chunk_store = None
+    service.vectorstore = VectorIndexStore(service.index, embeddings)
+    service.index_handle = IndexHandle(service.vectorstore)
+    service.document_store = VectorIndexStore(service.index, embeddings, namespace=settings.DOCUMENT_INDEX_NAMESPACE)
+    service.lexical_index = None
+    return service
+
+@pytest.mark.asyncio
+async def test_concurrent_ingest_and_chat(monkeypatch):
+    """Stress test: documents are indexed while chats query a retriever built beforehand"""
+    monkeypatch.setattr(EmbeddingBatcher, "count_tokens", lambda self, text: len(text.split()))
+    vocabulary = ["seed"] + [f"{word}{i}" for word, count in (("doc", 10), ("part", 5), ("line", 20)) for i in range(count)]
+    service = local_rag_service(WordEmbeddings(vocabulary))
+    await service.index_chunks([f"seed line{i}" for i in range(10)], {"id": "seed"})
+    retriever = service.create_retriever(k=3)
+
+    def chunk_texts(document: int, part: int) -> List[str]:
+        return [f"doc{document} part{part} line{i}" for i in range(20)]
+
+    async def ingest(document: int):
+        for part in range(5):
+            texts = chunk_texts(document, part)
+            await service.index_chunks(texts, {"id": f"doc{document}-{part}"})
+            # Visible to the existing retriever as soon as it is indexed
+            assert (await retriever.ainvoke(texts[7]))[0].page_content == texts[7]
+
+    async def chat(user: int):
+        for turn in range(20):
+            docs = await retriever.ainvoke(f"doc{user} part{turn % 5} line{turn}")
+            assert len(docs) == 3
+
+    results = await asyncio.gather(
+        *[ingest(i) for i in range(10)],
+        *[chat(i) for i in range(10)],
+        return_exceptions=True
+    )
+
+    assert [r for r in results if isinstance(r, Exception)] == []
+    # Every write went through the same handle and store; nothing was rebuilt
+    assert retriever.handle is service.index_handle
+    assert service.index_handle.vectorstore is service.vectorstore
+    assert service.index_handle.generation == 1 + 10 * 5
+    assert (await service.index.describe_index_stats())["namespaces"][""]["vector_count"] == 10 + 10 * 5 * 20
+    for document in range(10):
+        last = chunk_texts(document, 4)[19]
+        assert (await retriever.ainvoke(last))[0].page_content == last
+
+class TopicEmbeddings(Embeddings):
+    """One axis per known topic word, so texts embed close to their topics"""
+
+    topics = ["billing", "refund", "router", "firmware", "password", "login"]
+
+    def embed_query(self, text: str) -> List[float]:
+        words = text.split()
+        return [float(words.count(topic)) + 0.01 for topic in self.topics]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+@pytest.mark.asyncio
+async def test_two_stage_searches_only_top_documents():
+    """Test chunks come only from the documents whose document vectors match best"""
+    index = NumpyVectorIndex()
+    embeddings = TopicEmbeddings()
+    chunks = VectorIndexStore(index, embeddings)
+    documents = VectorIndexStore(index, embeddings, namespace="__documents__")
+    corpus = {
+        "billing-guide": ["billing refund", "billing invoice", "refund billing policy"],
+        "network-guide": ["router firmware", "router reset", "billing billing router"],
+        "account-guide": ["password login", "login reset"]
+    }
+    for document_id, texts in corpus.items():
+        await chunks.aadd_texts(texts, [{"document_id": document_id} for _ in texts])
+        await documents.aadd_texts([" ".join(texts)], [{"document_id": document_id}], ids=[document_id])
+    chunk_retriever = HandleRetriever(handle=IndexHandle(chunks), search_kwargs={"k": 3})
+
+    two_stage = TwoStageRetriever(document_store=documents, chunk_retriever=chunk_retriever, top_documents=1)
+    docs = await two_stage.ainvoke("billing")
+    single = await chunk_retriever.ainvoke("billing")
+
+    assert {d.metadata["document_id"] for d in docs} == {"billing-guide"}
+    assert "network-guide" in {d.metadata["document_id"] for d in single}
+    assert chunk_retriever.search_kwargs == {"k": 3}
+
+@pytest.mark.asyncio
+async def test_two_stage_falls_back_without_document_vectors():
+    """Test every chunk is searched when no document vectors exist yet"""
+    index = NumpyVectorIndex()
+    chunks = VectorIndexStore(index, TopicEmbeddings())
+    await chunks.aadd_texts(["router firmware"], [{"document_id": "old"}])
+    two_stage = TwoStageRetriever(
+        document_store=VectorIndexStore(index, TopicEmbeddings(), namespace="__documents__"),
+        chunk_retriever=HandleRetriever(handle=IndexHandle(chunks), search_kwargs={"k": 1})
+    )
+
+    assert (await two_stage.ainvoke("router"))[0].page_content == "router firmware"
+
+@pytest.mark.asyncio
+async def test_scoped_retriever_searches_the_requested_namespace():
+    """Test one retriever serves per-user namespaces and explicit document lists"""
+    index = NumpyVectorIndex()
+    store = VectorIndexStore(index, TopicEmbeddings())
+    await store.aadd_texts(["billing refund"], [{"document_id": "shared"}])
+    await store.aadd_texts(
+        ["billing invoice", "billing billing router"],
+        [{"document_id": "mine", "user_id": "u1"}, {"document_id": "other", "user_id": "u1"}],
+        namespace="user-u1"
+    )
+    handle = IndexHandle(store)
+
+    def factory(user_id=None, document_ids=None):
+        search_kwargs = {"k": 3, "namespace": f"user-{user_id}" if user_id else ""}
+        if document_ids:
+            search_kwargs["filter"] = {"document_id": {"$in": document_ids}}
+        return HandleRetriever(handle=handle, search_kwargs=search_kwargs)
+
+    retriever = ScopedRetriever(factory=factory)
+    shared = await retriever.ainvoke("billing")
+    scope = retrieval_scope.set({"user_id": "u1", "document_ids": None})
+    try:
+        personal = await retriever.ainvoke("billing")
+        retrieval_scope.set({"user_id": "u1", "document_ids": ["other"]})
+        pinned = await retriever.ainvoke("billing")
+    finally:
+        retrieval_scope.reset(scope)
+
+    assert {d.metadata["document_id"] for d in shared} == {"shared"}
+    assert {d.metadata["document_id"] for d in personal} == {"mine", "other"}
+    assert {d.metadata["document_id"] for d in pinned} == {"other"}
@@ -0,0 +1,155 @@
+import pytest
+from datetime import datetime
+from app.db.mongodb import db
+from app.models.chat import ChatSession, Message, MessageRole
+from app.services.chat import ChatService
+from app.services.session_cache import SessionCache
+
+class RecordingCollection:
+    """Collection that records bulk writes, failing the first ``failures`` calls"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+        self.documents = {}
+        self.queries = []
+
+    async def find_one(self, filter, projection=None):
+        self.queries.append((filter, projection))
+        return self.documents.get(filter["id"])
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("MongoDB unavailable")
+        self.batches.append(operations)
+
+class RecordingDatabase:
+    def __init__(self, failures: int = 0):
+        self.sessions = RecordingCollection()
+        self.chat_messages = RecordingCollection(failures)
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    database = RecordingDatabase()
+    monkeypatch.setattr(db, "db", database)
+    return database
+
+def session(session_id: str, words: int = 10, user_id: str = "u1") -> ChatSession:
+    now = datetime.utcnow()
+    return ChatSession(
+        id=session_id,
+        user_id=user_id,
+        messages=[Message(role=MessageRole.USER, content="word " * words, seq=0)],
+        message_count=1,
+        created_at=now,
+        updated_at=now
+    )
+
+def test_cache_is_bounded_by_count_and_bytes():
+    """Test least recently used sessions are evicted past either limit"""
+    cache = SessionCache(max_sessions=2, max_bytes=10 ** 6)
+    for session_id in ("a", "b", "c"):
+        cache.put(session(session_id))
+    assert cache.get("a", "u1") is None and cache.get("c", "u1") is not None
+
+    small = SessionCache(max_sessions=10, max_bytes=7000)
+    small.put(session("a", words=300))
+    small.put(session("b", words=300))
+    small.get("a", "u1")
+    small.put(session("c", words=300))
+
+    assert small.get("b", "u1") is None
+    assert small.get("a", "u1") is not None
+    assert small.stats()["bytes"] <= 7000 and small.stats()["evictions"] == 1
+
+def test_cached_session_is_only_returned_to_its_owner():
+    cache = SessionCache()
+    cache.put(session("a"))
+
+    assert cache.get("a", "someone_else") is None
+    assert cache.get("a", "u1").id == "a"
+
+@pytest.mark.asyncio
+async def test_write_behind_appends_are_flushed_in_batches(recording_db):
+    """Test turns are buffered, then written with one bulk_write per collection"""
+    cache = SessionCache(durability="write_behind", flush_interval=3600)
+    service = ChatService(cache=cache)
+    await cache.start()
+    sessions = [session("a"), session("b")]
+    for turn in range(3):
+        for s in sessions:
+            await service.append_exchange(s, f"question {turn}", f"answer {turn}")
+
+    assert recording_db.chat_messages.batches == [] and cache.has_pending("a")
+    await cache.stop()
+
+    [messages] = recording_db.chat_messages.batches
+    [updates] = recording_db.sessions.batches
+    assert len(messages) == 12 and len(updates) == 2
+    assert [op._doc["seq"] for op in messages if op._doc["session_id"] == "a"] == list(range(1, 7))
+    assert all(op._doc["$max"] == {"message_count": 7} for op in updates)
+    assert not cache.has_pending()
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_writes_for_the_next_one(monkeypatch):
+    """Test buffered writes survive a failed flush and are written by the next"""
+    database = RecordingDatabase(failures=1)
+    monkeypatch.setattr(db, "db", database)
+    cache = SessionCache(durability="write_behind", flush_interval=3600)
+    service = ChatService(cache=cache)
+    await cache.start()
+    s = session("a")
+    await service.append_exchange(s, "question", "answer")
+
+    with pytest.raises(ConnectionError):
+        await cache.flush()
+    await service.append_exchange(s, "question 2", "answer 2")
+    await cache.stop()
+
+    assert [len(batch) for batch in database.chat_messages.batches] == [4]
+    assert database.sessions.batches[0][0]._doc["$max"] == {"message_count": 5}
+
+@pytest.mark.asyncio
+async def test_write_behind_waits_for_a_flush_when_too_much_is_pending(recording_db):
+    cache = SessionCache(durability="write_behind", flush_interval=3600, max_pending_messages=4)
+    service = ChatService(cache=cache)
+    await cache.start()
+    s = session("a")
+
+    await service.append_exchange(s, "question", "answer")
+    await service.append_exchange(s, "question 2", "answer 2")
+
+    assert len(recording_db.chat_messages.batches) == 1 and not cache.has_pending()
+    await cache.stop()
+
+@pytest.mark.asyncio
+async def test_get_session_is_served_from_cache(recording_db):
+    """Test a write-through hit costs one projected read and a write-behind hit none"""
+    cache = SessionCache()
+    service = ChatService(cache=cache)
+    cached = session("a")
+    cache.put(cached)
+    recording_db.sessions.documents["a"] = {"message_count": 1, "updated_at": cached.updated_at}
+
+    assert (await service.get_session("a", "u1")).id == "a" and cache.stats()["hits"] == 1
+    assert recording_db.sessions.queries == [({"id": "a"}, {"_id": 0, "message_count": 1, "updated_at": 1})]
+
+    behind = SessionCache(durability="write_behind", flush_interval=3600)
+    await behind.start()
+    behind.put(session("b"))
+    assert (await ChatService(cache=behind).get_session("b", "u1")).id == "b"
+    assert len(recording_db.sessions.queries) == 1
+    await behind.stop()
+
+@pytest.mark.asyncio
+async def test_stale_cached_session_is_not_served(recording_db):
+    """Test a write-through hit is dropped when MongoDB no longer matches it"""
+    cache = SessionCache()
+    service = ChatService(cache=cache)
+    cache.put(session("a"))
+
+    # Deleted by another process: the session is gone rather than served stale
+    assert await service.get_session("a", "u1") is None
+    assert cache.get("a", "u1") is None
+    assert cache.stats()["stale"] == 1 and cache.stats()["hits"] == 0
@@ -0,0 +1,139 @@
+import pytest
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.retrievers import BaseRetriever
+from app.api.v1 import deps
+from app.api.v1.endpoints import chat
+from app.core.streaming import StreamMetrics, stream_answer
+from app.models.chat import ChatSession
+from app.models.user import User
+from app.services.rag_service import RAGService
+
+def parse_events(body: str):
+    """(event, data) pairs of an SSE body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+async def slow_tokens(tokens: List[str], delay: float = 0.01):
+    for token in tokens:
+        await asyncio.sleep(delay)
+        yield token
+
+async def collect(events) -> str:
+    return "".join([event async for event in events])
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.documents
+
+def fake_rag_service(answer: str) -> RAGService:
+    """RAGService with a fixed retriever, the stuff prompt and a fake streaming model"""
+    service = RAGService.__new__(RAGService)
+    documents = [Document(page_content="Refunds are issued within 30 days.", metadata={"title": "Policy", "document_id": "d1"})]
+    service.create_retriever = lambda **kwargs: StaticRetriever(documents=documents)
+    service.llm = FakeListChatModel(responses=[answer])
+    prompt = ChatPromptTemplate.from_messages([("system", "Context: {context}"), ("human", "{question}")])
+    service.qa_chain = SimpleNamespace(combine_docs_chain=SimpleNamespace(
+        llm_chain=SimpleNamespace(prompt=prompt), document_variable_name="context"
+    ))
+    return service
+
+@pytest.mark.asyncio
+async def test_stream_answer_sends_sources_first_and_measures_ttft():
+    """Test the event order, the reported timings and the on_complete result"""
+    metrics = StreamMetrics()
+    saved = []
+
+    async def save(answer: str):
+        saved.append(answer)
+        return {"session_id": "s1"}
+
+    body = await collect(stream_answer(
+        {"sources": [{"title": "Policy"}]}, slow_tokens(["Re", "funds", "."]), on_complete=save, metrics=metrics
+    ))
+    events = parse_events(body)
+
+    assert [event for event, _ in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0][1] == {"sources": [{"title": "Policy"}]}
+    assert saved == ["Refunds."]
+    done = events[-1][1]
+    assert done["session_id"] == "s1" and done["tokens"] == 3
+    assert 5 <= done["ttft_ms"] < done["total_ms"]
+    assert metrics.stats()["streams"] == 1
+    assert metrics.stats()["time_to_first_token"]["p50_ms"] >= 5
+
+@pytest.mark.asyncio
+async def test_stream_answer_reports_errors():
+    """Test a model failure ends the stream with an error event and nothing is saved"""
+    metrics = StreamMetrics()
+    saved = []
+
+    async def failing():
+        yield "partial"
+        raise RuntimeError("model unavailable")
+
+    async def save(answer: str):
+        saved.append(answer)
+
+    events = parse_events(await collect(stream_answer({"sources": []}, failing(), on_complete=save, metrics=metrics)))
+
+    assert [event for event, _ in events] == ["sources", "token", "error"]
+    assert events[-1][1] == {"detail": "model unavailable"}
+    assert saved == []
+    assert metrics.stats()["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_rag_stream_response_streams_model_tokens():
+    """Test sources come back before the answer, which arrives in pieces"""
+    service = fake_rag_service("Within 30 days.")
+
+    sources, tokens = await service.stream_response("How long do refunds take?")
+    parts = [token async for token in tokens]
+
+    assert sources == [{"title": "Policy", "content": "Refunds are issued within 30 days.", "document_id": "d1"}]
+    assert len(parts) > 1
+    assert "".join(parts) == "Within 30 days."
+
+def test_stream_endpoint_persists_session(monkeypatch):
+    """Test the endpoint streams SSE and saves the exchange after the last token"""
+    user = User(id="u1", email="user@example.com", created_at=datetime.utcnow(), is_active=True)
+    session = ChatSession(id="s1", user_id="u1", created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+    saved = []
+
+    async def get_or_create_session(user_id, session_id=None):
+        return session
+
+    async def append_exchange(session, message, answer, sources=None):
+        saved.append((message, answer, sources))
+        return session
+
+    monkeypatch.setattr(chat.chat_service, "get_or_create_session", get_or_create_session)
+    monkeypatch.setattr(chat.chat_service, "append_exchange", append_exchange)
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+    app.dependency_overrides[deps.get_rag_service] = lambda: fake_rag_service("Within 30 days.")
+    app.dependency_overrides[deps.get_optional_user] = lambda: user
+
+    response = TestClient(app).post("/chat/stream", json={"content": "How long do refunds take?"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert events[0][0] == "sources"
+    assert events[0][1]["session_id"] == "s1"
+    assert "".join(data["content"] for event, data in events if event == "token") == "Within 30 days."
+    assert events[-1][0] == "done" and events[-1][1]["session_id"] == "s1"
+    assert saved == [("How long do refunds take?", "Within 30 days.", events[0][1]["sources"])]
@@ -0,0 +1,303 @@
+import pytest
+import asyncio
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from langchain_community.embeddings import FakeEmbeddings
+from app.services.retriever import HandleRetriever, IndexHandle
+from app.services.vector_index import NumpyVectorIndex, PineconeVectorIndex, ReadWriteLock, VectorIndexStore
+
+def make_vectors(count: int, dimension: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    values = rng.standard_normal((count, dimension)).astype(np.float32)
+    return [
+        {
+            "id": f"doc{i % 5}#{i}",
+            "values": values[i].tolist(),
+            "metadata": {"document_id": f"doc{i % 5}", "user_id": f"user{i % 2}", "text": f"chunk {i}"}
+        }
+        for i in range(count)
+    ], values
+
+def brute_force(values, query, rows, k):
+    normalized = values / np.linalg.norm(values, axis=1, keepdims=True)
+    scores = normalized[rows] @ (query / np.linalg.norm(query))
+    return [int(rows[i]) for i in np.argsort(-scores)[:k]]
+
+@pytest.mark.asyncio
+async def test_query_matches_brute_force_top_k():
+    """Test top-k cosine results are exact and best first"""
+    index = NumpyVectorIndex()
+    vectors, values = make_vectors(500)
+    await index.upsert(vectors)
+    query = values[7] + 0.1
+
+    results = await index.query(query.tolist(), top_k=5)
+
+    expected = brute_force(values, query, np.arange(500), 5)
+    assert [r["id"] for r in results] == [vectors[i]["id"] for i in expected]
+    assert results[0]["score"] >= results[-1]["score"]
+    assert results[0]["metadata"]["text"] == vectors[expected[0]]["metadata"]["text"]
+
+@pytest.mark.asyncio
+async def test_query_filters_on_document_and_user():
+    """Test document_id/user_id filters, including $in"""
+    index = NumpyVectorIndex()
+    vectors, values = make_vectors(200)
+    await index.upsert(vectors)
+    query = values[3].tolist()
+
+    by_document = await index.query(query, filter={"document_id": "doc3"}, top_k=50)
+    by_both = await index.query(query, filter={"document_id": {"$in": ["doc1", "doc2"]}, "user_id": "user0"}, top_k=50)
+
+    assert len(by_document) == 40
+    assert {r["metadata"]["document_id"] for r in by_document} == {"doc3"}
+    assert by_document[0]["id"] == "doc3#3"
+    assert {r["metadata"]["document_id"] for r in by_both} == {"doc1", "doc2"}
+    assert {r["metadata"]["user_id"] for r in by_both} == {"user0"}
+    assert await index.query(query, filter={"document_id": "missing"}) == []
+
+@pytest.mark.asyncio
+async def test_upsert_overwrites_and_delete_removes():
+    """Test upserting an existing ID replaces it and deleted IDs never return"""
+    index = NumpyVectorIndex()
+    vectors, values = make_vectors(20)
+    await index.upsert(vectors)
+
+    await index.upsert([{"id": "doc0#0", "values": values[1].tolist(), "metadata": {"document_id": "doc0", "text": "new"}}])
+    await index.delete([v["id"] for v in vectors if v["metadata"]["document_id"] == "doc1"])
+    results = await index.query(values[1].tolist(), top_k=20)
+    stats = await index.describe_index_stats()
+
+    assert results[0]["metadata"]["text"] in ("new", "chunk 1")
+    assert not any(r["id"].startswith("doc1#") for r in results)
+    assert await index.list_ids("doc1#") == []
+    assert stats["total_vector_count"] == 16
+
+@pytest.mark.asyncio
+async def test_fetch_returns_stored_records():
+    """Test fetch returns normalized values and metadata, skipping unknown IDs"""
+    index = NumpyVectorIndex()
+    vectors, values = make_vectors(10)
+    await index.upsert(vectors, namespace="user-1")
+
+    records = await index.fetch(["doc2#2", "missing"], namespace="user-1")
+
+    assert [r["id"] for r in records] == ["doc2#2"]
+    assert records[0]["metadata"] == vectors[2]["metadata"]
+    assert np.allclose(records[0]["values"], values[2] / np.linalg.norm(values[2]), atol=1e-6)
+    assert await index.fetch(["doc2#2"]) == []
+
+@pytest.mark.asyncio
+async def test_index_persists_and_reuses_rows(tmp_path):
+    """Test the memory-mapped index reloads from disk, namespaces included"""
+    index = NumpyVectorIndex(str(tmp_path / "index"))
+    vectors, values = make_vectors(50)
+    await index.upsert(vectors)
+    await index.upsert(vectors[:3], namespace="user-1")
+    await index.delete(["doc0#0", "doc1#1"])
+    index.close()
+
+    reopened = NumpyVectorIndex(str(tmp_path / "index"))
+    results = await reopened.query(values[2].tolist(), top_k=1)
+    stats = await reopened.describe_index_stats()
+
+    assert results[0]["id"] == "doc2#2"
+    assert stats["namespaces"][""]["vector_count"] == 48
+    assert stats["namespaces"]["user-1"]["vector_count"] == 3
+    await reopened.upsert([{"id": "new#0", "values": values[0].tolist(), "metadata": {}}])
+    assert (await reopened.describe_index_stats())["namespaces"][""]["vector_count"] == 49
+    reopened.compact()
+    reopened.close()
+    assert (await NumpyVectorIndex(str(tmp_path / "index")).query(values[0].tolist(), top_k=1))[0]["id"] == "new#0"
+
+@pytest.mark.asyncio
+async def test_record_log_is_compacted_automatically(tmp_path):
+    """Test re-upserts and deletes rewrite the record log once enough are superseded"""
+    index = NumpyVectorIndex(str(tmp_path / "index"), log_compaction_threshold=1.0)
+    vectors, values = make_vectors(20)
+    for _ in range(3):
+        await index.upsert(vectors)
+    await index.delete([vector["id"] for vector in vectors[:5]])
+    index.close()
+
+    lines = (tmp_path / "index" / "__default__" / "records.jsonl").read_text().splitlines()
+    assert len(lines) == 1 + 20 + 5  # Header, the last upsert and the deletes
+    reopened = NumpyVectorIndex(str(tmp_path / "index"))
+    assert (await reopened.describe_index_stats())["total_vector_count"] == 15
+    assert (await reopened.query(values[7].tolist(), top_k=1))[0]["id"] == vectors[7]["id"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+async def test_quantized_first_pass_is_rescored(quantization):
+    """Test quantized scans return the exact top-k with full-precision scores"""
+    exact = NumpyVectorIndex()
+    quantized = NumpyVectorIndex(quantization=quantization, rescore_factor=4)
+    vectors, values = make_vectors(1000, dimension=64)
+    await exact.upsert(vectors)
+    await quantized.upsert(vectors)
+    await quantized.delete(["doc1#1"])
+    await exact.delete(["doc1#1"])
+
+    for i in (0, 1, 250, 999):
+        expected = await exact.query(values[i].tolist(), top_k=5)
+        results = await quantized.query(values[i].tolist(), top_k=5)
+        assert [r["id"] for r in results] == [r["id"] for r in expected]
+        assert results[0]["score"] == pytest.approx(expected[0]["score"], abs=1e-6)
+
+    memory = (await quantized.describe_index_stats())["namespaces"][""]["memory_bytes"]
+    itemsize = 1 if quantization == "int8" else 2
+    assert memory["quantized"] >= 1000 * 64 * itemsize
+    assert memory["quantized"] < memory["vectors"]
+
+class DictChunkStore:
+    """In-memory stand-in for ChunkStore that counts lookups"""
+
+    def __init__(self):
+        self.texts = {}
+        self.lookups = []
+
+    async def put(self, ids, texts, metadatas):
+        self.texts.update(zip(ids, texts))
+
+    async def get_many(self, ids):
+        self.lookups.append(list(ids))
+        return {id: self.texts[id] for id in ids if id in self.texts}
+
+@pytest.mark.asyncio
+async def test_store_keeps_text_out_of_metadata():
+    """Test chunk text goes to the chunk store and is hydrated in one lookup per query"""
+    index = NumpyVectorIndex()
+    chunks = DictChunkStore()
+    store = VectorIndexStore(index, FakeEmbeddings(size=16), chunk_store=chunks)
+    ids = await store.aadd_texts([f"text {i}" for i in range(5)], [{"document_id": "doc", "chunk_index": i} for i in range(5)])
+    await index.upsert([{"id": "legacy#0", "values": [1.0] * 16, "metadata": {"text": "legacy text"}}])
+
+    docs = await store.asimilarity_search("query", k=6)
+    records = await index.fetch(ids)
+
+    assert all("text" not in record["metadata"] for record in records)
+    assert {doc.page_content for doc in docs} == {f"text {i}" for i in range(5)} | {"legacy text"}
+    assert len(chunks.lookups) == 1 and set(chunks.lookups[0]) == set(ids)
+
+def test_read_write_lock_shares_reads_and_serializes_writes():
+    """Test readers overlap, a writer waits for them, and waiting writers hold back new readers"""
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+    overlapped = []
+
+    def read_together():
+        with lock.read():
+            both_reading.wait()
+            overlapped.append(True)
+
+    readers = [threading.Thread(target=read_together) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    assert overlapped == [True, True]
+
+    wrote, late_read = threading.Event(), threading.Event()
+
+    def write():
+        with lock.write():
+            wrote.set()
+
+    def read():
+        with lock.read():
+            late_read.set()
+
+    with lock.read():
+        writer = threading.Thread(target=write)
+        writer.start()
+        assert not wrote.wait(0.1)
+        reader = threading.Thread(target=read)
+        reader.start()
+        assert not late_read.wait(0.1)
+    assert wrote.wait(5) and late_read.wait(5)
+    writer.join()
+    reader.join()
+
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+
+def test_sync_store_api_runs_outside_an_event_loop():
+    """Test the sync wrappers work from plain sync code"""
+    store = VectorIndexStore.from_texts(["first chunk", "second chunk"], FakeEmbeddings(size=8))
+
+    assert len(store.similarity_search("first chunk", k=2)) == 2
+
+@pytest.mark.asyncio
+async def test_sync_store_api_inside_an_event_loop_points_to_async_api():
+    """Test calling the sync wrappers from a running loop fails with a clear error"""
+    store = VectorIndexStore(NumpyVectorIndex(), FakeEmbeddings(size=8))
+    retriever = HandleRetriever(handle=IndexHandle(store))
+
+    with pytest.raises(RuntimeError, match="aadd_texts"):
+        store.add_texts(["chunk"])
+    with pytest.raises(RuntimeError, match="ainvoke"):
+        retriever.invoke("chunk")
+    await store.aadd_texts(["chunk"])
+    assert len(await retriever.ainvoke("chunk")) == 1
+
+class SlowPineconeIndex:
+    """Sync Pinecone stand-in whose calls block like a network round trip"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def query(self, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+        return SimpleNamespace(matches=[SimpleNamespace(id="doc#0", score=0.9, metadata={"document_id": "doc"})])
+
+@pytest.mark.asyncio
+async def test_slow_vector_calls_do_not_block_event_loop():
+    """Test the loop keeps ticking while slow calls run, at most max_workers at a time"""
+    slow = SlowPineconeIndex(latency=0.2)
+    index = PineconeVectorIndex(slow, timeout=5, executor=ThreadPoolExecutor(max_workers=4))
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        for _ in range(40):
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    started = time.perf_counter()
+    results, _ = await asyncio.gather(
+        asyncio.gather(*(index.query([0.1] * 4) for _ in range(8))),
+        ticker()
+    )
+
+    assert all(r[0]["id"] == "doc#0" for r in results)
+    assert max(gaps) < 0.1
+    assert slow.peak == 4
+    assert 0.4 <= time.perf_counter() - started < 1.0
+
+@pytest.mark.asyncio
+async def test_vector_call_timeout():
+    """Test calls over the timeout raise TimeoutError, including while queued"""
+    slow = SlowPineconeIndex(latency=0.3)
+    index = PineconeVectorIndex(slow, timeout=0.1, executor=ThreadPoolExecutor(max_workers=1))
+
+    results = await asyncio.gather(*(index.query([0.1] * 4) for _ in range(3)), return_exceptions=True)
+    await asyncio.sleep(0.4)
+
+    assert all(isinstance(r, TimeoutError) for r in results)
+    # Queued calls were cancelled before they reached the client
+    assert slow.peak == 1
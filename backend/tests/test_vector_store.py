@@ -1,5 +1,13 @@
 import pytest
-from app.services.vector_store import vector_store_service
+from app.core.config import settings
+from app.services import vector_store as vector_store_module
+from app.services.chunk_store import chunk_store
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_index import NumpyVectorIndex
+from app.services.vector_store import VectorStoreService, migrate_to_tenant_namespaces, vector_store_service
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from langchain_community.embeddings import FakeEmbeddings
 
 @pytest.mark.asyncio
 async def test_vector_embedding(vector_store):
@@ -35,4 +43,148 @@ async def test_vector_search(vector_store):
         filter={"document_id": "doc1"}
     )
     
-    assert len(results) > 0 
\ No newline at end of file
+    assert len(results) > 0 
+
+@pytest.mark.asyncio
+async def test_embedding_batches_respect_token_budget(vector_store):
+    """Test chunks are packed in order into token-budgeted batches"""
+    batcher = EmbeddingBatcher(
+        vector_store.embeddings,
+        max_tokens_per_batch=50,
+        max_batch_size=3,
+        count_tokens=lambda text: len(text.split())
+    )
+    texts = [f"chunk number {i} " * 5 for i in range(10)]
+    
+    batches = batcher.pack(texts)
+    
+    assert [i for batch in batches for i in batch] == list(range(10))
+    assert all(len(batch) <= 3 for batch in batches)
+    assert all(
+        sum(batcher.count_tokens(texts[i]) for i in batch) <= 50
+        for batch in batches if len(batch) > 1
+    )
+
+@pytest.mark.asyncio
+async def test_embedding_batches_are_retried():
+    """Test a failed batch is retried instead of failing the document"""
+    class FlakyEmbeddings(FakeEmbeddings):
+        calls: int = 0
+        
+        async def aembed_documents(self, texts):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("rate limited")
+            return self.embed_documents(texts)
+    
+    batcher = EmbeddingBatcher(
+        FlakyEmbeddings(size=8),
+        max_retries=2,
+        retry_backoff=0,
+        count_tokens=lambda text: len(text.split())
+    )
+    
+    vectors = await batcher.embed(["one", "two", "three"])
+    
+    assert len(vectors) == 3
+    assert batcher.stats["retries"] == 1
+
+@pytest.mark.asyncio
+async def test_repeat_query_skips_embedding_call(vector_store):
+    """Test a repeated question is answered from the query embedding cache"""
+    class CountingEmbeddings(FakeEmbeddings):
+        query_calls: int = 0
+        
+        async def aembed_query(self, text):
+            self.query_calls += 1
+            return self.embed_query(text)
+    
+    model = CountingEmbeddings(size=1536)
+    query_cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+    vector_store.embeddings = CachedEmbeddings(model, query_cache=query_cache)
+    
+    await vector_store.search(query="What is quantum computing?", filter={"document_id": "doc1"})
+    await vector_store.search(query="  what is QUANTUM computing? ", filter={"document_id": "doc1"})
+    
+    assert model.query_calls == 1
+    assert query_cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_vector_ids_are_deterministic(vector_store):
+    """Test re-embedding a document reuses its IDs and documents never collide"""
+    texts = ["Hello world", "This is a test document"]
+    doc1_metadata = [
+        {"document_id": "doc1", "chunk_index": 0},
+        {"document_id": "doc1", "chunk_index": 1}
+    ]
+    doc2_metadata = [
+        {"document_id": "doc2", "chunk_index": 0},
+        {"document_id": "doc2", "chunk_index": 1}
+    ]
+    
+    first = await vector_store.create_embeddings(texts, doc1_metadata)
+    again = await vector_store.create_embeddings(texts, doc1_metadata)
+    other = await vector_store.create_embeddings(texts, doc2_metadata)
+    
+    assert [vec["id"] for vec in first] == ["doc1#0", "doc1#1"]
+    assert [vec["id"] for vec in again] == ["doc1#0", "doc1#1"]
+    assert not {vec["id"] for vec in first} & {vec["id"] for vec in other}
+
+@pytest.mark.asyncio
+async def test_delete_vectors_in_batches(vector_store, monkeypatch):
+    """Test deletes are split into size-limited batches covering every ID"""
+    deleted_batches = []
+    
+    async def delete(ids, namespace=None):
+        deleted_batches.append(ids)
+    
+    async def delete_chunks(ids):
+        pass
+    
+    vector_store.index.delete = delete
+    monkeypatch.setattr(chunk_store, "delete", delete_chunks)
+    vector_ids = [f"doc1#{i}" for i in range(2500)]
+    
+    assert await vector_store.delete_vectors(vector_ids)
+    
+    assert all(len(batch) <= 1000 for batch in deleted_batches)
+    assert sorted(id for batch in deleted_batches for id in batch) == sorted(vector_ids)
+
+
+@pytest.mark.asyncio
+async def test_delete_vectors_connects_to_the_index(monkeypatch):
+    """Test a service that was never initialized still deletes its vectors"""
+    index = NumpyVectorIndex()
+    await index.upsert([{"id": "doc1#0", "values": [1.0, 0.0], "metadata": {}}])
+    monkeypatch.setattr(vector_store_module, "get_vector_index", lambda: index)
+    monkeypatch.setattr(vector_store_module, "create_embeddings", lambda: FakeEmbeddings(size=2))
+    monkeypatch.setattr(settings, "CHUNK_STORE_ENABLED", False)
+
+    assert await VectorStoreService().delete_vectors(["doc1#0"])
+    assert await index.list_ids(prefix="") == []
+
+@pytest.mark.asyncio
+async def test_migrate_moves_vectors_to_user_namespaces():
+    """Test shared-namespace vectors move to their owners' namespaces, document vectors included"""
+    index = NumpyVectorIndex()
+    await index.upsert([
+        {"id": f"doc{i}#0", "values": [1.0, float(i)], "metadata": {"document_id": f"doc{i}", **({"user_id": f"u{i % 2}"} if i < 4 else {})}}
+        for i in range(6)
+    ])
+    await index.upsert([{"id": "doc1", "values": [1.0, 1.0], "metadata": {"document_id": "doc1", "user_id": "u1"}}], namespace="__documents__")
+
+    lexical = LexicalIndex()
+    lexical.add(["doc1#0", "doc4#0"], ["chunk one", "chunk four"], [{"user_id": "u1"}, {}])
+
+    planned = await migrate_to_tenant_namespaces(index, lexical, batch_size=2, dry_run=True)
+    moved = await migrate_to_tenant_namespaces(index, lexical, batch_size=2)
+    stats = (await index.describe_index_stats())["namespaces"]
+
+    assert planned == moved == {"user-u0": 2, "user-u1": 2, "user-u1__documents__": 1}
+    assert stats[""]["vector_count"] == 2
+    assert stats["user-u1"]["vector_count"] == 2
+    assert stats["__documents__"]["vector_count"] == 0
+    assert (await index.fetch(["doc3#0"], namespace="user-u1"))[0]["metadata"]["user_id"] == "u1"
+    assert [id for id, *_ in lexical.search("chunk", namespace="user-u1")] == ["doc1#0"]
+    assert [id for id, *_ in lexical.search("chunk", namespace="")] == ["doc4#0"]
+    assert await migrate_to_tenant_namespaces(index) == {}
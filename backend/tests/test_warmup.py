@@ -0,0 +1,88 @@
+import pytest
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import health
+from app.core.warmup import Readiness
+
+def sleeper(seconds: float, error: str = None):
+    async def step():
+        await asyncio.sleep(seconds)
+        if error:
+            raise RuntimeError(error)
+    return step
+
+@pytest.mark.asyncio
+async def test_warmup_steps_run_in_parallel():
+    """Test steps overlap, so warm-up takes as long as the slowest one"""
+    readiness = Readiness()
+    started = time.perf_counter()
+    await readiness.run({name: sleeper(0.2) for name in ("mongodb", "rag_service", "tokenizers")})
+
+    assert time.perf_counter() - started < 0.4
+    assert readiness.ready
+    assert readiness.report()["status"] == "ready"
+    assert all(step["seconds"] >= 0.2 for step in readiness.report()["steps"].values())
+
+def flaky(failures: int, error: str):
+    """Step that fails ``failures`` times, then succeeds"""
+    calls = []
+    async def step():
+        calls.append(time.perf_counter())
+        if len(calls) <= failures:
+            raise RuntimeError(error)
+    step.calls = calls
+    return step
+
+@pytest.mark.asyncio
+async def test_failed_step_is_reported_without_stopping_others():
+    """Test a failing step leaves the app not ready while the others complete"""
+    readiness = Readiness(retry_delay=60)
+    warmup = asyncio.create_task(
+        readiness.run({"mongodb": sleeper(0.01, error="connection refused"), "tokenizers": sleeper(0.05)})
+    )
+    await asyncio.sleep(0.1)
+
+    report = readiness.report()
+    assert not readiness.ready
+    assert report["status"] == "failed"
+    assert report["steps"]["mongodb"]["status"] == "failed"
+    assert report["steps"]["mongodb"]["error"] == "connection refused"
+    assert report["steps"]["tokenizers"]["status"] == "ready"
+    warmup.cancel()
+    await asyncio.gather(warmup, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_failed_step_is_retried_with_backoff_until_ready():
+    """Test the app becomes ready once a failing dependency comes up"""
+    readiness = Readiness(retry_delay=0.02, max_retry_delay=0.05)
+    mongodb = flaky(failures=3, error="connection refused")
+
+    await asyncio.wait_for(readiness.run({"mongodb": mongodb, "tokenizers": sleeper(0)}), timeout=5)
+
+    assert readiness.ready and readiness.report()["status"] == "ready"
+    assert readiness.report()["steps"]["mongodb"]["attempts"] == 4
+    gaps = [later - earlier for earlier, later in zip(mongodb.calls, mongodb.calls[1:])]
+    assert gaps[0] >= 0.02 and gaps[1] >= 0.04 and gaps[2] >= 0.05
+
+def test_liveness_and_readiness_endpoints(monkeypatch):
+    """Test the app is live during warm-up but only ready after it"""
+    readiness = Readiness()
+    monkeypatch.setattr(health, "readiness", readiness)
+    app = FastAPI()
+    app.include_router(health.router)
+    client = TestClient(app)
+
+    readiness.started_at = time.perf_counter()
+    readiness.steps = {"rag_service": {"status": "pending"}}
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    asyncio.run(readiness.run({"rag_service": sleeper(0)}))
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["steps"]["rag_service"]["status"] == "ready"